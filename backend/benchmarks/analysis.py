@@ -0,0 +1,276 @@
+"""
+Analysis benchmark suite.
+
+Times the analysis code on the synthetic corpus (benchmarks/corpus.py) for
+each duration and language:
+
+  - analyze_acoustics, analyze_conviction, generate_smart_insights (upload path)
+  - every ProAudioAnalyzer stage: audio_metrics, prosody (when Parselmouth is
+    installed), fillers, emotions, and the GPT prompt build (no API call)
+  - JobQueue throughput: full Pro analyses through the queue's workers
+
+Each case runs once untimed, then --repeat times; the median is what gets
+compared. Results are JSON (--output). --compare flags cases whose median
+grew more than --threshold (relative) and --min-delta-ms (absolute, to
+ignore noise on sub-millisecond cases) over a saved baseline, and exits 1
+if any did.
+
+Usage (from backend/):
+    python -m benchmarks.analysis --output baseline.json
+    python -m benchmarks.analysis --compare baseline.json
+    python -m benchmarks.analysis --durations 30 120 --repeat 5 --only conviction insights
+    python -m benchmarks.analysis --results new.json --compare baseline.json  # no run
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.corpus import build_corpus  # noqa: E402
+from benchmarks.login_storm import configure_environment  # noqa: E402
+
+GROUPS = ("acoustics", "conviction", "insights", "pro_stages", "job_queue")
+
+
+def time_case(func, repeat: int):
+    """Run func once to warm up, then `repeat` timed runs; returns the stats in ms."""
+    func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": repeat,
+    }
+
+
+def upload_metrics(acoustics, conviction):
+    """The metrics dict the upload endpoint passes to generate_smart_insights."""
+    duration = acoustics["duration"] or 1
+    return {
+        "pace": round(conviction["total_words"] / (duration / 60), 1),
+        "disfluencies_per_minute": round(conviction["disfluency_count"] / (duration / 60), 1),
+        "pitch_variation": acoustics["pitch_variation"],
+        "duration": duration,
+    }
+
+
+def bench_upload_path(corpus, args, cases):
+    import main
+
+    for entry in corpus:
+        duration = int(entry["duration"])
+        if "acoustics" in args.only:
+            cases[f"analyze_acoustics[{duration}s]"] = time_case(
+                lambda: main.analyze_acoustics(entry["audio_path"]), args.repeat
+            )
+        acoustics = main.analyze_acoustics(entry["audio_path"]) if "insights" in args.only else None
+
+        for language, transcript in entry["transcripts"].items():
+            if "conviction" in args.only:
+                cases[f"analyze_conviction[{duration}s,{language}]"] = time_case(
+                    lambda: main.analyze_conviction(transcript), args.repeat
+                )
+            if "insights" in args.only:
+                metrics = upload_metrics(acoustics, main.analyze_conviction(transcript))
+                cases[f"generate_smart_insights[{duration}s,{language}]"] = time_case(
+                    lambda: main.generate_smart_insights(metrics, transcript, language=language), args.repeat
+                )
+
+
+def bench_pro_stages(corpus, args, cases):
+    from services.pro_analyzer import PARSELMOUTH_AVAILABLE, ProAudioAnalyzer
+
+    analyzer = ProAudioAnalyzer(openai_api_key="")  # Never calls the API
+    for entry in corpus:
+        duration = int(entry["duration"])
+        audio_path = entry["audio_path"]
+        cases[f"pro.audio_metrics[{duration}s]"] = time_case(
+            lambda: analyzer._extract_audio_metrics(audio_path), args.repeat
+        )
+        metrics = analyzer._extract_audio_metrics(audio_path)
+        prosody = {}
+        if PARSELMOUTH_AVAILABLE:
+            cases[f"pro.prosody[{duration}s]"] = time_case(lambda: analyzer._analyze_prosody(audio_path), args.repeat)
+            prosody = analyzer._analyze_prosody(audio_path)
+
+        for language, transcript in entry["transcripts"].items():
+            cases[f"pro.fillers[{duration}s,{language}]"] = time_case(
+                lambda: analyzer._extract_fillers(transcript), args.repeat
+            )
+            fillers = analyzer._extract_fillers(transcript)
+            cases[f"pro.emotions[{duration}s,{language}]"] = time_case(
+                lambda: analyzer._detect_emotions(metrics, prosody), args.repeat
+            )
+            cases[f"pro.gpt_prompt[{duration}s,{language}]"] = time_case(
+                lambda: analyzer._build_gpt_prompt(transcript, metrics, prosody, fillers, "general"), args.repeat
+            )
+
+
+async def run_job_queue(audio_path: str, transcript: str, jobs: int, workers: int) -> float:
+    """Seconds until `jobs` Pro analyses submitted at once have all finished."""
+    from services.job_queue import JobQueue, JobStatus
+
+    queue = JobQueue(max_concurrent_workers=workers, max_retries=0)
+    started = time.perf_counter()
+    job_ids = [await queue.add_job(f"bench-{i}", audio_path, transcript) for i in range(jobs)]
+    terminal = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+    while not all(queue.get_job(job_id).status in terminal for job_id in job_ids):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    failed = [job_id for job_id in job_ids if queue.get_job(job_id).status != JobStatus.COMPLETED]
+    if failed:
+        raise RuntimeError(f"{len(failed)} benchmark jobs failed: {queue.get_job(failed[0]).error}")
+    return elapsed
+
+
+def bench_job_queue(corpus, args, cases):
+    entry = corpus[0]  # Shortest clip: measures queue overhead and parallelism, not one long analysis
+    transcript = entry["transcripts"][args.languages[0]]
+    asyncio.run(run_job_queue(entry["audio_path"], transcript, 1, 1))  # Warm-up
+
+    per_job_ms = []
+    for _ in range(args.repeat):
+        elapsed = asyncio.run(run_job_queue(entry["audio_path"], transcript, args.jobs, args.workers))
+        per_job_ms.append(elapsed * 1000 / args.jobs)
+    case = {
+        "median_ms": round(statistics.median(per_job_ms), 3),
+        "min_ms": round(min(per_job_ms), 3),
+        "max_ms": round(max(per_job_ms), 3),
+        "runs": args.repeat,
+    }
+    case["jobs_per_second"] = round(1000 / case["median_ms"], 2)
+    cases[f"job_queue.per_job[{int(entry['duration'])}s,{args.jobs}x,{args.workers}w]"] = case
+
+
+def run(args):
+    cases = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(workdir)
+        os.environ.pop("OPENAI_API_KEY", None)  # Keep GPT out of the timings
+        corpus = build_corpus(args.corpus_dir or os.path.join(workdir, "corpus"), args.durations, args.languages)
+
+        if {"acoustics", "conviction", "insights"} & set(args.only):
+            bench_upload_path(corpus, args, cases)
+        if "pro_stages" in args.only:
+            bench_pro_stages(corpus, args, cases)
+        if "job_queue" in args.only:
+            bench_job_queue(corpus, args, cases)
+
+    import librosa
+    import numpy as np
+
+    return {
+        "benchmark": "analysis",
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "librosa": librosa.__version__,
+        },
+        "cases": cases,
+    }
+
+
+def compare(results, baseline, threshold: float, min_delta_ms: float):
+    """Rows of (case, baseline_ms, current_ms, change, status) for cases present in both."""
+    rows = []
+    for case, current in results["cases"].items():
+        previous = baseline["cases"].get(case)
+        if previous is None:
+            rows.append((case, None, current["median_ms"], None, "new"))
+            continue
+        before, after = previous["median_ms"], current["median_ms"]
+        change = (after - before) / before if before else 0.0
+        if change > threshold and after - before > min_delta_ms:
+            status = "REGRESSION"
+        elif change < -threshold and before - after > min_delta_ms:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((case, before, after, change, status))
+    return rows
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[30, 120, 300, 900], help="Clip lengths in seconds")
+    parser.add_argument("--languages", nargs="+", default=["en", "es"])
+    parser.add_argument("--only", nargs="+", default=list(GROUPS), choices=GROUPS, help="Benchmark groups to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (after one warm-up run)")
+    parser.add_argument("--jobs", type=int, default=8, help="Jobs submitted for the JobQueue throughput case")
+    parser.add_argument("--workers", type=int, default=2, help="JobQueue workers")
+    parser.add_argument("--corpus-dir", help="Keep the generated corpus here (default: temporary)")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--results", help="Compare this results file instead of running")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown counted as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore changes smaller than this")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON only")
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as f:
+            results = json.load(f)
+    else:
+        results = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not args.compare:
+        if args.json:
+            print(json.dumps(results, indent=2))
+            return
+        print(f"\n{'case':<48} {'median ms':>11} {'min ms':>10} {'max ms':>10}")
+        for case, stats in results["cases"].items():
+            print(f"{case:<48} {stats['median_ms']:>11.2f} {stats['min_ms']:>10.2f} {stats['max_ms']:>10.2f}")
+        return
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold, args.min_delta_ms)
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+
+    if args.json:
+        print(json.dumps({
+            "results": results,
+            "comparison": [
+                {"case": case, "baseline_ms": before, "current_ms": after, "change": change, "status": status}
+                for case, before, after, change, status in rows
+            ],
+            "regressions": len(regressions),
+        }, indent=2))
+    else:
+        print(f"\n{'case':<48} {'baseline ms':>12} {'current ms':>11} {'change':>8}  status")
+        for case, before, after, change, status in rows:
+            before_text = f"{before:.2f}" if before is not None else "-"
+            change_text = f"{change:+.0%}" if change is not None else "-"
+            print(f"{case:<48} {before_text:>12} {after:>11.2f} {change_text:>8}  {status}")
+        missing = sorted(set(baseline["cases"]) - set(results["cases"]))
+        if missing:
+            print(f"Not run (in baseline only): {', '.join(missing)}")
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%} / {args.min_delta_ms:g} ms")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
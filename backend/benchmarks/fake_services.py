@@ -0,0 +1,559 @@
+"""
+Local stand-ins for Supabase, OpenAI and Stripe, for offline load tests.
+
+- Supabase: the subset of PostgREST that services/repositories.py uses
+  (select with embedded resources, eq/neq/gt/gte/lt/lte/in/is filters,
+  or=(...), order, limit/offset, count=exact, insert/update/delete with
+  return=representation) plus the RPCs of the setup_*.sql files, all on the
+  embedded SQLite schema. RPCs reuse the SQLite repositories, so their
+  semantics are the same as the sqlite backend's.
+- OpenAI: POST /v1/chat/completions with a canned coaching answer.
+- Stripe: checkout sessions (create/retrieve), always "paid".
+
+Each service adds latency_ms +/- jitter to every response, to model the
+network and the provider. Point the API at them with SUPABASE_URL,
+OPENAI_BASE_URL and STRIPE_API_BASE (benchmarks/load_test.py does this).
+
+Usage (from backend/):
+    python -m benchmarks.fake_services --supabase-latency-ms 20 --openai-latency-ms 1500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+
+# Columns stored as JSON text in SQLite that PostgREST returns as jsonb
+JSON_COLUMNS = {("user_progress", "recent"), ("pro_analyses", "result")}
+FILTER_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+class Latency:
+    """Per-response delay: latency_ms +/- jitter (uniform, as a fraction of latency_ms)."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter: float = 0.2):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+
+    async def wait(self):
+        if self.latency_ms > 0:
+            delay = self.latency_ms * (1 + random.uniform(-self.jitter, self.jitter))
+            await asyncio.sleep(delay / 1000)
+
+
+class PostgrestError(Exception):
+    def __init__(self, status_code: int, message: str, code: str = "PGRST100"):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.code = code
+
+
+# ==============================================================================
+# SUPABASE (PostgREST subset over SQLite)
+# ==============================================================================
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas that are not inside parentheses or double quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+class TableQuery:
+    """A PostgREST read/write on one table, translated to SQLite."""
+
+    def __init__(self, connection: sqlite3.Connection, table: str, params: List[Tuple[str, str]]):
+        self.connection = connection
+        self.table = self._check_table(table)
+        self.columns = self._table_columns(self.table)
+        self.params = params
+        self.selected: List[str] = []
+        self.embeds: Dict[str, Dict[str, Any]] = {}  # name -> {"inner", "columns", "fk", "conditions"}
+        self.where: List[str] = []
+        self.where_args: List[Any] = []
+        self.order: List[str] = []
+        self.limit: Optional[int] = None
+        self.offset: Optional[int] = None
+        self._parse()
+
+    # --- parsing ------------------------------------------------------------
+
+    def _check_table(self, table: str) -> str:
+        exists = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if not exists:
+            raise PostgrestError(404, f'relation "public.{table}" does not exist', "42P01")
+        return table
+
+    def _table_columns(self, table: str) -> Dict[str, Dict[str, Any]]:
+        return {row["name"]: dict(row) for row in self.connection.execute(f'PRAGMA table_info("{table}")')}
+
+    def _quoted(self, table: str, column: str) -> str:
+        """Quoted column name; unknown columns are rejected (they never reach the SQL)."""
+        columns = self.columns if table == self.table else self._table_columns(table)
+        if column not in columns:
+            raise PostgrestError(400, f'column {table}.{column} does not exist', "42703")
+        return f'"{column}"'
+
+    def _column(self, table: str, column: str, alias: str) -> str:
+        return f"{alias}.{self._quoted(table, column)}"
+
+    def _parse(self):
+        select = "*"
+        for key, value in self.params:
+            if key == "select":
+                select = value
+            elif key == "order":
+                for term in value.split(","):
+                    column, _, direction = term.partition(".")
+                    direction = "DESC" if direction.startswith("desc") else "ASC"
+                    self.order.append(f"{self._column(self.table, column, 't')} {direction}")
+            elif key == "limit":
+                self.limit = int(value)
+            elif key == "offset":
+                self.offset = int(value)
+            elif key == "or":
+                sql, args = self._logic("or", value[1:-1])
+                self.where.append(sql)
+                self.where_args.extend(args)
+
+        for item in _split_top_level(select):
+            match = re.fullmatch(r"(\w+)(!inner)?\((.*)\)", item)
+            if match:
+                name, inner, columns = match.groups()
+                self.embeds[name] = {
+                    "inner": bool(inner),
+                    "columns": [column for column in columns.split(",") if column],
+                    "fk": self._foreign_key(name),
+                    "conditions": [],
+                    "args": [],
+                }
+            else:
+                self.selected.append(item)
+
+        # Filters after the select is known: "sessions.user_email" filters an embed
+        for key, value in self.params:
+            if key in ("select", "order", "limit", "offset", "or"):
+                continue
+            embed, _, column = key.rpartition(".")
+            if embed and embed not in self.embeds:
+                raise PostgrestError(400, f"'{embed}' is not an embedded resource in this request")
+            sql, args = self._condition(embed or None, column, value)
+            if embed:
+                self.embeds[embed]["conditions"].append(sql)
+                self.embeds[embed]["args"].extend(args)
+            else:
+                self.where.append(sql)
+                self.where_args.extend(args)
+
+    def _foreign_key(self, referenced: str) -> Tuple[str, str]:
+        for row in self.connection.execute(f'PRAGMA foreign_key_list("{self.table}")'):
+            if row["table"] == referenced:
+                return row["from"], row["to"]
+        raise PostgrestError(400, f"Could not find a relationship between '{self.table}' and '{referenced}'", "PGRST200")
+
+    def _condition(self, embed: Optional[str], column: str, expression: str):
+        alias = f"e_{embed}" if embed else "t"
+        target = self._column(embed or self.table, column, alias)
+        operator, _, value = expression.partition(".")
+        if operator in FILTER_OPERATORS:
+            return f"{target} {FILTER_OPERATORS[operator]} ?", [value]
+        if operator == "in":
+            values = [item.strip('"') for item in _split_top_level(value[1:-1])]
+            return f"{target} IN ({', '.join('?' for _ in values)})", values
+        if operator == "is":
+            literal = {"null": "NULL", "true": "1", "false": "0"}.get(value)
+            if literal is None:
+                raise PostgrestError(400, f'"failed to parse filter (is.{value})"')
+            return (f"{target} IS NULL", []) if literal == "NULL" else (f"{target} = {literal}", [])
+        raise PostgrestError(400, f'"failed to parse filter ({expression})"')
+
+    def _logic(self, operator: str, body: str):
+        clauses, args = [], []
+        for item in _split_top_level(body):
+            nested = re.fullmatch(r"(and|or)\((.*)\)", item)
+            if nested:
+                sql, item_args = self._logic(nested.group(1), nested.group(2))
+            else:
+                column, _, expression = item.partition(".")
+                sql, item_args = self._condition(None, column, expression)
+            clauses.append(sql)
+            args.extend(item_args)
+        return "(" + f" {operator.upper()} ".join(clauses) + ")", args
+
+    # --- execution ----------------------------------------------------------
+
+    def _from_clause(self):
+        sql, args = f'"{self.table}" t', []
+        for name, embed in self.embeds.items():
+            alias = f"e_{name}"
+            local, remote = embed["fk"]
+            condition = " AND ".join([f'{alias}."{remote}" = t."{local}"', *embed["conditions"]])
+            sql += f' {"JOIN" if embed["inner"] else "LEFT JOIN"} "{name}" {alias} ON {condition}'
+            args.extend(embed["args"])
+        return sql, args
+
+    def _where_clause(self):
+        return (" WHERE " + " AND ".join(self.where)) if self.where else ""
+
+    def select(self) -> Tuple[List[Dict[str, Any]], int]:
+        """(rows, total count ignoring limit/offset)."""
+        expressions = []
+        for item in self.selected:
+            expressions.append("t.*" if item == "*" else self._column(self.table, item, "t"))
+        for name, embed in self.embeds.items():
+            expressions.append(f'e_{name}.rowid IS NOT NULL AS "{name}.__present"')
+            for column in embed["columns"]:
+                expressions.append(f'{self._column(name, column, f"e_{name}")} AS "{name}.{column}"')
+
+        from_sql, from_args = self._from_clause()
+        where_sql = self._where_clause()
+        sql = f"SELECT {', '.join(expressions)} FROM {from_sql}{where_sql}"
+        if self.order:
+            sql += " ORDER BY " + ", ".join(self.order)
+        if self.limit is not None or self.offset is not None:
+            sql += f" LIMIT {self.limit if self.limit is not None else -1} OFFSET {self.offset or 0}"
+
+        rows = []
+        for row in self.connection.execute(sql, from_args + self.where_args):
+            output: Dict[str, Any] = {}
+            for key in row.keys():
+                name, _, column = key.partition(".")
+                if not column:
+                    output[key] = _decode(self.table, key, row[key])
+                elif column == "__present":
+                    output[name] = {} if row[key] else None
+                elif output.get(name) is not None:
+                    output[name][column] = _decode(name, column, row[key])
+            rows.append(output)
+
+        total = self.connection.execute(
+            f"SELECT count(*) FROM {from_sql}{where_sql}", from_args + self.where_args
+        ).fetchone()[0]
+        return rows, total
+
+    def insert(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        stored = []
+        generated_id = self.columns.get("id", {}).get("type", "").upper() == "TEXT"
+        for row in rows:
+            values = {"id": str(uuid.uuid4()), **row} if generated_id else dict(row)
+            names = [self._quoted(self.table, column) for column in values]
+            cursor = self.connection.execute(
+                f'INSERT INTO "{self.table}" ({", ".join(names)}) VALUES ({", ".join("?" for _ in values)}) RETURNING *',
+                [_encode(value) for value in values.values()]
+            )
+            stored.append(_decode_row(self.table, cursor.fetchone()))
+        return stored
+
+    def update(self, values: Dict[str, Any]) -> List[Dict[str, Any]]:
+        assignments = ", ".join(f"{self._quoted(self.table, column)} = ?" for column in values)
+        sql = f'UPDATE "{self.table}" AS t SET {assignments}{self._where_clause()} RETURNING *'
+        cursor = self.connection.execute(sql, [_encode(value) for value in values.values()] + self.where_args)
+        return [_decode_row(self.table, row) for row in cursor.fetchall()]
+
+    def delete(self) -> List[Dict[str, Any]]:
+        sql = f'DELETE FROM "{self.table}" AS t{self._where_clause()} RETURNING *'
+        return [_decode_row(self.table, row) for row in self.connection.execute(sql, self.where_args).fetchall()]
+
+
+def _encode(value: Any) -> Any:
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def _decode(table: str, column: str, value: Any) -> Any:
+    if (table, column) in JSON_COLUMNS and isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def _decode_row(table: str, row: sqlite3.Row) -> Dict[str, Any]:
+    return {key: _decode(table, key, row[key]) for key in row.keys()}
+
+
+def create_fake_supabase(database_path: str, latency: Latency) -> FastAPI:
+    from services.sqlite_storage import SQLiteStorage
+
+    storage = SQLiteStorage(database_path)
+    app = FastAPI(title="Fake Supabase")
+
+    rpcs = {
+        "list_sessions_with_counts": lambda p: storage.sessions.list_with_counts(
+            p["p_user_email"], p.get("p_before_created_at"), p.get("p_before_id"), p.get("p_limit", 100)
+        ),
+        "record_upload": lambda p: storage.recordings.record_upload(
+            p["p_user_email"], p["p_session_id"], p["p_recording"], p["p_minutes"]
+        ),
+        "release_pro_quota": lambda p: storage.pro_analyses.release_quota(p["p_user_email"], p["p_period"]),
+    }
+
+    async def consume_pro_quota(p):
+        allowed, used = await storage.pro_analyses.consume_quota(p["p_user_email"], p["p_period"], p["p_limit"])
+        return [{"allowed": allowed, "used": used}]
+
+    rpcs["consume_pro_quota"] = consume_pro_quota
+
+    @app.exception_handler(PostgrestError)
+    async def postgrest_error(request: Request, error: PostgrestError):
+        return JSONResponse({"message": error.message, "code": error.code}, status_code=error.status_code)
+
+    @app.post("/rest/v1/rpc/{function}")
+    async def rpc(function: str, request: Request):
+        await latency.wait()
+        if function not in rpcs:
+            raise PostgrestError(404, f"Could not find the function public.{function}", "PGRST202")
+        return await rpcs[function](await request.json())
+
+    @app.api_route("/rest/v1/{table}", methods=["GET", "POST", "PATCH", "DELETE"])
+    async def table(table: str, request: Request):
+        await latency.wait()
+        params = list(request.query_params.multi_items())
+        prefer = request.headers.get("prefer", "")
+        body = await request.json() if request.method in ("POST", "PATCH") else None
+
+        def run(connection):
+            query = TableQuery(connection, table, params)
+            if request.method == "GET":
+                return query.select()
+            if request.method == "POST":
+                return query.insert(body if isinstance(body, list) else [body]), None
+            if request.method == "PATCH":
+                return query.update(body), None
+            return query.delete(), None
+
+        try:
+            if request.method == "GET":
+                rows, total = await storage.db.run(run)
+            else:
+                rows, total = await storage.db.transaction(run)
+        except sqlite3.IntegrityError as e:
+            code = "23505" if "UNIQUE" in str(e) else "23503"
+            raise PostgrestError(409, str(e), code)
+
+        headers = {}
+        if "count=exact" in prefer and total is not None:
+            headers["Content-Range"] = f"0-{max(len(rows) - 1, 0)}/{total}" if rows else f"*/{total}"
+        if request.method != "GET" and "return=representation" not in prefer:
+            return Response(status_code=204, headers=headers)
+        return JSONResponse(rows, status_code=201 if request.method == "POST" else 200, headers=headers)
+
+    @app.on_event("shutdown")
+    async def close():
+        await storage.close()
+
+    return app
+
+
+# ==============================================================================
+# OPENAI
+# ==============================================================================
+
+CANNED_ANALYSIS = (
+    "Overall: clear structure and a confident opening.\n"
+    "Strengths: steady pace, good pauses before key points.\n"
+    "Improve: reduce fillers in transitions; vary pitch when listing results.\n"
+    "Exercise: record the opening three times, emphasising one word per sentence."
+)
+
+
+def create_fake_openai(latency: Latency) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await latency.wait()
+        prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in body.get("messages", []))
+        completion_tokens = len(CANNED_ANALYSIS.split())
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": CANNED_ANALYSIS},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    return app
+
+
+# ==============================================================================
+# STRIPE
+# ==============================================================================
+
+def create_fake_stripe(latency: Latency) -> FastAPI:
+    app = FastAPI(title="Fake Stripe")
+    sessions: Dict[str, Dict[str, Any]] = {}
+
+    @app.post("/v1/checkout/sessions")
+    async def create_checkout_session(request: Request):
+        form = await request.form()
+        await latency.wait()
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        sessions[session_id] = {
+            "id": session_id,
+            "object": "checkout.session",
+            "url": f"https://checkout.stripe.test/pay/{session_id}",
+            "mode": form.get("mode", "payment"),
+            "customer_email": form.get("customer_email"),
+            "metadata": {"user_email": form.get("metadata[user_email]")},
+            "payment_status": "paid",  # As if the customer completed checkout right away
+            "status": "complete",
+            "subscription": f"sub_{uuid.uuid4().hex[:24]}",
+        }
+        return sessions[session_id]
+
+    @app.get("/v1/checkout/sessions/{session_id}")
+    async def retrieve_checkout_session(session_id: str):
+        await latency.wait()
+        session = sessions.get(session_id)
+        if session is None:
+            return JSONResponse({"error": {
+                "type": "invalid_request_error",
+                "message": f"No such checkout.session: '{session_id}'",
+            }}, status_code=404)
+        return session
+
+    return app
+
+
+# ==============================================================================
+# RUNNING THEM
+# ==============================================================================
+
+class ServerThread:
+    """A uvicorn server on 127.0.0.1 in a daemon thread (with its own event loop)."""
+
+    def __init__(self, app: FastAPI, port: int):
+        import uvicorn
+
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, name=f"fake-{port}", daemon=True)
+
+    def start(self, timeout: float = 10.0):
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError(f"fake service on port {self.port} did not start")
+            time.sleep(0.02)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+class FakeServices:
+    """
+    Supabase, OpenAI and Stripe stand-ins; a context manager that starts them
+    on free ports and exposes the environment that points the API at them.
+    """
+
+    def __init__(
+        self,
+        workdir: str,
+        supabase_latency_ms: float = 0.0,
+        openai_latency_ms: float = 0.0,
+        stripe_latency_ms: float = 0.0,
+        jitter: float = 0.2
+    ):
+        from benchmarks.prefork import free_port
+
+        self.servers = {
+            "supabase": ServerThread(create_fake_supabase(
+                os.path.join(workdir, "fake_supabase.db"), Latency(supabase_latency_ms, jitter)
+            ), free_port()),
+            "openai": ServerThread(create_fake_openai(Latency(openai_latency_ms, jitter)), free_port()),
+            "stripe": ServerThread(create_fake_stripe(Latency(stripe_latency_ms, jitter)), free_port()),
+        }
+
+    def environment(self) -> Dict[str, str]:
+        return {
+            "DATABASE_BACKEND": "supabase",
+            "SUPABASE_URL": self.servers["supabase"].url,
+            "SUPABASE_SERVICE_KEY": "fake-service-key",
+            "OPENAI_API_KEY": "sk-fake",
+            "OPENAI_BASE_URL": f"{self.servers['openai'].url}/v1",
+            "STRIPE_SECRET_KEY": "sk_test_fake",
+            "STRIPE_API_BASE": self.servers["stripe"].url,
+        }
+
+    def __enter__(self):
+        for server in self.servers.values():
+            server.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for server in self.servers.values():
+            server.stop()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--supabase-latency-ms", type=float, default=0.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=0.0)
+    parser.add_argument("--stripe-latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency spread as a fraction (0.2 = +/-20%%)")
+    parser.add_argument("--data-dir", help="Keep the fake Supabase database here (default: temporary)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        with FakeServices(
+            args.data_dir or workdir,
+            args.supabase_latency_ms,
+            args.openai_latency_ms,
+            args.stripe_latency_ms,
+            args.jitter
+        ) as fakes:
+            print("Fake services running. Start the API with:")
+            for key, value in fakes.environment().items():
+                print(f"  export {key}={value}")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == "__main__":
+    main_cli()
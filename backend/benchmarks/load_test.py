@@ -0,0 +1,296 @@
+"""
+End-to-end load test of the user journey, offline.
+
+Each virtual user registers, logs in, creates a session and uploads
+--uploads recordings; a --pro-fraction of them then buys Pro through
+Stripe checkout and runs a Pro analysis of their last recording, polling the
+job (with If-None-Match) until it finishes and fetching the result.
+
+By default the API is started as a real server (uvicorn, or the preforked
+gunicorn worker with --gunicorn) against local stand-ins for Supabase, OpenAI and Stripe
+(benchmarks/fake_services.py) with the latencies given, and rate limits off.
+--target drives an already running server instead; that server must be
+configured by hand, e.g. pointed at `python -m benchmarks.fake_services`.
+Transcription runs locally (faster-whisper) as in production.
+
+Users arrive all at once (closed model, at most --concurrency journeys in
+flight) or as a Poisson process at --arrival-rate users/second (open model,
+so queueing shows up as latency). Reports per-step latency percentiles,
+error rates with status codes, the Pro job turnaround and journey throughput.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --users 50 --concurrency 10
+    python -m benchmarks.load_test --users 200 --arrival-rate 5 --supabase-latency-ms 30 --openai-latency-ms 2000
+    python -m benchmarks.load_test --gunicorn --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.corpus import write_wav  # noqa: E402
+from benchmarks.login_storm import summarize  # noqa: E402
+from benchmarks.prefork import free_port, wait_ready  # noqa: E402
+
+PASSWORD = "Load-Test-Passw0rd!"
+TERMINAL_JOB_STATUSES = ("completed", "failed", "cancelled")
+
+
+class StepFailed(Exception):
+    """A step answered with an error; the rest of that user's journey is skipped."""
+
+
+class Recorder:
+    """Latencies and outcomes per step name."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)  # step -> {status code or exception name: count}
+
+    async def call(self, step: str, request, expected=(200,)):
+        started = time.perf_counter()
+        try:
+            response = await request
+        except Exception as e:
+            self.errors[step][type(e).__name__] += 1
+            raise StepFailed(f"{step}: {type(e).__name__}: {e}")
+        self.latencies[step].append(time.perf_counter() - started)
+        if response.status_code not in expected:
+            self.errors[step][response.status_code] += 1
+            raise StepFailed(f"{step}: HTTP {response.status_code} {response.text[:200]}")
+        return response
+
+    def report(self):
+        steps = {}
+        for step in sorted(set(self.latencies) | set(self.errors)):
+            errors = sum(self.errors[step].values())
+            # Errors that still got a response are timed too; only exceptions are not
+            attempts = max(len(self.latencies[step]), errors)
+            steps[step] = {
+                **summarize(self.latencies[step]),
+                "errors": errors,
+                "error_rate": round(errors / attempts, 4) if attempts else 0.0,
+                "error_codes": {str(code): count for code, count in self.errors[step].items()},
+            }
+        return steps
+
+
+async def pro_flow(client, recorder, headers, recording_id, args):
+    checkout = (await recorder.call("stripe_checkout", client.post("/api/stripe-payment", headers=headers))).json()
+    await recorder.call("stripe_confirm", client.post(
+        "/api/confirm-stripe-payment", params={"session_id": checkout["session_id"]}, headers=headers
+    ))
+
+    submitted = time.perf_counter()
+    job = (await recorder.call("pro_submit", client.post(
+        "/api/pro-analysis", params={"recording_id": recording_id}, headers=headers
+    ))).json()
+
+    etag, status = None, job["status"]
+    deadline = submitted + args.job_timeout
+    while status not in TERMINAL_JOB_STATUSES:
+        if time.perf_counter() > deadline:
+            recorder.errors["pro_turnaround"]["timeout"] += 1
+            raise StepFailed(f"job {job['job_id']} still {status} after {args.job_timeout:.0f}s")
+        await asyncio.sleep(args.poll_interval)
+        poll_headers = {**headers, **({"If-None-Match": etag} if etag else {})}
+        response = await recorder.call(
+            "pro_poll", client.get(f"/api/job/{job['job_id']}", headers=poll_headers), expected=(200, 304)
+        )
+        if response.status_code == 200:
+            etag, status = response.headers.get("etag"), response.json()["status"]
+
+    if status != "completed":
+        recorder.errors["pro_turnaround"][status] += 1
+        raise StepFailed(f"job {job['job_id']} {status}")
+    recorder.latencies["pro_turnaround"].append(time.perf_counter() - submitted)
+    await recorder.call("pro_result", client.get(f"/api/job/{job['job_id']}/result", headers=headers))
+
+
+async def journey(client, recorder, audio: bytes, pro: bool, args):
+    email = f"load-{uuid.uuid4().hex[:12]}@loadtest.local"
+    credentials = {"username": email, "password": PASSWORD}
+
+    await recorder.call("register", client.post("/register", data=credentials))
+    token = (await recorder.call("token", client.post("/token", data=credentials))).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    session = (await recorder.call("session_create", client.post(
+        "/sessions/create", json={"name": "Load test", "context": "presentation"}, headers=headers
+    ))).json()
+
+    recording_id = None
+    for _ in range(args.uploads):
+        upload = (await recorder.call("upload", client.post(
+            "/upload-audio/",
+            params={"session_id": session["session_id"]},
+            files={"file": ("speech.wav", audio, "audio/wav")},
+            headers=headers
+        ))).json()
+        recording_id = upload["recording"]["id"]
+
+    if pro and recording_id:
+        await pro_flow(client, recorder, headers, recording_id, args)
+
+
+async def drive(base_url: str, audio: bytes, args):
+    import httpx
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency * 2 if args.concurrency else None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        await wait_ready(client)
+
+        rng = random.Random(args.seed)
+        plan = [rng.random() < args.pro_fraction for _ in range(args.users)]
+        gate = asyncio.Semaphore(args.concurrency) if args.concurrency else None
+        completed, failures = 0, Counter()
+
+        async def user(pro):
+            nonlocal completed
+            try:
+                if gate:
+                    async with gate:
+                        await journey(client, recorder, audio, pro, args)
+                else:
+                    await journey(client, recorder, audio, pro, args)
+                completed += 1
+            except StepFailed as e:
+                failures[str(e).split(":")[0]] += 1
+                if args.verbose:
+                    print(f"  ✗ {e}")
+
+        started = time.perf_counter()
+        tasks = []
+        for pro in plan:
+            tasks.append(asyncio.create_task(user(pro)))
+            if args.arrival_rate:
+                await asyncio.sleep(rng.expovariate(args.arrival_rate))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "users": args.users,
+        "pro_users": sum(plan),
+        "journeys_completed": completed,
+        "journeys_failed": dict(failures),
+        "elapsed_seconds": round(elapsed, 2),
+        "journeys_per_second": round(completed / elapsed, 3) if elapsed else 0.0,
+        "steps": recorder.report(),
+    }
+
+
+def start_server(workdir: str, port: int, fake_environment, args):
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "load-test-secret")
+    env.update(fake_environment)
+    env.update({
+        "AUDIT_SPOOL_DIR": os.path.join(workdir, "audit_spool"),
+        "AUDIO_STORE_DIR": os.path.join(workdir, "audio_store"),
+        "RATE_LIMIT_ENABLED": "false",
+        "PORT": str(port),
+    })
+    if args.gunicorn:
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)]
+
+    log = open(os.path.join(workdir, "server.log"), "w")
+    return subprocess.Popen(
+        command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+    )
+
+
+def run(args):
+    from benchmarks.fake_services import FakeServices
+
+    with tempfile.TemporaryDirectory() as workdir:
+        audio_path = write_wav(os.path.join(workdir, "speech.wav"), args.audio_seconds, seed=args.seed)
+        with open(audio_path, "rb") as f:
+            audio = f.read()
+
+        if args.target:
+            result = asyncio.run(drive(args.target.rstrip("/"), audio, args))
+            result["server"] = args.target
+            return result
+
+        with FakeServices(
+            workdir,
+            supabase_latency_ms=args.supabase_latency_ms,
+            openai_latency_ms=args.openai_latency_ms,
+            stripe_latency_ms=args.stripe_latency_ms
+        ) as fakes:
+            port = free_port()
+            server = start_server(workdir, port, fakes.environment(), args)
+            try:
+                result = asyncio.run(drive(f"http://127.0.0.1:{port}", audio, args))
+            except TimeoutError:
+                with open(os.path.join(workdir, "server.log")) as f:
+                    print(f.read()[-3000:], file=sys.stderr)
+                raise
+            finally:
+                os.killpg(server.pid, signal.SIGTERM)
+                server.wait(timeout=30)
+
+        result["server"] = "gunicorn --preload (1 worker)" if args.gunicorn else "uvicorn (1 process)"
+        result["fake_latency_ms"] = {
+            "supabase": args.supabase_latency_ms,
+            "openai": args.openai_latency_ms,
+            "stripe": args.stripe_latency_ms,
+        }
+        return result
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Virtual users (journeys) in total")
+    parser.add_argument("--concurrency", type=int, default=10, help="Journeys in flight at most (0 = unbounded)")
+    parser.add_argument("--arrival-rate", type=float, help="Users per second, Poisson arrivals (default: all at once)")
+    parser.add_argument("--uploads", type=int, default=2, help="Uploads per user")
+    parser.add_argument("--audio-seconds", type=float, default=10.0, help="Length of each uploaded recording")
+    parser.add_argument("--pro-fraction", type=float, default=0.25, help="Share of users that also run the Pro flow")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between job status polls")
+    parser.add_argument("--job-timeout", type=float, default=300.0, help="Give up on a Pro job after this long")
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--supabase-latency-ms", type=float, default=15.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=1500.0)
+    parser.add_argument("--stripe-latency-ms", type=float, default=300.0)
+    parser.add_argument("--gunicorn", action="store_true", help="Run the API under gunicorn.conf.py (preloaded worker)")
+    parser.add_argument("--target", help="Base URL of an already running API (no fakes or server are started)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Print each failed journey")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON only")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"\n{result['server']}: {result['journeys_completed']}/{result['users']} journeys completed "
+          f"({result['pro_users']} with Pro) in {result['elapsed_seconds']} s, "
+          f"{result['journeys_per_second']} journeys/s")
+    if result["journeys_failed"]:
+        print(f"Failed journeys by step: {result['journeys_failed']}")
+    print(f"\n{'step':<18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7} {'rate':>7}  codes")
+    for step, stats in result["steps"].items():
+        codes = ", ".join(f"{code}x{count}" for code, count in stats["error_codes"].items())
+        print(f"{step:<18} {stats['count']:>6} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9} "
+              f"{stats['max_ms']:>9} {stats['errors']:>7} {stats['error_rate']:>7.1%}  {codes}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,155 @@
+"""
+Login storm benchmark.
+
+Measures the latency of an unrelated endpoint (/health) alone and while many
+clients hammer /token, in-process against the real app and an embedded SQLite
+database (no network, no Supabase). With bcrypt on its executor the /health
+p99 should stay flat; --mode inline hashes on the event loop for comparison.
+
+Usage (from backend/):
+    python -m benchmarks.login_storm
+    python -m benchmarks.login_storm --mode inline --logins 16 --duration 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def configure_environment(workdir: str):
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ["DATABASE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ["AUDIT_SPOOL_DIR"] = os.path.join(workdir, "audit_spool")
+    os.environ["AUDIO_STORE_DIR"] = os.path.join(workdir, "audio_store")
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+        "mean_ms": round(statistics.mean(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+async def probe(client, stop_at, interval=0.01):
+    latencies = []
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_worker(client, email, password, stop_at):
+    latencies, errors = [], 0
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        response = await client.post("/token", data={"username": email, "password": password})
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    return latencies, errors
+
+
+async def run(args):
+    import httpx
+    import main
+
+    main.limiter.enabled = False  # Measure hashing, not the per-IP login limit
+
+    if args.mode == "inline":
+        async def run_inline(func, *func_args):
+            return func(*func_args)
+        main.run_password_op = run_inline
+
+    password = "Benchmark-Passw0rd!"
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        emails = [f"storm{i}@bench.local" for i in range(args.logins)]
+        for email in emails:
+            response = await client.post("/register", data={"username": email, "password": password})
+            response.raise_for_status()
+
+        stop_at = time.perf_counter() + args.duration
+        baseline = await probe(client, stop_at)
+
+        started = time.perf_counter()
+        stop_at = started + args.duration
+        results = await asyncio.gather(
+            probe(client, stop_at),
+            *(login_worker(client, email, password, stop_at) for email in emails)
+        )
+        elapsed = time.perf_counter() - started
+
+    storm_probe = results[0]
+    login_latencies = [latency for latencies, _ in results[1:] for latency in latencies]
+    login_errors = sum(errors for _, errors in results[1:])
+
+    return {
+        "benchmark": "login_storm",
+        "mode": args.mode,
+        "bcrypt_rounds": main.BCRYPT_ROUNDS,
+        "password_hash_workers": main.PASSWORD_HASH_WORKERS,
+        "concurrent_logins": args.logins,
+        "duration_seconds": args.duration,
+        "health_baseline": summarize(baseline),
+        "health_during_storm": summarize(storm_probe),
+        "logins": {
+            **summarize(login_latencies),
+            "errors": login_errors,
+            "per_second": round(len(login_latencies) / elapsed, 2),
+        },
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("executor", "inline"), default="executor")
+    parser.add_argument("--logins", type=int, default=16, help="Concurrent login clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per phase")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON only")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(workdir)
+        result = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"\nLogin storm ({result['mode']}, bcrypt rounds={result['bcrypt_rounds']}, "
+          f"{result['concurrent_logins']} clients, {result['duration_seconds']}s)")
+    for label, key in (("/health alone", "health_baseline"), ("/health in storm", "health_during_storm"), ("/token", "logins")):
+        stats = result[key]
+        print(f"  {label:<18} p50 {stats['p50_ms']:>8.2f} ms   p95 {stats['p95_ms']:>8.2f} ms   "
+              f"p99 {stats['p99_ms']:>8.2f} ms   n={stats['count']}")
+    print(f"  logins/s: {result['logins']['per_second']}   errors: {result['logins']['errors']}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,188 @@
+"""
+Plain uvicorn vs preforked gunicorn worker (gunicorn.conf.py) benchmark.
+
+Starts the API as a real server in each mode on a local port, with the
+embedded SQLite backend and rate limits off, times how long it takes to
+answer /ready, then drives concurrent requests for a fixed time. Reports
+requests/sec, latency percentiles and memory per process: RSS, and PSS
+(proportional set size, which splits shared pages between the processes
+mapping them, so the master's preloaded copy-on-write memory is only
+counted once). Linux only (reads /proc).
+
+Usage (from backend/):
+    python -m benchmarks.prefork
+    python -m benchmarks.prefork --concurrency 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.login_storm import summarize  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_environment(workdir: str, port: int):
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    env.update({
+        "DATABASE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(workdir, "bench.db"),
+        "AUDIT_SPOOL_DIR": os.path.join(workdir, "audit_spool"),
+        "AUDIO_STORE_DIR": os.path.join(workdir, "audio_store"),
+        "RATE_LIMIT_ENABLED": "false",
+        "PORT": str(port),
+    })
+    return env
+
+
+def process_tree(pid: int):
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            for child in f.read().split():
+                pids.extend(process_tree(int(child)))
+    except FileNotFoundError:
+        pass
+    return pids
+
+
+def memory_mb(pid: int):
+    """(rss, pss) in MB for one process."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key] = int(rest.split()[0]) / 1024
+    except FileNotFoundError:
+        return 0.0, 0.0
+    return round(values.get("Rss", 0.0), 1), round(values.get("Pss", 0.0), 1)
+
+
+async def wait_ready(client, timeout=120):
+    """Seconds until /ready answers 200."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return time.perf_counter() - started
+        except Exception:
+            pass
+        await asyncio.sleep(0.25)
+    raise TimeoutError("server never became ready")
+
+
+async def drive(base_url: str, concurrency: int, duration: float, paths):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        ready_seconds = await wait_ready(client)
+
+        password = "Benchmark-Passw0rd!"
+        await client.post("/register", data={"username": "prefork@bench.local", "password": password})
+        token = (await client.post(
+            "/token", data={"username": "prefork@bench.local", "password": password}
+        )).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        latencies, errors = [], 0
+        stop_at = time.perf_counter() + duration
+
+        async def worker(offset):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                response = await client.get(paths[i % len(paths)], headers=headers)
+                if response.status_code < 400:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+                i += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return ready_seconds, latencies, errors, elapsed
+
+
+def run_mode(label, command, args):
+    """command: argv for the server; the port comes from $PORT (gunicorn.conf.py) or {port}."""
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        server = subprocess.Popen(
+            [part.format(port=port) for part in command],
+            cwd=BACKEND_DIR,
+            env=server_environment(workdir, port),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        try:
+            ready_seconds, latencies, errors, elapsed = asyncio.run(
+                drive(f"http://127.0.0.1:{port}", args.concurrency, args.duration, args.paths)
+            )
+            processes = [(pid, *memory_mb(pid)) for pid in process_tree(server.pid)]
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait(timeout=30)
+
+    return {
+        "mode": label,
+        "processes": len(processes),
+        "ready_seconds": round(ready_seconds, 2),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        "latency": summarize(latencies),
+        "rss_mb_total": round(sum(rss for _, rss, _ in processes), 1),
+        "pss_mb_total": round(sum(pss for _, _, pss in processes), 1),
+        "per_process": [{"pid": pid, "rss_mb": rss, "pss_mb": pss} for pid, rss, pss in processes],
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per mode")
+    parser.add_argument("--paths", nargs="+", default=["/health", "/sessions/list", "/progress"])
+    parser.add_argument("--json", action="store_true", help="Print raw JSON only")
+    args = parser.parse_args()
+
+    results = [run_mode("uvicorn (1 process)", [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", "{port}"], args)]
+    results.append(run_mode(
+        "gunicorn --preload (1 worker)",
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        args
+    ))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"\n{'mode':<32} {'ready s':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'procs':>6} {'RSS MB':>8} {'PSS MB':>8}")
+    for result in results:
+        latency = result["latency"]
+        print(f"{result['mode']:<32} {result['ready_seconds']:>8} {result['requests_per_second']:>8} {latency['p50_ms']:>8} {latency['p99_ms']:>8} "
+              f"{result['errors']:>7} {result['processes']:>6} {result['rss_mb_total']:>8} {result['pss_mb_total']:>8}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,129 @@
+"""
+Startup-time benchmark.
+
+Imports main in fresh interpreters with `python -X importtime` and reports the
+total import time plus the cost attributed to each top-level package (sum of
+self times of its modules), so a dependency that sneaks back into the import
+path shows up by name. Also times the post-startup warm-up (warm_up_analysis),
+i.e. how long after boot /ready turns 200.
+
+Usage (from backend/):
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --runs 5 --top 15 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WARMUP_SNIPPET = """
+import time
+import main
+started = time.perf_counter()
+main.warm_up_analysis()
+print("WARMUP_SECONDS", time.perf_counter() - started)
+"""
+
+
+def benchmark_environment(workdir: str):
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    env["DATABASE_BACKEND"] = "sqlite"
+    env["SQLITE_PATH"] = os.path.join(workdir, "bench.db")
+    env["AUDIT_SPOOL_DIR"] = os.path.join(workdir, "audit_spool")
+    env["AUDIO_STORE_DIR"] = os.path.join(workdir, "audio_store")
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def parse_importtime(stderr: str):
+    """Returns (total_main_us, {package: self_us})."""
+    packages = defaultdict(int)
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        packages[name.split(".")[0]] += int(self_us)
+        if name == "main":
+            total = int(cumulative_us)
+    return total, dict(packages)
+
+
+def run(args):
+    totals, per_package = [], defaultdict(list)
+    warmups = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = benchmark_environment(workdir)
+
+        for _ in range(args.runs):
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", "import main"],
+                cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+            total, packages = parse_importtime(result.stderr)
+            totals.append(total)
+            for package, self_us in packages.items():
+                per_package[package].append(self_us)
+
+        if not args.skip_warmup:
+            result = subprocess.run(
+                [sys.executable, "-c", WARMUP_SNIPPET],
+                cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+            )
+            for line in result.stdout.splitlines():
+                if line.startswith("WARMUP_SECONDS"):
+                    warmups.append(float(line.split()[1]))
+
+    packages = sorted(
+        ((package, statistics.median(samples) / 1000) for package, samples in per_package.items()),
+        key=lambda item: item[1],
+        reverse=True
+    )
+    return {
+        "benchmark": "startup_time",
+        "runs": args.runs,
+        "import_main_ms": {
+            "median": round(statistics.median(totals) / 1000, 1),
+            "min": round(min(totals) / 1000, 1),
+            "max": round(max(totals) / 1000, 1),
+        },
+        "packages_ms": {package: round(ms, 1) for package, ms in packages[:args.top]},
+        "warmup_seconds": round(warmups[0], 2) if warmups else None,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to sample")
+    parser.add_argument("--top", type=int, default=20, help="Packages to report")
+    parser.add_argument("--skip-warmup", action="store_true", help="Only measure imports")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON only")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    stats = result["import_main_ms"]
+    print(f"\nimport main: median {stats['median']} ms (min {stats['min']}, max {stats['max']}, {result['runs']} runs)")
+    print("Top packages by self time (median):")
+    for package, ms in result["packages_ms"].items():
+        print(f"  {package:<28} {ms:>8.1f} ms")
+    if result["warmup_seconds"] is not None:
+        print(f"warm-up (until /ready): {result['warmup_seconds']} s")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,48 @@
+# ==============================================================================
+# GUNICORN CONFIGURATION (preforked single worker)
+# gunicorn -c gunicorn.conf.py main:app
+#
+# The app is imported once in the master (preload_app) and the analysis stack
+# (librosa/numba, pro analyzer, optionally the Whisper model) is loaded there
+# before forking, then frozen out of the GC's reach. The worker (a uvicorn
+# event loop) starts ready, and a worker that dies or is recycled
+# (GUNICORN_MAX_REQUESTS) is replaced by a fork instead of a cold start.
+#
+# Exactly one worker: Pro jobs (JobQueue and its dedup), the queue-wait SLO,
+# memory admission, TTL caches and the in-memory rate-limit fallback are all
+# per process, so with several workers a job status poll that lands on
+# another worker gets 404. Scale with instances that share nothing once that
+# state moves to a shared store, not with workers.
+# ==============================================================================
+
+import gc
+import os
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = 1  # See above; also overrides WEB_CONCURRENCY, which gunicorn would read
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Uploads are analysed in the request; allow for long recordings
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "180"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycling bounds slow leaks; with preload the new worker is just a fork
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+
+
+def when_ready(server):
+    if os.getenv("PRELOAD_MODELS", "true").lower() == "true":
+        import main  # Already imported by preload_app
+        main.preload_models()
+
+    # Move everything allocated so far out of the GC's reach: collections in
+    # the workers would otherwise touch (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+    server.log.info("Forking the worker")
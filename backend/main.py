@@ -6,8 +6,8 @@
 # ==============================================================================
 # IMPORTS Y CONFIGURACIÓN INICIAL
 # ==============================================================================
-from typing import Optional, List
-from fastapi import FastAPI, File, UploadFile, Request, Depends, HTTPException
+from typing import Callable, Optional, List
+from fastapi import FastAPI, File, UploadFile, Request, Response, Depends, HTTPException, Header, WebSocket, WebSocketDisconnect
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -17,25 +17,47 @@ from datetime import datetime, timedelta
 import shutil
 # from google.cloud import speech  # Removed: Not compatible with Python 3.11 (use local fallback)
 import os
-import librosa
-import numpy as np
 import re
 import collections
-from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
 from dotenv import load_dotenv
 import traceback
 import json
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import secrets
+import threading
 import time
+import math
+import uuid
 import random
-from supabase import create_client, Client
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from services.job_queue import get_job_queue, add_analysis_job
-from services.pro_analyzer import ProAudioAnalyzer
-import stripe
+from services.job_queue import get_job_queue, add_analysis_job, JobStatus
+from services.pro_version import ANALYSIS_VERSION
+from services.admission import AdmissionRejected, estimate_working_set, get_admission_controller
+from services.audio_probe import probe_audio, probe_audio_file
+from services.live_analysis import SAMPLE_RATE as LIVE_SAMPLE_RATE, LiveAnalysis, live_working_set
+from services.cache import TTLCache
+from services.repositories import get_storage
+from services.audio_store import get_audio_store
+from services.progress import PROGRESS_METRICS, summarize as summarize_progress
+from services.spectrogram import iter_magnitude_blocks
+from services.audit_log import get_audit_log
+from services.metrics import (
+    get_metrics_registry,
+    process_rss_bytes,
+    server_timing_header,
+    start_request_timings,
+    timed
+)
+from services.profiler import get_profiler
+from services.rate_limit import (
+    MEMORY_STORAGE_URI,
+    get_concurrency_limiter,
+    get_rate_limit_storage_uri
+)
 
 load_dotenv()
 ffmpeg_path = os.getenv("FFMPEG_PATH")
@@ -43,25 +65,187 @@ if ffmpeg_path and os.path.exists(ffmpeg_path):
     os.environ["PATH"] += os.pathsep + ffmpeg_path
 
 # Rate limiting
-limiter = Limiter(key_func=get_remote_address)
+# Counters live in RATE_LIMIT_STORAGE_URI: "memory://" (per process) or a
+# Redis URL shared by every worker/instance. Sliding windows by default, so a
+# burst across a window boundary can't get twice the limit
+RATE_LIMIT_STORAGE_URI = get_rate_limit_storage_uri()
+
+def rate_limit_key(request: Request) -> str:
+    """
+    Authenticated account if the request carries a valid token, else the client
+    IP. Endpoints that don't authenticate use ip_rate_limit_key instead.
+    """
+    user = getattr(request.state, "current_user", None)
+    if user:
+        return f"user:{user['email']}"
+    
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            email = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            if email:
+                return f"user:{email}"
+        except JWTError:
+            pass
+    
+    return f"ip:{get_remote_address(request)}"
+
+def ip_rate_limit_key(request: Request) -> str:
+    """Client IP only, for unauthenticated endpoints (a token must not move the counter to an account)."""
+    return f"ip:{get_remote_address(request)}"
+
+limiter = Limiter(
+    key_func=rate_limit_key,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy=os.getenv("RATE_LIMIT_STRATEGY", "moving-window"),
+    # If Redis goes away, keep limiting per process instead of failing requests
+    in_memory_fallback_enabled=RATE_LIMIT_STORAGE_URI != MEMORY_STORAGE_URI,
+    # Only turned off for local load tests and benchmarks
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+)
 app = FastAPI()
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # ==============================================================================
-# SUPABASE CONFIGURATION
+# DATABASE CONFIGURATION
 # ==============================================================================
+# "supabase" in production; "sqlite" runs fully offline on an embedded file
+# (SQLITE_PATH) for local load tests and benchmarks
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "supabase").lower()
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")  # Use service_role for backend
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
 # Use service_role key for backend operations (bypasses RLS)
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+if DATABASE_BACKEND == "supabase" and (not SUPABASE_URL or not SUPABASE_SERVICE_KEY):
     raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in environment variables")
 
-supabase: Client = create_client(
-    SUPABASE_URL,
-    SUPABASE_SERVICE_KEY or SUPABASE_ANON_KEY
+# Repositories for users, sessions, recordings, payments and pro analyses
+# (services/repositories.py). The Supabase backend is an async PostgREST client
+# over a shared keep-alive pool, so handlers never block the event loop
+storage = get_storage()
+
+# Payment/subscription events are buffered and bulk-inserted in the background
+audit_log = get_audit_log()
+
+# Per-account caps on requests in flight for expensive endpoints, shared
+# through RATE_LIMIT_STORAGE_URI like the rate limits
+concurrency_limiter = get_concurrency_limiter()
+UPLOAD_CONCURRENCY_PER_ACCOUNT = int(os.getenv("UPLOAD_CONCURRENCY_PER_ACCOUNT", "2"))
+PRO_ANALYSIS_CONCURRENCY_PER_ACCOUNT = int(os.getenv("PRO_ANALYSIS_CONCURRENCY_PER_ACCOUNT", "1"))
+
+# Normalized recordings kept for Pro re-analysis (local disk or GCS, AUDIO_STORE_*)
+audio_store = get_audio_store()
+
+# Uploads and Pro jobs reserve their estimated memory before decoding
+# (ANALYSIS_MEMORY_BUDGET_MB, per process)
+admission = get_admission_controller()
+AUDIO_PURGE_INTERVAL_SECONDS = float(os.getenv("AUDIO_PURGE_INTERVAL_SECONDS", "21600"))
+
+async def purge_audio_periodically():
+    while True:
+        try:
+            removed = await asyncio.to_thread(audio_store.purge_expired)
+            if removed:
+                print(f"🧹 Purged {removed} expired recordings from the audio store")
+        except Exception as e:
+            print(f"⚠️ Audio store purge failed: {e}")
+        await asyncio.sleep(AUDIO_PURGE_INTERVAL_SECONDS)
+
+# Heavy audio/ML modules (librosa + numba, scipy, pro analyzer) are imported
+# lazily, so the server accepts connections right away. The warm-up loads and
+# JIT-compiles them in a thread after startup; /ready reports when it's done
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+readiness = {"ready": False, "warmup_seconds": None, "error": None}
+
+def warm_up_analysis():
+    """Run the acoustic analysis once on a short synthetic clip."""
+    import tempfile
+    import numpy as np
+    import soundfile as sf
+    import services.pro_analyzer  # noqa: F401
+    
+    sr = 16000
+    t = np.arange(sr) / sr
+    y = (0.1 * np.sin(2 * np.pi * (150 + 30 * t) * t)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "warmup.wav")
+        sf.write(path, y, sr)
+        analyze_acoustics(path)
+
+async def warm_up():
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(warm_up_analysis)
+    except Exception as e:
+        # Not fatal: the first upload pays the import cost instead
+        readiness["error"] = str(e)
+        print(f"⚠️ Warm-up failed: {e}")
+    readiness["warmup_seconds"] = round(time.perf_counter() - started, 2)
+    readiness["ready"] = True
+    print(f"🔥 Warm-up finished in {readiness['warmup_seconds']}s")
+
+def preload_models():
+    """
+    Load the read-only analysis resources in the current process. Called by
+    gunicorn.conf.py in the master before forking, so the worker (and any
+    replacement after a crash or recycle) inherits them and starts ready.
+    """
+    started = time.perf_counter()
+    warm_up_analysis()
+    if LOCAL_WHISPER_PRELOAD:
+        get_whisper_model()
+    readiness["warmup_seconds"] = round(time.perf_counter() - started, 2)
+    readiness["ready"] = True
+    print(f"🔥 Preloaded analysis models in {readiness['warmup_seconds']}s")
+
+@app.on_event("startup")
+async def start_background_tasks():
+    configure_google_credentials()
+    await audit_log.start()
+    app.state.audio_purge_task = asyncio.create_task(purge_audio_periodically())
+    app.state.loop_lag_task = asyncio.create_task(monitor_event_loop_lag())
+    if readiness["ready"]:
+        pass  # Preloaded by the gunicorn master
+    elif WARMUP_ON_STARTUP:
+        app.state.warmup_task = asyncio.create_task(warm_up())
+    else:
+        readiness["ready"] = True
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    app.state.audio_purge_task.cancel()
+    app.state.loop_lag_task.cancel()
+    if getattr(app.state, "warmup_task", None):
+        app.state.warmup_task.cancel()
+    await audit_log.stop()
+    await storage.close()
+    await concurrency_limiter.close()
+    password_executor.shutdown(wait=False)
+
+# User rows by email for get_current_user; invalidated by every endpoint that
+# changes tier, minutes or subscription fields
+user_cache = TTLCache(
+    max_entries=5000,
+    ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+)
+
+def invalidate_user_cache(email: str):
+    user_cache.invalidate(email)
+
+# First page of each user's session list; invalidated when sessions or recordings are added
+session_list_cache = TTLCache(
+    max_entries=1000,
+    ttl_seconds=float(os.getenv("SESSION_LIST_CACHE_TTL_SECONDS", "30"))
+)
+
+# Pro analyses used this month, keyed by (email, period); same lifetime as user records.
+# Only used to reject over-quota requests early, the pro_usage counter is authoritative
+pro_usage_cache = TTLCache(
+    max_entries=5000,
+    ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
 )
 
 # ==============================================================================
@@ -69,37 +253,54 @@ supabase: Client = create_client(
 # ==============================================================================
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 STRIPE_PUBLIC_KEY = os.getenv("STRIPE_PUBLIC_KEY")
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE")  # Local stand-in for load tests (benchmarks/fake_services.py)
 
 if STRIPE_SECRET_KEY:
-    stripe.api_key = STRIPE_SECRET_KEY
     print("✅ Stripe configured")
 else:
     print("⚠️ Warning: STRIPE_SECRET_KEY not set. Stripe payments will not work.")
 
+def get_stripe():
+    """The stripe SDK, imported and configured on first use (keeps it out of startup)."""
+    import stripe
+    if stripe.api_key != STRIPE_SECRET_KEY:
+        stripe.api_key = STRIPE_SECRET_KEY
+        if STRIPE_API_BASE:
+            stripe.api_base = STRIPE_API_BASE
+    return stripe
+
 # ==============================================================================
 # GOOGLE CLOUD CONFIGURATION
 # ==============================================================================
-# Handle Google Cloud credentials from environment variable (for Render/production)
+# Handle Google Cloud credentials from environment variable (for Render/production).
+# Called from the startup hook, so importing main has no filesystem side effects
 GOOGLE_CREDS_JSON = os.getenv("GOOGLE_APPLICATION_CREDENTIALS_JSON")
-if GOOGLE_CREDS_JSON:
-    # If JSON credentials are provided as env var, write to temp file
-    import tempfile
-    credentials_dict = json.loads(GOOGLE_CREDS_JSON)
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as f:
-        json.dump(credentials_dict, f)
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = f.name
-elif os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
-    # Use local file path if provided (for development)
-    pass
-else:
-    print("Warning: Google Cloud credentials not configured. Speech-to-text may not work.")
+
+def configure_google_credentials():
+    if GOOGLE_CREDS_JSON:
+        if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
+            return  # Already written by this process (or its preforking parent)
+        # If JSON credentials are provided as env var, write to temp file
+        import tempfile
+        credentials_dict = json.loads(GOOGLE_CREDS_JSON)
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as f:
+            json.dump(credentials_dict, f)
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = f.name
+    elif os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
+        # Use local file path if provided (for development)
+        pass
+    else:
+        print("Warning: Google Cloud credentials not configured. Speech-to-text may not work.")
 
 # ==============================================================================
 # CONSTANTES Y CONFIGURACIÓN DE CORS
 # ==============================================================================
 FREE_TIER_MINUTES = 5
-MAX_FILE_SIZE_MB = 50  # Render FREE: 512MB RAM, limit to 50MB files
-MAX_DURATION_SECONDS = 60 * 15  # 15 minutos máximo
+# Reject new Pro analyses when the estimated queue wait exceeds this SLO
+PRO_QUEUE_WAIT_SLO_SECONDS = float(os.getenv("PRO_QUEUE_WAIT_SLO_SECONDS", "300"))
+PRO_MONTHLY_ANALYSIS_QUOTA = int(os.getenv("PRO_MONTHLY_ANALYSIS_QUOTA", "50"))
+MAX_FILE_SIZE_MB = float(os.getenv("MAX_FILE_SIZE_MB", "50"))  # Render FREE: 512MB RAM, limit to 50MB files
+MAX_DURATION_SECONDS = int(os.getenv("MAX_DURATION_SECONDS", "600"))  # 10 minutos máximo
 
 # Permitir orígenes locales y de producción
 origins = [
@@ -130,6 +331,52 @@ app.add_middleware(
     max_age=3600,
 )
 
+# ==============================================================================
+# OBSERVABILITY
+# Server-Timing per request, latency histograms and GET /metrics (Prometheus)
+# ==============================================================================
+metrics_registry = get_metrics_registry()
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # If set, /metrics requires "Authorization: Bearer <token>"
+EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+EVENT_LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+@app.middleware("http")
+async def record_request_timings(request: Request, call_next):
+    """
+    Time every request and the stages inside it (services.metrics.timed), and
+    report them in a Server-Timing header: e.g. db;dur=12.0, acoustics;dur=850.3
+    """
+    timings = start_request_timings()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    
+    route = request.scope.get("route")
+    metrics_registry.histogram("http_request_duration_seconds", {
+        "method": request.method,
+        "route": route.path if route else "unmatched",  # Templates, not raw paths: bounded labels
+        "status": f"{response.status_code // 100}xx"
+    }).observe(elapsed)
+    
+    timings["total"] = elapsed
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+# On-demand sampling profiles (services/profiler.py): admins send
+# "X-Profile: 1", and PROFILE_SAMPLE_RATE profiles a random fraction
+profiler = get_profiler()
+
+async def monitor_event_loop_lag():
+    """How late a periodic sleep wakes up: time the loop spent blocked by synchronous work."""
+    histogram = metrics_registry.histogram("event_loop_lag_seconds", buckets=EVENT_LOOP_LAG_BUCKETS)
+    last_lag = metrics_registry.gauge("event_loop_lag_last_seconds")
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(EVENT_LOOP_LAG_INTERVAL_SECONDS)
+        lag = max(0.0, time.perf_counter() - started - EVENT_LOOP_LAG_INTERVAL_SECONDS)
+        histogram.observe(lag)
+        last_lag.set(lag)
+
 # ==============================================================================
 # SEGURIDAD Y AUTENTICACIÓN
 # ==============================================================================
@@ -139,7 +386,27 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 días (mejorado de 30 para seguridad)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Emails allowed to use operational endpoints (/api/admin/*), comma separated
+ADMIN_EMAILS = {
+    email.strip().lower()
+    for email in os.getenv("ADMIN_EMAILS", "").split(",")
+    if email.strip()
+}
+
+# bcrypt cost factor; hashes with another cost are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt runs on its own small thread pool (the C implementation releases the
+# GIL), so a burst of logins can't stall the event loop. At most
+# PASSWORD_HASH_MAX_PENDING operations run or sit in the pool's queue; further
+# callers wait for one of those slots and get 503 after
+# PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "5"))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+password_slots: Optional[asyncio.Semaphore] = None
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
 # ==============================================================================
@@ -225,6 +492,46 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def run_password_op(func, *args):
+    """Run a bcrypt operation on password_executor, bounded by PASSWORD_HASH_MAX_PENDING."""
+    global password_slots
+    if password_slots is None:
+        password_slots = asyncio.Semaphore(PASSWORD_HASH_MAX_PENDING)
+    
+    try:
+        await asyncio.wait_for(password_slots.acquire(), timeout=PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, inténtalo de nuevo en unos segundos",
+            headers={"Retry-After": "5"}
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+    finally:
+        password_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    return await run_password_op(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str):
+    """Returns (valid, new_hash); new_hash is set when the stored hash uses an old cost."""
+    return await run_password_op(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header matches etag (weak comparison)."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    
+    def strip_weak(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+    
+    return strip_weak(etag) in {strip_weak(tag) for tag in if_none_match.split(",")}
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
@@ -239,6 +546,9 @@ def analyze_acoustics(audio_path: str):
     Optimized acoustic analysis with reduced memory footprint.
     Uses lower sample rate and offset to minimize RAM usage on Render FREE tier.
     """
+    import librosa  # Heavy (numba); loaded on first analysis or by the startup warm-up
+    import numpy as np
+    
     try:
         # Load with reduced sample rate to save memory (16kHz is enough for analysis)
         # Use offset to avoid loading entire file if too long
@@ -250,15 +560,11 @@ def analyze_acoustics(audio_path: str):
         if len(y) == 0:
             return {"duration": duration_seconds, "pitch_variation": 0}
         
-        # Compute pitch with reduced resolution to save memory
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr, threshold=0.1)
-        
-        # Extract pitch values more efficiently
-        pitch_values = pitches[magnitudes > np.median(magnitudes)]
+        pitch_values = salient_pitch_values(y, sr)
         pitch_std_dev = np.std(pitch_values) if len(pitch_values) > 0 else 0
         
         # Clear memory explicitly
-        del y, sr, pitches, magnitudes, pitch_values
+        del y, sr, pitch_values
         
         return {
             "duration": float(duration_seconds),
@@ -271,6 +577,39 @@ def analyze_acoustics(audio_path: str):
         print(f"Error en analyze_acoustics: {e}")
         return {"duration": 0, "pitch_variation": 0}
 
+def salient_pitch_values(y, sr):
+    """
+    Pitch track values in the frames louder than the median magnitude (pitch
+    variation is their std). Tracked a block at a time (services/spectrogram.py):
+    only the nonzero peaks are kept, which is enough for the exact median since
+    piptrack leaves every other bin at 0.
+    """
+    import librosa
+    import numpy as np
+    
+    pitch_blocks, magnitude_blocks = [], []
+    total = 0
+    for S in iter_magnitude_blocks(y):
+        pitches, magnitudes = librosa.piptrack(S=S, sr=sr, threshold=0.1)
+        total += magnitudes.size
+        peaks = magnitudes > 0
+        pitch_blocks.append(pitches[peaks])
+        magnitude_blocks.append(magnitudes[peaks])
+        del S, pitches, magnitudes, peaks
+    if not total:
+        return np.zeros(0, dtype=np.float32)
+    
+    pitches = np.concatenate(pitch_blocks)
+    magnitudes = np.concatenate(magnitude_blocks)
+    del pitch_blocks, magnitude_blocks
+    
+    # Median over all `total` values: the zeros sort first
+    zeros = total - magnitudes.size
+    middle = [(total - 1) // 2] if total % 2 else [total // 2 - 1, total // 2]
+    ranks = [rank - zeros for rank in middle if rank >= zeros]
+    median = float(np.partition(magnitudes, ranks)[ranks].sum()) / len(middle) if ranks else 0.0
+    return pitches[magnitudes > median]
+
 def analyze_conviction(transcript: str):
     lower_transcript = transcript.lower()
     words = re.findall(r'\b\w+\b', lower_transcript)
@@ -433,6 +772,9 @@ def analyze_conviction(transcript: str):
     }
 
 def estimate_pace_from_audio(audio_path: str, duration_seconds: float, assumed_wpm: int = 150):
+    from pydub import AudioSegment
+    from pydub.silence import detect_nonsilent
+    
     try:
         seg = AudioSegment.from_file(audio_path).set_channels(1)
         nonsilent = detect_nonsilent(seg, min_silence_len=300, silence_thresh=-40)
@@ -1199,15 +1541,31 @@ def generate_smart_insights(
         "disfluency_score": round(disfluency_score, 1)
     }
 
-def transcribe_local(file_path: str):
+# One Whisper model per process (loading it takes seconds and hundreds of MB).
+# Under gunicorn --preload it's loaded once in the master and inherited by the
+# forked worker copy-on-write (see gunicorn.conf.py)
+LOCAL_WHISPER_PRELOAD = os.getenv("LOCAL_WHISPER_PRELOAD", "false").lower() == "true"
+_whisper_model = None
+_whisper_model_lock = threading.Lock()
+
+def get_whisper_model():
+    global _whisper_model
+    if _whisper_model is None:
+        with _whisper_model_lock:
+            if _whisper_model is None:
+                from faster_whisper import WhisperModel
+                _whisper_model = WhisperModel(
+                    os.getenv('LOCAL_WHISPER_MODEL', 'small'), 
+                    device="cpu", 
+                    compute_type="int8"
+                )
+    return _whisper_model
+
+def transcribe_local(audio, initial_prompt: Optional[str] = None):
+    """Transcribe a file path or 16 kHz mono float32 samples (live segments, with the previous text as prompt)."""
     try:
-        from faster_whisper import WhisperModel
-        model = WhisperModel(
-            os.getenv('LOCAL_WHISPER_MODEL', 'small'), 
-            device="cpu", 
-            compute_type="int8"
-        )
-        segments, _ = model.transcribe(file_path)
+        model = get_whisper_model()
+        segments, _ = model.transcribe(audio, initial_prompt=initial_prompt)
         return " ".join([seg.text for seg in segments])
     except Exception as e:
         print(f"faster_whisper no disponible o falló: {e}")
@@ -1216,7 +1574,18 @@ def transcribe_local(file_path: str):
 # ==============================================================================
 # DEPENDENCIAS Y ENDPOINTS DE API
 # ==============================================================================
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
+    # Request-scoped: a request never loads the same user twice
+    cached_user = getattr(request.state, "current_user", None)
+    if cached_user is not None:
+        return cached_user
+    
+    current_user = await authenticate_token(token)
+    request.state.current_user = current_user
+    return current_user
+
+async def authenticate_token(token: Optional[str]) -> dict:
+    """User for a bearer token (also used by the WebSocket, which can't go through Depends)."""
     if not token:
         raise HTTPException(
             status_code=401,
@@ -1233,17 +1602,78 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         print(f"JWT Error: {e}")
         raise HTTPException(status_code=401, detail="Could not validate credentials")
     
-    # Query Supabase for user
-    response = supabase.table("users").select("*").eq("email", email).execute()
-    
-    if not response.data or len(response.data) == 0:
-        raise HTTPException(status_code=401, detail="User not found")
+    # Load user from storage (unless cached within USER_CACHE_TTL_SECONDS)
+    user = user_cache.get(email)
+    if user is None:
+        user = await storage.users.get(email)
+        
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        
+        user_cache.set(email, user)
     
-    user = response.data[0]
     return {"email": email, **user}
 
+async def get_admin_user(user: dict = Depends(get_current_user)):
+    if user.get("email", "").lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+def account_concurrency(scope: str, limit: int):
+    """
+    Dependency holding one of `limit` per-account slots for `scope` while the
+    request runs. Extra concurrent requests get 429 instead of queueing.
+    """
+    async def dependency(user: dict = Depends(get_current_user)):
+        key = f"{scope}:{user['email']}"
+        try:
+            token = await concurrency_limiter.acquire(key, limit)
+        except Exception as e:
+            # Limiter storage unavailable: don't take the endpoint down with it
+            print(f"⚠️ Concurrency limiter unavailable ({e}); allowing request")
+            yield
+            return
+        
+        if token is None:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Demasiadas solicitudes simultáneas (máximo {limit}). Espera a que termine la anterior.",
+                headers={"Retry-After": "5"}
+            )
+        try:
+            yield
+        finally:
+            try:
+                await concurrency_limiter.release(key, token)
+            except Exception as e:
+                print(f"⚠️ Could not release concurrency slot {key}: {e}")  # Lease expires on its own
+    
+    return dependency
+
+def profiling_requested(request: Request, user: dict) -> bool:
+    """True when an admin asked for a profile of this request (X-Profile: 1)."""
+    return request.headers.get("x-profile") == "1" and user.get("email", "").lower() in ADMIN_EMAILS
+
+def request_profiling(name: str):
+    """
+    Dependency that runs the endpoint under the sampling profiler when an admin
+    asks for it or the request is sampled. The profile file name is returned in
+    X-Profile-Id (fetch it from /api/admin/profiles/{name}).
+    """
+    async def dependency(request: Request, response: Response, user: dict = Depends(get_current_user)):
+        if not profiler.should_profile(profiling_requested(request, user)):
+            yield
+            return
+        
+        with profiler.session(name) as session:
+            if session:
+                response.headers["X-Profile-Id"] = os.path.basename(session.path)
+            yield
+    
+    return dependency
+
 @app.post("/register")
-@limiter.limit("5/minute")  # Máximo 5 registros por minuto por IP
+@limiter.limit("5/minute", key_func=ip_rate_limit_key)  # Máximo 5 registros por minuto por IP
 async def register_user(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     # Sanitizar email
     clean_email = sanitize_email(form_data.username)
@@ -1253,39 +1683,45 @@ async def register_user(request: Request, form_data: OAuth2PasswordRequestForm =
         raise HTTPException(status_code=400, detail=message)
     
     # Check if user exists
-    existing = supabase.table("users").select("email").eq("email", clean_email).execute()
-    if existing.data:
+    existing = await storage.users.get(clean_email)
+    if existing:
         raise HTTPException(status_code=400, detail="El email ya está registrado")
     
-    hashed_password = get_password_hash(form_data.password)
+    hashed_password = await hash_password_async(form_data.password)
     
     # Insert new user con email sanitizado
-    supabase.table("users").insert({
+    await storage.users.create({
         "email": clean_email,
         "hashed_password": hashed_password,
         "created_at": int(time.time()),
         "minutes": 0,
         "tier": "free"
-    }).execute()
+    })
     
     return {"message": "Usuario creado exitosamente"}
 
 @app.post("/token")
-@limiter.limit("10/minute")  # Máximo 10 intentos de login por minuto por IP
+@limiter.limit("10/minute", key_func=ip_rate_limit_key)  # Máximo 10 intentos de login por minuto por IP
 async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     # Sanitizar email
     clean_email = sanitize_email(form_data.username)
     
-    response = supabase.table("users").select("*").eq("email", clean_email).execute()
+    user = await storage.users.get(clean_email)
     
-    if not response.data:
+    if not user:
         raise HTTPException(status_code=401, detail="Email o contraseña incorrectos")
     
-    user = response.data[0]
-    
-    if not verify_password(form_data.password, user.get("hashed_password", "")):
+    try:
+        valid, new_hash = await verify_and_update_password_async(form_data.password, user.get("hashed_password", ""))
+    except ValueError:
+        valid, new_hash = False, None  # Missing or malformed stored hash
+    if not valid:
         raise HTTPException(status_code=401, detail="Email o contraseña incorrectos")
     
+    if new_hash:
+        await storage.users.update(clean_email, {"hashed_password": new_hash})
+        invalidate_user_cache(clean_email)
+    
     access_token = create_access_token(
         data={"sub": clean_email},  # Usar email sanitizado
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1307,19 +1743,20 @@ async def create_session(
     """Create a new practice session"""
     user_email = user.get("email")
     
-    response = supabase.table("sessions").insert({
+    session = await storage.sessions.create({
         "user_email": user_email,
         "name": session_data.name,
         "context": session_data.context,
         "target_audience": session_data.target_audience,
         "goal": session_data.goal,
         "created_at": int(time.time())
-    }).execute()
+    })
     
-    if not response.data:
+    if not session:
         raise HTTPException(status_code=500, detail="Failed to create session")
     
-    session_id = response.data[0]["id"]
+    session_id = session["id"]
+    session_list_cache.invalidate(user_email)
     
     return {
         "session_id": session_id,
@@ -1327,49 +1764,197 @@ async def create_session(
     }
 
 @app.get("/sessions/list")
-async def list_sessions(user: dict = Depends(get_current_user)):
-    """List all sessions for the current user with accurate recording counts"""
-    user_email = user.get("email")
+async def list_sessions(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    """
+    List the current user's sessions with recording counts, newest first.
     
-    # Get sessions
-    sessions_response = supabase.table("sessions").select(
-        "id, name, context, created_at"
-    ).eq("user_email", user_email).order("created_at", desc=True).execute()
+    Served by one grouped query (list_sessions_with_counts RPC on Supabase,
+    see setup_session_listing.sql). The first page is cached per user for a few
+    seconds and invalidated when a session or recording is created.
     
-    sessions = []
-    for session in sessions_response.data:
-        # Get recording count separately for accuracy
-        recordings_response = supabase.table("recordings").select(
-            "id", count="exact"
-        ).eq("session_id", session["id"]).execute()
+    Args:
+        limit: Page size (1-200)
+        cursor: next_cursor from the previous page
         
-        sessions.append({
+    Returns:
+        {"sessions": [...], "next_cursor": str or null}
+    """
+    user_email = user.get("email")
+    limit = max(1, min(limit, 200))
+    
+    if cursor is None:
+        cached = session_list_cache.get(user_email)
+        if cached and cached["limit"] == limit:
+            return cached["page"]
+    
+    before_created_at, before_id = None, None
+    if cursor:
+        # Both parts go to typed RPC parameters: accept only "<int>:<uuid>"
+        try:
+            created_at_part, id_part = cursor.split(":", 1)
+            before_created_at = int(created_at_part)
+            before_id = str(uuid.UUID(id_part))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    session_rows = await storage.sessions.list_with_counts(
+        user_email,
+        before_created_at=before_created_at,
+        before_id=before_id,
+        limit=limit
+    )
+    
+    sessions = [
+        {
             "id": session["id"],
             "name": session["name"],
             "context": session["context"],
             "created_at": session["created_at"],
-            "recordings_count": recordings_response.count or 0
-        })
+            "recordings_count": session["recordings_count"] or 0
+        }
+        for session in session_rows
+    ]
+    
+    next_cursor = None
+    if len(sessions) == limit:
+        next_cursor = f"{sessions[-1]['created_at']}:{sessions[-1]['id']}"
+    
+    page = {"sessions": sessions, "next_cursor": next_cursor}
+    if cursor is None:
+        session_list_cache.set(user_email, {"limit": limit, "page": page})
     
-    return {"sessions": sessions}
+    return page
+
+# Recording columns clients may request through ?fields=
+RECORDING_FIELDS = (
+    "id", "session_id", "pace", "pitch_variation", "disfluencies_per_minute",
+    "hedge_count", "total_words", "duration", "transcript", "insights_summary", "timestamp"
+)
 
 @app.get("/sessions/{session_id}")
 async def get_session(
+    request: Request,
+    response: Response,
     session_id: str,
+    fields: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    since: Optional[int] = None,
     user: dict = Depends(get_current_user)
 ):
-    """Get session details with all recordings"""
+    """
+    Get session details with a page of its recordings, newest first.
+    
+    Args:
+        fields: Comma-separated recording columns (default: all). id and
+            timestamp are always included since the cursor relies on them
+        limit: Recordings per page (1-200)
+        cursor: next_cursor from the previous page
+        since: Only recordings with timestamp > since (incremental sync)
+        
+    Returns:
+        The session row plus {"recordings": [...], "next_cursor": str or null}.
+        Carries an ETag derived from the recordings count and newest recording;
+        a matching If-None-Match gets 304 without reading the recordings.
+    """
     user_email = user.get("email")
+    limit = max(1, min(limit, 200))
+    
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in RECORDING_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        columns = ["id", "timestamp"] + [field for field in requested if field not in ("id", "timestamp")]
+    else:
+        columns = list(RECORDING_FIELDS)
     
-    # Get session with recordings
-    response = supabase.table("sessions").select(
-        "*, recordings(*)"
-    ).eq("id", session_id).eq("user_email", user_email).execute()
+    # The cursor ends up in a PostgREST filter: accept only "<int>:<uuid>"
+    before_timestamp, before_id = None, None
+    if cursor:
+        try:
+            timestamp_part, id_part = cursor.split(":", 1)
+            before_timestamp = int(timestamp_part)
+            before_id = str(uuid.UUID(id_part))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Cheap pre-queries: the session row and (count, newest recording)
+    session, recording_stats = await asyncio.gather(
+        storage.sessions.get(session_id, user_email),
+        storage.recordings.stats(session_id)
+    )
     
-    if not response.data:
+    if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return response.data[0]
+    fingerprint = json.dumps(
+        [session, recording_stats, columns, limit, cursor, since],
+        sort_keys=True, default=str
+    )
+    etag = f'W/"{hashlib.sha1(fingerprint.encode()).hexdigest()[:20]}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    
+    recordings = await storage.recordings.list_page(
+        session_id,
+        columns,
+        limit + 1,
+        before_timestamp=before_timestamp,
+        before_id=before_id,
+        since=since
+    )
+    
+    next_cursor = None
+    if len(recordings) > limit:
+        recordings = recordings[:limit]
+        next_cursor = f"{recordings[-1]['timestamp']}:{recordings[-1]['id']}"
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return {**session, "recordings": recordings, "next_cursor": next_cursor}
+
+# ==============================================================================
+# PROGRESS ENDPOINTS
+# ==============================================================================
+@app.get("/progress")
+async def get_progress(user: dict = Depends(get_current_user)):
+    """
+    Progress dashboard aggregates: running mean, EWMA, rolling mean over the
+    last recordings, personal best and min/max of each metric, overall and per
+    session context. Maintained on every upload (see setup_progress.sql), so
+    this reads a handful of rows regardless of how many recordings exist.
+    """
+    return summarize_progress(await storage.progress.get(user.get("email")))
+
+@app.get("/progress/series")
+async def get_progress_series(
+    metric: str,
+    context: Optional[str] = None,
+    points: int = 200,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Time series of one metric across all the user's recordings, downsampled
+    in the database to at most `points` buckets (3-1000) of equal recording
+    count; each point has the bucket's mean as value plus its min, max and count.
+    """
+    if metric not in PROGRESS_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of: {', '.join(PROGRESS_METRICS)}")
+    points = max(3, min(points, 1000))
+    
+    series = await storage.progress.series(user.get("email"), metric, context, points)
+    
+    return {
+        "metric": metric,
+        "context": context,
+        "total_points": sum(point["count"] for point in series),
+        "points": series
+    }
 
 # ==============================================================================
 # AUDIO ANALYSIS ENDPOINTS
@@ -1377,7 +1962,6 @@ async def get_session(
 
 # Constantes de validación de archivos
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
-MAX_DURATION_SECONDS = 600  # 10 minutos
 ALLOWED_AUDIO_TYPES = {
     "audio/webm",
     "audio/wav",
@@ -1416,6 +2000,116 @@ def validate_audio_file(file: UploadFile, contents: bytes) -> tuple[bool, str]:
     
     return True, "OK"
 
+async def finish_analysis(
+    user_email: str,
+    session_id: str,
+    session_context: str,
+    locale: str,
+    transcript: str,
+    duration: float,
+    pitch_variation: float,
+    audio_key: Optional[str],
+    estimate_pace: Callable[[], int]
+) -> dict:
+    """
+    Text analysis, scores, feedback and insights for an analysed recording,
+    saved with its minutes; returns the /upload-audio/ response. Shared by the
+    upload and the live WebSocket, which arrives here with the transcript and
+    acoustics already done.
+    
+    Args:
+        estimate_pace: Words/minute from the audio, used when there's no transcript
+    """
+    with timed("conviction"):
+        conviction_analysis = analyze_conviction(transcript)
+    duration_minutes = duration / 60 if duration > 0 else 1
+
+    with timed("pace"):
+        pace = (
+            round(conviction_analysis["total_words"] / duration_minutes)
+            if conviction_analysis["total_words"] > 0 and duration_minutes > 0
+            else estimate_pace()
+        )
+    disfluencies_per_minute = (
+        round(conviction_analysis["disfluency_count"] / duration_minutes, 1)
+        if duration > 0 else 0
+    )
+    hedges_per_minute = (
+        round(conviction_analysis["hedge_count"] / duration_minutes, 1)
+        if duration > 0 else 0
+    )
+
+    with timed("feedback"):
+        evaluations, scores = evaluate_metrics_and_scores(
+            pace,
+            pitch_variation,
+            disfluencies_per_minute,
+            hedges_per_minute
+        )
+        feedback = generate_structured_feedback(evaluations, conviction_analysis)
+
+    print("[INFO] Generating insights...")
+    with timed("insights"):
+        insights = generate_smart_insights(
+            metrics={
+                'pace': pace,
+                'disfluencies_per_minute': disfluencies_per_minute,
+                'pitch_variation': pitch_variation,
+                'duration': duration
+            },
+            transcript=transcript,
+            language=locale,
+            context=session_context,
+
+        )
+
+    # Insert recording and add minutes in one transaction (setup_record_upload.sql)
+    persisted = await storage.recordings.record_upload(
+        user_email,
+        session_id,
+        recording={
+            "pace": pace,
+            "pitch_variation": pitch_variation,
+            "disfluencies_per_minute": disfluencies_per_minute,
+            "hedge_count": conviction_analysis["hedge_count"],
+            "total_words": conviction_analysis["total_words"],
+            "duration": duration,
+            "transcript": transcript,
+            "insights_summary": insights.get("summary", ""),
+            "timestamp": int(time.time()),
+            "audio_key": audio_key
+        },
+        minutes=round(duration_minutes)
+    )
+
+    if not persisted:
+        # Session was deleted (or changed owner) while the audio was being analysed
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    session_list_cache.invalidate(user_email)
+    invalidate_user_cache(user_email)
+
+    return {
+        "transcription": transcript,
+        "pitch_variation": pitch_variation,
+        "pace": pace,
+        "disfluencies_per_minute": disfluencies_per_minute,
+        "hedge_count": conviction_analysis["hedge_count"],
+        "details": conviction_analysis.get("details", {}),
+        "evaluations": evaluations,
+        "scores": scores,
+        "feedback": feedback,
+        "duration": duration,
+        "total_words": conviction_analysis["total_words"],
+        "insights": insights,
+        "session_id": session_id,
+        "recording": persisted["recording"],
+        "summary": {
+            "recordings_count": persisted["recordings_count"],
+            "minutes_used": persisted["minutes_used"]
+        }
+    }
+
 @app.post("/upload-audio/")
 @limiter.limit("30/minute")  # Máximo 30 uploads por minuto
 async def upload_audio(
@@ -1423,7 +2117,9 @@ async def upload_audio(
     session_id: str,
     locale: str = "es",
     file: UploadFile = File(...),
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    _slot: None = Depends(account_concurrency("upload", UPLOAD_CONCURRENCY_PER_ACCOUNT)),
+    _profile: None = Depends(request_profiling("upload"))
 ):
     print(f"\n[INFO] Starting upload for session_id: {session_id}")
     print(f"[INFO] Locale received: {locale}")
@@ -1437,19 +2133,48 @@ async def upload_audio(
             detail=f"Límite de {FREE_TIER_MINUTES} minutos para el plan gratuito superado."
         )
 
+    # Validate the session before spending time on analysis
+    session = await storage.sessions.get(session_id, user_email, columns=("context",))
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    session_context = session["context"]
+
     temp_dir = "temp_audio"
     os.makedirs(temp_dir, exist_ok=True)
     
     # Read file with size check to prevent OOM
-    contents = await file.read()
+    with timed("read"):
+        contents = await file.read()
     file_size_mb = len(contents) / (1024 * 1024)
     
     if file_size_mb > MAX_FILE_SIZE_MB:
         raise HTTPException(
             status_code=413,
-            detail=f"Archivo demasiado grande ({file_size_mb:.1f}MB). Máximo: {MAX_FILE_SIZE_MB}MB"
+            detail=f"Archivo demasiado grande ({file_size_mb:.1f}MB). Máximo: {MAX_FILE_SIZE_MB:g}MB"
         )
     
+    # Duration and decoded size from the container headers, before anything is decoded
+    with timed("probe"):
+        probe = await asyncio.to_thread(probe_audio, contents)
+    if probe.exact and probe.duration_seconds > MAX_DURATION_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Audio demasiado largo. Máximo: {MAX_DURATION_SECONDS / 60:.0f} minutos"
+        )
+    
+    # Reserve the estimated working set (waits while other analyses use the budget)
+    analysis_memory = estimate_working_set(probe, len(contents))
+    try:
+        await admission.acquire(analysis_memory)
+    except AdmissionRejected as e:
+        if e.retry_after is None:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Audio demasiado largo para analizarlo en este servidor ({probe.duration_seconds / 60:.1f} minutos)"
+            )
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+    
     # Generar nombre de archivo seguro
     safe_filename = secrets.token_hex(16) + os.path.splitext(file.filename)[1].lower()
     file_path = os.path.join(temp_dir, safe_filename)
@@ -1458,12 +2183,25 @@ async def upload_audio(
         with open(file_path, "wb") as buffer:
             buffer.write(contents)
         
-        acoustic_results = analyze_acoustics(file_path)
+        # Keep a normalized 16 kHz mono copy for Pro re-analysis (content-addressed).
+        # Everything below reads that copy, so the original is decoded only once
+        audio_key = audio_store.key_for(contents)
+        try:
+            with timed("normalize"):
+                analysis_path = await asyncio.to_thread(audio_store.store, file_path, audio_key)
+        except Exception as e:
+            print(f"⚠️ Could not store normalized audio: {e}")
+            audio_key, analysis_path = None, file_path
+        
+        with timed("acoustics"):
+            acoustic_results = analyze_acoustics(analysis_path)
         duration = acoustic_results.get("duration", 0)
         
-        # Validar duración
+        # Validar duración (the probe only estimates it for containers it can't read)
         if duration > MAX_DURATION_SECONDS:
             os.remove(file_path)  # Limpiar archivo
+            if audio_key:
+                audio_store.delete(audio_key)
             raise HTTPException(
                 status_code=400,
                 detail=f"Audio demasiado largo. Máximo: {MAX_DURATION_SECONDS / 60:.0f} minutos"
@@ -1471,106 +2209,191 @@ async def upload_audio(
         
         transcript = ""
         
-        if 1 < duration < 65:
-            try:
-                # Use local transcription (Google Cloud Speech removed for compatibility)
-                transcript = transcribe_local(file_path)
-            except Exception as e:
-                print(f"Error en transcripción local: {e}")
-        elif duration >= 65:
-            transcript = transcribe_local(file_path)
-        
-        conviction_analysis = analyze_conviction(transcript)
-        duration_minutes = duration / 60 if duration > 0 else 1
-        
-        pace = (
-            round(conviction_analysis["total_words"] / duration_minutes)
-            if conviction_analysis["total_words"] > 0 and duration_minutes > 0
-            else estimate_pace_from_audio(file_path, duration)
-        )
-        disfluencies_per_minute = (
-            round(conviction_analysis["disfluency_count"] / duration_minutes, 1)
-            if duration > 0 else 0
-        )
-        hedges_per_minute = (
-            round(conviction_analysis["hedge_count"] / duration_minutes, 1)
-            if duration > 0 else 0
-        )
-        
-        evaluations, scores = evaluate_metrics_and_scores(
-            pace,
-            acoustic_results["pitch_variation"],
-            disfluencies_per_minute,
-            hedges_per_minute
+        with timed("transcribe"):
+            if 1 < duration < 65:
+                try:
+                    # Use local transcription (Google Cloud Speech removed for compatibility)
+                    transcript = transcribe_local(analysis_path)
+                except Exception as e:
+                    print(f"Error en transcripción local: {e}")
+            elif duration >= 65:
+                transcript = transcribe_local(analysis_path)
+        
+        return await finish_analysis(
+            user_email,
+            session_id,
+            session_context,
+            locale,
+            transcript=transcript,
+            duration=duration,
+            pitch_variation=acoustic_results["pitch_variation"],
+            audio_key=audio_key,
+            estimate_pace=lambda: estimate_pace_from_audio(analysis_path, duration)
         )
-        feedback = generate_structured_feedback(evaluations, conviction_analysis)
+    finally:
+        admission.release(analysis_memory)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+# ==============================================================================
+# LIVE ANALYSIS (WebSocket)
+# The browser streams the recording while it's being made; most of the
+# analysis is done by the time the user presses stop
+# ==============================================================================
+LIVE_IDLE_TIMEOUT_SECONDS = float(os.getenv("LIVE_IDLE_TIMEOUT_SECONDS", "30"))
+live_sessions_gauge = metrics_registry.gauge("live_sessions")
+
+def store_live_audio(pcm: memoryview) -> Optional[str]:
+    """Keep a live recording (PCM16 16 kHz mono) in the audio store for Pro re-analysis; returns its key."""
+    import numpy as np
+    import soundfile as sf
+    
+    os.makedirs("temp_audio", exist_ok=True)
+    file_path = os.path.join("temp_audio", secrets.token_hex(16) + ".wav")
+    try:
+        sf.write(file_path, np.frombuffer(pcm, dtype="<i2"), LIVE_SAMPLE_RATE, subtype="PCM_16")
+        audio_key = audio_store.key_for(pcm)
+        audio_store.store(file_path, audio_key)
+        return audio_key
+    except Exception as e:
+        print(f"⚠️ Could not store live recording: {e}")
+        return None
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+@app.websocket("/ws/live-analysis")
+async def live_analysis(websocket: WebSocket):
+    """
+    Analysis while recording. JSON text messages, audio as binary messages:
+    
+        client: {"type": "start", "token": "...", "session_id": "...", "locale": "es"}
+        server: {"type": "ready", "sample_rate": 16000, "max_seconds": 600}
+        client: binary PCM16 little-endian mono at 16 kHz, chunks of any size
+        server: {"type": "partial", "text": "<new words>", "pace": ..., "pauses": {...}, ...}
+        client: {"type": "stop"}
+        server: {"type": "final", "result": <same body as /upload-audio/>}
+    
+    The token goes in the first message (browsers can't set headers on a
+    WebSocket). The recording also ends at MAX_DURATION_SECONDS. Failures are
+    sent as {"type": "error", "status": <HTTP status>, "detail": "..."}
+    before closing.
+    """
+    await websocket.accept()
+    live = None
+    slot_key = slot_token = None
+    live_memory = 0
+    
+    async def send_partial(partial: dict):
+        try:
+            await websocket.send_json({"type": "partial", **partial})
+        except Exception:
+            pass  # Client gone; the receive loop will notice
+    
+    try:
+        start = await asyncio.wait_for(websocket.receive_json(), LIVE_IDLE_TIMEOUT_SECONDS)
+        if start.get("type") != "start":
+            raise HTTPException(status_code=400, detail="Expected a start message")
+        
+        user = await authenticate_token(start.get("token"))
+        user_email = user["email"]
+        session_id = start.get("session_id")
+        locale = start.get("locale", "es")
+        if user.get("tier", "free") == "free" and user.get("minutes", 0) >= FREE_TIER_MINUTES:
+            raise HTTPException(
+                status_code=403,
+                detail=f"Límite de {FREE_TIER_MINUTES} minutos para el plan gratuito superado."
+            )
         
-        # Get session context
-        session_response = supabase.table("sessions").select("context").eq("id", session_id).eq("user_email", user_email).execute()
-        if not session_response.data:
+        session = await storage.sessions.get(session_id, user_email, columns=("context",))
+        if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        session_context = session_response.data[0]["context"]
+        # Counts as an upload for the per-account cap
+        slot_key = f"upload:{user_email}"
+        slot_token = await concurrency_limiter.acquire(slot_key, UPLOAD_CONCURRENCY_PER_ACCOUNT)
+        if slot_token is None:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Demasiadas solicitudes simultáneas (máximo {UPLOAD_CONCURRENCY_PER_ACCOUNT}). Espera a que termine la anterior."
+            )
         
-        print("[INFO] Generating insights...")
-        insights = generate_smart_insights(
-            metrics={
-                'pace': pace,
-                'disfluencies_per_minute': disfluencies_per_minute,
-                'pitch_variation': acoustic_results["pitch_variation"],
-                'duration': duration
-            },
-            transcript=transcript,
-            language=locale,
-            context=session_context,
-            
+        # Segments are analysed one at a time, so a whole recording fits in much
+        # less memory than uploading it (services/live_analysis.py)
+        memory = live_working_set(MAX_DURATION_SECONDS)
+        try:
+            await admission.acquire(memory)
+        except AdmissionRejected as e:
+            raise HTTPException(status_code=503 if e.retry_after else 413, detail=str(e))
+        live_memory = memory
+        
+        live = LiveAnalysis(
+            transcribe=transcribe_local,
+            pitch_values=salient_pitch_values,
+            analyze_text=analyze_conviction,
+            on_partial=send_partial,
+            max_seconds=MAX_DURATION_SECONDS
         )
-        
-        # Insert recording
-        recording_response = supabase.table("recordings").insert({
-            "session_id": session_id,
-            "pace": pace,
-            "pitch_variation": acoustic_results["pitch_variation"],
-            "disfluencies_per_minute": disfluencies_per_minute,
-            "hedge_count": conviction_analysis["hedge_count"],
-            "total_words": conviction_analysis["total_words"],
-            "duration": duration,
-            "transcript": transcript,  # ← ADD THIS LINE
-            "insights_summary": insights.get("summary", ""),
-            "timestamp": int(time.time())
-        }).execute()
-        
-        # Update user minutes
-        supabase.table("users").update({
-            "minutes": user_minutes_used + round(duration_minutes)
-        }).eq("email", user_email).execute()
-        
-        # Get updated session with all recordings
-        updated_session_response = supabase.table("sessions").select(
-            "*, recordings(*)"
-        ).eq("id", session_id).eq("user_email", user_email).execute()
-        
-        updated_session = updated_session_response.data[0] if updated_session_response.data else None
-
-        return {
-            "transcription": transcript,
-            "pitch_variation": acoustic_results["pitch_variation"],
-            "pace": pace,
-            "disfluencies_per_minute": disfluencies_per_minute,
-            "hedge_count": conviction_analysis["hedge_count"],
-            "details": conviction_analysis.get("details", {}),
-            "evaluations": evaluations,
-            "scores": scores,
-            "feedback": feedback,
-            "duration": duration,
-            "total_words": conviction_analysis["total_words"],
-            "insights": insights,
-            "session_id": session_id,
-            "updated_session": updated_session
-        }
+        live_sessions_gauge.inc()
+        await websocket.send_json({"type": "ready", "sample_rate": LIVE_SAMPLE_RATE, "max_seconds": MAX_DURATION_SECONDS})
+        
+        while True:
+            message = await asyncio.wait_for(websocket.receive(), LIVE_IDLE_TIMEOUT_SECONDS)
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                if live.add_audio(message["bytes"]):
+                    break  # MAX_DURATION_SECONDS reached
+            elif message.get("text") and json.loads(message["text"]).get("type") == "stop":
+                break
+        
+        if not live.received_samples:
+            raise HTTPException(status_code=400, detail="No se recibió audio")
+        
+        # Only the last segment is left to analyse; the recording is stored meanwhile
+        with timed("live_finish"):
+            audio_key, _ = await asyncio.gather(asyncio.to_thread(store_live_audio, live.pcm()), live.finish())
+            result = await finish_analysis(
+                user_email,
+                session_id,
+                session["context"],
+                locale,
+                transcript=live.transcript,
+                duration=live.duration,
+                pitch_variation=live.pitch_variation,
+                audio_key=audio_key,
+                estimate_pace=live.estimate_pace
+            )
+        await websocket.send_json({"type": "final", "result": result})
+        await websocket.close()
+    except WebSocketDisconnect:
+        print("[INFO] Live analysis client disconnected")
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            status, detail = e.status_code, e.detail
+        elif isinstance(e, asyncio.TimeoutError):
+            status, detail = 408, "No data received"
+        elif isinstance(e, ValueError):
+            status, detail = 400, "Invalid message"
+        else:
+            traceback.print_exc()
+            status, detail = 500, "Live analysis failed"
+        try:
+            await websocket.send_json({"type": "error", "status": status, "detail": detail})
+            await websocket.close(code=1008 if status in (401, 403) else 1000)
+        except Exception:
+            pass
     finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        if live is not None:
+            await live.cancel()
+            live_sessions_gauge.dec()
+        if live_memory:
+            admission.release(live_memory)
+        if slot_token is not None:
+            try:
+                await concurrency_limiter.release(slot_key, slot_token)
+            except Exception as e:
+                print(f"⚠️ Could not release concurrency slot {slot_key}: {e}")
 
 @app.post("/insights/")
 async def insights(
@@ -1608,21 +2431,22 @@ async def confirm_subscription(
     end_date = current_time + (30 * 24 * 60 * 60)  # 30 days from now
     
     # Update user tier and store subscription ID with dates
-    supabase.table("users").update({
+    await storage.users.update(user_email, {
         "tier": "pro",
         "subscription_id": subscription_id,
         "subscription_status": "active",
         "subscription_start_date": current_time,
         "subscription_end_date": end_date
-    }).eq("email", user_email).execute()
+    })
+    invalidate_user_cache(user_email)
     
     # Log subscription activation
-    supabase.table("payments").insert({
+    audit_log.write({
         "order_id": subscription_id,
         "user_email": user_email,
         "timestamp": current_time,
         "event": "subscription_activated"
-    }).execute()
+    })
     
     return {"status": "success", "message": "La suscripción ha sido activada."}
 
@@ -1635,17 +2459,18 @@ async def confirm_payment(
     print(f"Confirmando pago para el pedido {payload.orderID} del usuario {user_email}")
     
     # Update user tier
-    supabase.table("users").update({
+    await storage.users.update(user_email, {
         "tier": "pro"
-    }).eq("email", user_email).execute()
+    })
+    invalidate_user_cache(user_email)
     
     # Log payment
-    supabase.table("payments").insert({
+    audit_log.write({
         "order_id": payload.orderID,
         "user_email": user_email,
         "timestamp": int(time.time()),
         "event": "tier_upgraded_to_pro"
-    }).execute()
+    })
     
     return {"status": "success", "message": "La cuenta ha sido actualizada a Pro."}
 
@@ -1681,11 +2506,7 @@ async def create_stripe_payment(
     user_email = current_user.get("email")
     
     # Check if user already has active subscription
-    user_response = supabase.table("users").select("*").eq("email", user_email).execute()
-    if not user_response.data:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    user = user_response.data[0]
+    user = current_user
     user_tier = user.get("tier", "free")
     subscription_status = user.get("subscription_status", "inactive")
     subscription_end_date = user.get("subscription_end_date", 0)
@@ -1699,6 +2520,7 @@ async def create_stripe_payment(
             detail="You already have an active Pro subscription"
         )
     
+    stripe = get_stripe()
     try:
         # Create Stripe checkout session
         session = stripe.checkout.Session.create(
@@ -1730,12 +2552,12 @@ async def create_stripe_payment(
         )
         
         # Log payment initiation
-        supabase.table("payments").insert({
+        audit_log.write({
             "order_id": session.id,
             "user_email": user_email,
             "timestamp": current_time,
             "event": "stripe_checkout_session_created"
-        }).execute()
+        })
         
         return {
             "session_id": session.id,
@@ -1758,7 +2580,7 @@ async def create_stripe_payment(
 
 
 @app.post("/api/confirm-stripe-payment")
-@limiter.limit("30/minute")
+@limiter.limit("30/minute", key_func=ip_rate_limit_key)
 async def confirm_stripe_payment(request: Request, session_id: str = None):
     """
     Confirm Stripe payment session and update user subscription.
@@ -1767,6 +2589,7 @@ async def confirm_stripe_payment(request: Request, session_id: str = None):
     Args:
         session_id: Stripe checkout session ID from success URL parameter
     """
+    stripe = get_stripe()
     try:
         if not session_id:
             # Try to get from request body
@@ -1799,25 +2622,26 @@ async def confirm_stripe_payment(request: Request, session_id: str = None):
         
         subscription_id = session.subscription or session_id
         
-        update_response = supabase.table("users").update({
+        update_response = await storage.users.update(user_email, {
             "tier": "pro",
             "subscription_status": "active",
             "subscription_id": subscription_id,
             "subscription_start_date": current_time,
             "subscription_end_date": end_date
-        }).eq("email", user_email).execute()
+        })
+        invalidate_user_cache(user_email)
         
-        if not update_response.data:
+        if not update_response:
             raise HTTPException(status_code=500, detail="Failed to update user subscription")
         
         # Log payment
-        supabase.table("payments").insert({
+        audit_log.write({
             "order_id": subscription_id,
             "user_email": user_email,
             "timestamp": current_time,
             "event": "stripe_payment_confirmed",
             "session_id": session_id
-        }).execute()
+        })
         
         print(f"✅ Stripe payment confirmed for {user_email} (session: {session_id})")
         
@@ -1878,21 +2702,22 @@ async def stripe_webhook(request: Request):
                 end_date = current_time + (30 * 24 * 60 * 60)  # 30 days from now
                 
                 # Update user to Pro tier
-                supabase.table("users").update({
+                await storage.users.update(user_email, {
                     "tier": "pro",
                     "subscription_status": "active",
                     "subscription_id": subscription_id,
                     "subscription_start_date": current_time,
                     "subscription_end_date": end_date
-                }).eq("email", user_email).execute()
+                })
+                invalidate_user_cache(user_email)
                 
                 # Log payment
-                supabase.table("payments").insert({
+                audit_log.write({
                     "order_id": subscription_id,
                     "user_email": user_email,
                     "timestamp": current_time,
                     "event": "stripe_subscription_activated"
-                }).execute()
+                })
                 
                 print(f"✅ Stripe subscription activated for {user_email}")
         
@@ -1902,24 +2727,24 @@ async def stripe_webhook(request: Request):
             subscription_id = subscription.get("id")
             
             # Find user with this subscription
-            users_response = supabase.table("users").select("*").eq("subscription_id", subscription_id).execute()
-            if users_response.data:
-                user = users_response.data[0]
+            user = await storage.users.get_by_subscription_id(subscription_id)
+            if user:
                 user_email = user.get("email")
                 
                 # Downgrade to free tier
-                supabase.table("users").update({
+                await storage.users.update(user_email, {
                     "tier": "free",
                     "subscription_status": "cancelled"
-                }).eq("email", user_email).execute()
+                })
+                invalidate_user_cache(user_email)
                 
                 # Log cancellation
-                supabase.table("payments").insert({
+                audit_log.write({
                     "order_id": subscription_id,
                     "user_email": user_email,
                     "timestamp": int(time.time()),
                     "event": "stripe_subscription_cancelled"
-                }).execute()
+                })
                 
                 print(f"✅ Stripe subscription cancelled for {user_email}")
         
@@ -1938,13 +2763,7 @@ async def get_subscription_status(current_user: dict = Depends(get_current_user)
     Returns:
         {"tier": str, "subscription_status": str, "subscription_end_date": int}
     """
-    user_email = current_user.get("email")
-    
-    user_response = supabase.table("users").select("*").eq("email", user_email).execute()
-    if not user_response.data:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    user = user_response.data[0]
+    user = current_user
     
     return {
         "tier": user.get("tier", "free"),
@@ -1965,18 +2784,19 @@ async def cancel_subscription(
     print(f"Cancelando suscripción {subscription_id} para el usuario {user_email}")
     
     # Update user tier to free and mark subscription as cancelled
-    supabase.table("users").update({
+    await storage.users.update(user_email, {
         "tier": "free",
         "subscription_status": "cancelled"
-    }).eq("email", user_email).execute()
+    })
+    invalidate_user_cache(user_email)
     
     # Log subscription cancellation
-    supabase.table("payments").insert({
+    audit_log.write({
         "order_id": subscription_id or "unknown",
         "user_email": user_email,
         "timestamp": int(time.time()),
         "event": "subscription_cancelled"
-    }).execute()
+    })
     
     return {"status": "success", "message": "La suscripción ha sido cancelada."}
 
@@ -1995,20 +2815,21 @@ async def reactivate_subscription(
     end_date = current_time + (30 * 24 * 60 * 60)  # 30 days from now
     
     # Update user tier back to pro and mark subscription as active
-    supabase.table("users").update({
+    await storage.users.update(user_email, {
         "tier": "pro",
         "subscription_status": "active",
         "subscription_start_date": current_time,
         "subscription_end_date": end_date
-    }).eq("email", user_email).execute()
+    })
+    invalidate_user_cache(user_email)
     
     # Log subscription reactivation
-    supabase.table("payments").insert({
+    audit_log.write({
         "order_id": subscription_id or "reactivated",
         "user_email": user_email,
         "timestamp": current_time,
         "event": "subscription_reactivated"
-    }).execute()
+    })
     
     return {"status": "success", "message": "La suscripción ha sido reactivada."}
 
@@ -2021,36 +2842,41 @@ async def reactivate_subscription(
 async def create_pro_analysis(
     request: Request,
     recording_id: str,
-    current_user: dict = Depends(get_current_user)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user),
+    _slot: None = Depends(account_concurrency("pro-analysis", PRO_ANALYSIS_CONCURRENCY_PER_ACCOUNT))
 ):
     """
     Start a pro audio analysis job for a recording.
     
     - Checks user has active Pro subscription
-    - Validates analysis count vs 50/month limit
+    - Attaches to a live or recent job for the same recording (or Idempotency-Key)
+    - Takes one analysis from the monthly quota (PRO_MONTHLY_ANALYSIS_QUOTA)
     - Queues the audio for background processing
     - Returns job_id immediately for polling
     
     Args:
         recording_id: ID of the recording to analyze
+        idempotency_key: Optional client key; retries with the same key return the same job
         current_user: Authenticated user from JWT token
         
     Returns:
-        {"job_id": str, "status": "queued", "message": str}
+        {"job_id": str, "status": str, "deduplicated": bool, "message": str,
+         "quota": {"limit", "used", "remaining"} (new jobs only)}
         
     Raises:
         HTTPException 403: User is not Pro subscriber or subscription expired
         HTTPException 404: Recording not found or doesn't belong to user
-        HTTPException 429: Analysis quota exceeded (50/month)
+        HTTPException 410: Recording audio expired from the audio store
+        HTTPException 413: Recording too long for the analysis memory budget
+        HTTPException 429: Monthly analysis quota exceeded, rate limit, or another
+            pro-analysis request of the account still in flight
+        HTTPException 503: Queue wait above PRO_QUEUE_WAIT_SLO_SECONDS (see Retry-After)
     """
     user_email = current_user.get("email")
     
     # 1. Check user has active Pro subscription
-    user_response = supabase.table("users").select("*").eq("email", user_email).execute()
-    if not user_response.data:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    user = user_response.data[0]
+    user = current_user
     user_tier = user.get("tier", "free")
     subscription_status = user.get("subscription_status", "inactive")
     subscription_end_date = user.get("subscription_end_date", 0)
@@ -2070,79 +2896,187 @@ async def create_pro_analysis(
             detail="Pro subscription is expired or inactive"
         )
     
-    # 2. Check analysis quota (50 analyses per month)
-    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    month_start_ts = int(month_start.timestamp())
+    # 2. Cheap quota pre-check from the cache (the real check happens at step 6)
+    quota_period = datetime.utcnow().strftime("%Y-%m")
+    quota_key = (user_email, quota_period)
+    cached_used = pro_usage_cache.get(quota_key)
+    if cached_used is not None and cached_used >= PRO_MONTHLY_ANALYSIS_QUOTA:
+        raise_quota_exceeded()
     
-    analyses_this_month = supabase.table("pro_analyses").select("id", count="exact").where(
-        f"user_email = '{user_email}' AND created_at >= {month_start_ts}"
-    ).execute()
+    # 3. Get recording (ownership lives on the parent session)
+    recording = await storage.recordings.get_with_owner(recording_id)
+    if not recording:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    
+    # Verify recording belongs to user
+    if recording.get("owner_email") != user_email:
+        raise HTTPException(status_code=403, detail="Recording does not belong to user")
     
-    analysis_count = analyses_this_month.count or 0
-    if analysis_count >= 50:
+    # Pro jobs read the normalized copy kept by upload_audio
+    audio_key = recording.get("audio_key")
+    audio_path = await asyncio.to_thread(audio_store.local_path, audio_key) if audio_key else None
+    if not audio_path:
         raise HTTPException(
-            status_code=429,
-            detail="Monthly analysis quota (50) exceeded. Upgrade or wait for next billing cycle."
+            status_code=410,
+            detail="The audio for this recording is no longer retained. Upload it again to analyze it."
         )
     
-    # 3. Get recording from Supabase
-    recording_response = supabase.table("sessions").select("*").eq("id", recording_id).execute()
-    if not recording_response.data:
-        raise HTTPException(status_code=404, detail="Recording not found")
+    # The job reserves this against the memory budget when it runs; refuse here,
+    # before taking quota, what could never be admitted
+    probe = await asyncio.to_thread(probe_audio_file, audio_path)
+    if estimate_working_set(probe) > admission.budget_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Recording too long to analyze on this server ({probe.duration_seconds / 60:.1f} minutes)"
+        )
     
-    recording = recording_response.data[0]
+    # 4. Attach to a live or recent job instead of queueing (and charging) a duplicate.
+    # Checked before taking quota, and again right after consume_quota (another
+    # request may have queued the job during that await); add_job also checks
+    # the keys and registers them before its first await.
+    idempotency_keys = [f"{user_email}:recording:{recording_id}:v{ANALYSIS_VERSION}"]
+    if idempotency_key:
+        idempotency_keys.append(f"{user_email}:key:{sanitize_input(idempotency_key, max_length=200)}")
     
-    # Verify recording belongs to user
-    if recording.get("user_email") != user_email:
-        raise HTTPException(status_code=403, detail="Recording does not belong to user")
+    existing_job = get_job_queue().find_job_by_idempotency_key(*idempotency_keys)
+    if existing_job:
+        return {
+            "job_id": existing_job.id,
+            "status": existing_job.status.value,
+            "deduplicated": True,
+            "message": "An analysis for this recording is already in progress or was just completed."
+        }
+    
+    # 5. Admission control: don't accept work we can't start within the SLO
+    estimated_wait = get_job_queue().estimate_wait_seconds()
+    if estimated_wait > PRO_QUEUE_WAIT_SLO_SECONDS:
+        retry_after = max(5, math.ceil(estimated_wait - PRO_QUEUE_WAIT_SLO_SECONDS))
+        raise HTTPException(
+            status_code=503,
+            detail=f"Pro analysis queue is busy (estimated wait {estimated_wait:.0f}s). Retry in {retry_after}s.",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    # 6. Take one analysis from the monthly counter (atomic, see setup_pro_usage.sql)
+    allowed, quota_used = await storage.pro_analyses.consume_quota(user_email, quota_period, PRO_MONTHLY_ANALYSIS_QUOTA)
+    pro_usage_cache.set(quota_key, quota_used)
+    if not allowed:
+        raise_quota_exceeded()
     
-    # 4. Queue for background processing
-    audio_path = recording.get("file_path")
+    async def release_quota():
+        pro_usage_cache.set(quota_key, await storage.pro_analyses.release_quota(user_email, quota_period))
+    
+    # A duplicate submitted concurrently may have been queued during the await
+    existing_job = get_job_queue().find_job_by_idempotency_key(*idempotency_keys)
+    if existing_job:
+        await release_quota()
+        return {
+            "job_id": existing_job.id,
+            "status": existing_job.status.value,
+            "deduplicated": True,
+            "message": "An analysis for this recording is already in progress or was just completed."
+        }
+    
+    # 7. Queue for background processing
     transcript = recording.get("transcript", "")
     
     try:
         job_id = await add_analysis_job(
-            user_email=user_email,
+            user_id=user_email,
             audio_path=audio_path,
             transcript=transcript,
-            recording_id=recording_id
+            recording_id=recording_id,
+            idempotency_keys=idempotency_keys,
+            profile=profiling_requested(request, current_user)
         )
-        
-        # Log analysis request to Supabase
-        supabase.table("pro_analyses").insert({
-            "user_email": user_email,
-            "recording_id": recording_id,
-            "job_id": job_id,
-            "status": "queued",
-            "created_at": current_time
-        }).execute()
-        
-        return {
-            "job_id": job_id,
-            "status": "queued",
-            "message": "Analysis queued successfully. Check status with GET /api/job/{job_id}"
-        }
-    
     except Exception as e:
         print(f"Error queuing pro analysis: {str(e)}")
+        await release_quota()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to queue analysis: {str(e)}"
         )
+    
+    # Log analysis request
+    await storage.pro_analyses.create({
+        "user_email": user_email,
+        "recording_id": recording_id,
+        "job_id": job_id,
+        "status": "queued",
+        "created_at": current_time
+    })
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "deduplicated": False,
+        "quota": {
+            "limit": PRO_MONTHLY_ANALYSIS_QUOTA,
+            "used": quota_used,
+            "remaining": max(0, PRO_MONTHLY_ANALYSIS_QUOTA - quota_used)
+        },
+        "message": "Analysis queued successfully. Check status with GET /api/job/{job_id}"
+    }
+
+
+def raise_quota_exceeded():
+    raise HTTPException(
+        status_code=429,
+        detail=f"Monthly analysis quota ({PRO_MONTHLY_ANALYSIS_QUOTA}) exceeded. Upgrade or wait for next billing cycle."
+    )
+
+
+def _get_owned_job(job_id: str, current_user: dict):
+    """Look up a job and verify it belongs to the current user."""
+    job = get_job_queue().get_job(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    # Verify job belongs to user
+    if job.user_id != current_user.get("email"):
+        raise HTTPException(status_code=403, detail="Job does not belong to user")
+    
+    return job
+
+
+@app.get("/api/jobs")
+@limiter.limit("30/minute")
+async def list_jobs(
+    request: Request,
+    limit: int = 20,
+    cursor: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    List the current user's pro analysis jobs, newest first (compact status only).
+    
+    Args:
+        limit: Page size (1-100)
+        cursor: next_cursor from the previous page
+        
+    Returns:
+        {"jobs": [...], "next_cursor": int or null}
+    """
+    limit = max(1, min(limit, 100))
+    return get_job_queue().get_user_jobs(current_user.get("email"), limit=limit, cursor=cursor)
 
 
 @app.get("/api/job/{job_id}")
 @limiter.limit("30/minute")
 async def get_job_status(
     request: Request,
+    response: Response,
     job_id: str,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Check the status of a pro analysis job.
     
-    Polling endpoint to check if analysis is complete.
-    Returns full result when ready, progress while processing.
+    Polling endpoint to check if analysis is complete. Returns a compact
+    status without the result payload; fetch GET /api/job/{job_id}/result once
+    status is "completed". Send the last ETag in If-None-Match to get an
+    empty 304 while nothing changed.
     
     Args:
         job_id: The job ID returned from /api/pro-analysis
@@ -2150,11 +3084,12 @@ async def get_job_status(
         
     Returns:
         {
-            "job_id": str,
+            "id": str,
             "status": "queued|processing|completed|failed|cancelled",
             "progress": 0-100,
-            "result": {...} or null,
+            "has_result": bool,
             "error": str or null,
+            "attempts": int,
             "created_at": timestamp,
             "started_at": timestamp or null,
             "completed_at": timestamp or null
@@ -2165,17 +3100,14 @@ async def get_job_status(
         HTTPException 403: Job doesn't belong to user
     """
     try:
-        job_queue = get_job_queue()
-        job = job_queue.get_job_status(job_id)
+        job = _get_owned_job(job_id, current_user)
         
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
-        
-        # Verify job belongs to user
-        if job.get("user_email") != current_user.get("email"):
-            raise HTTPException(status_code=403, detail="Job does not belong to user")
+        if etag_matches(request, job.etag):
+            return Response(status_code=304, headers={"ETag": job.etag})
         
-        return job
+        response.headers["ETag"] = job.etag
+        response.headers["Cache-Control"] = "private, no-cache"
+        return job.to_status_dict()
     
     except HTTPException:
         raise
@@ -2187,6 +3119,45 @@ async def get_job_status(
         )
 
 
+@app.get("/api/job/{job_id}/result")
+@limiter.limit("30/minute")
+async def get_job_result(
+    request: Request,
+    response: Response,
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the full result of a completed pro analysis job.
+    
+    The result never changes once written, so clients can cache it and
+    revalidate with If-None-Match.
+    
+    Returns:
+        {"job_id": str, "result": {...}}
+        
+    Raises:
+        HTTPException 404: Job not found
+        HTTPException 403: Job doesn't belong to user
+        HTTPException 409: Job has not completed
+    """
+    job = _get_owned_job(job_id, current_user)
+    
+    if job.status != JobStatus.COMPLETED or job.result is None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job {job_id} has no result (status '{job.status.value}')"
+        )
+    
+    etag = f'"{job.id}:{job.version}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, max-age=3600"
+    return {"job_id": job.id, "result": job.result}
+
+
 @app.delete("/api/job/{job_id}")
 @limiter.limit("10/minute")
 async def cancel_job(
@@ -2195,9 +3166,10 @@ async def cancel_job(
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Cancel a queued (not yet processing) pro analysis job.
+    Cancel a queued or processing pro analysis job.
     
-    Can only cancel jobs with status="queued". Processing/completed jobs cannot be cancelled.
+    Queued jobs never start. Processing jobs stop at the next stage boundary
+    (before the GPT call at the latest) and their worker is released.
     
     Args:
         job_id: The job ID to cancel
@@ -2208,7 +3180,8 @@ async def cancel_job(
         
     Raises:
         HTTPException 404: Job not found
-        HTTPException 403: Job doesn't belong to user or cannot be cancelled
+        HTTPException 403: Job doesn't belong to user
+        HTTPException 409: Job already finished
     """
     try:
         job_queue = get_job_queue()
@@ -2218,19 +3191,16 @@ async def cancel_job(
             raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
         
         # Verify job belongs to user
-        if job.get("user_email") != current_user.get("email"):
+        if job.get("user_id") != current_user.get("email"):
             raise HTTPException(status_code=403, detail="Job does not belong to user")
         
-        # Check if job can be cancelled (only queued jobs)
-        if job.get("status") != "queued":
+        # Cancel the job (only queued or processing jobs can be cancelled)
+        if not await job_queue.cancel_job(job_id):
             raise HTTPException(
-                status_code=403,
-                detail=f"Cannot cancel job with status '{job.get('status')}'. Only 'queued' jobs can be cancelled."
+                status_code=409,
+                detail=f"Cannot cancel job with status '{job.get('status')}'. Only queued or processing jobs can be cancelled."
             )
         
-        # Cancel the job
-        job_queue.cancel_job(job_id)
-        
         return {
             "status": "cancelled",
             "message": f"Job {job_id} has been cancelled"
@@ -2245,6 +3215,72 @@ async def cancel_job(
             detail=f"Failed to cancel job: {str(e)}"
         )
 
+@app.get("/api/admin/queue-metrics")
+async def get_queue_metrics(admin: dict = Depends(get_admin_user)):
+    """
+    Pro job queue metrics: depth, time-in-queue and per-stage processing
+    histograms (count/mean/p50/p95/p99 in seconds), worker utilization,
+    the current wait estimate used for admission control and the memory
+    reserved by in-flight analyses.
+    """
+    return {
+        **get_job_queue().get_metrics(),
+        "wait_slo_seconds": PRO_QUEUE_WAIT_SLO_SECONDS,
+        "memory_admission": admission.snapshot()
+    }
+
+
+@app.get("/api/admin/jobs/dead-letter")
+async def list_dead_letter_jobs(admin: dict = Depends(get_admin_user)):
+    """
+    List pro analysis jobs that failed permanently or exhausted their retries.
+    
+    Returns:
+        {"jobs": [job dict with error and attempts, ...]}
+    """
+    return {"jobs": get_job_queue().get_dead_letters()}
+
+
+@app.get("/api/admin/profiles")
+async def list_profiles(admin: dict = Depends(get_admin_user)):
+    """
+    Sampling profiles kept in PROFILE_DIR (newest first, at most PROFILE_MAX_FILES).
+    
+    Returns:
+        {"profiles": [{"name", "size", "created_at"}, ...], "sample_rate": float}
+    """
+    return {"profiles": profiler.list_profiles(), "sample_rate": profiler.sample_rate}
+
+
+@app.get("/api/admin/profiles/{name}")
+async def download_profile(name: str, admin: dict = Depends(get_admin_user)):
+    """
+    One profile as folded stacks, ready for flamegraph.pl or speedscope.app.
+    
+    Raises:
+        HTTPException 404: No such profile (or it was rotated out)
+    """
+    path = profiler.profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail=f"Profile {name} not found")
+    
+    with open(path) as f:
+        return Response(content=f.read(), media_type="text/plain; charset=utf-8")
+
+
+@app.post("/api/admin/jobs/{job_id}/replay")
+async def replay_dead_letter_job(job_id: str, admin: dict = Depends(get_admin_user)):
+    """
+    Requeue a dead-lettered job with a fresh retry budget (same job_id).
+    
+    Raises:
+        HTTPException 404: Job is not in the dead-letter list
+    """
+    if not await get_job_queue().replay_dead_letter(job_id):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} is not dead-lettered")
+    
+    return {"status": "queued", "message": f"Job {job_id} has been requeued"}
+
 # ==============================================================================
 # HEALTH CHECK
 # ==============================================================================
@@ -2259,4 +3295,37 @@ async def health_check():
         "status": "healthy",
         "timestamp": int(time.time()),
         "service": "Intone API"
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics(request: Request):
+    """
+    Prometheus scrape endpoint: request and stage latency histograms, DB call
+    latency, Pro job queue metrics, event-loop lag and RSS of this process.
+    """
+    if METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    
+    metrics_registry.gauge("process_resident_memory_bytes").set(process_rss_bytes())
+    get_job_queue().get_metrics()  # Refreshes the queue depth/busy gauges
+    return Response(
+        content=metrics_registry.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness: 200 once the analysis stack is warmed up, 503 before.
+    Liveness stays on /health, which answers as soon as the process is up.
+    """
+    if not readiness["ready"]:
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+    return {
+        "status": "ready" if readiness["ready"] else "warming_up",
+        "warmup_seconds": readiness["warmup_seconds"],
+        "warmup_error": readiness["error"]
     }
\ No newline at end of file
@@ -1,19 +1,57 @@
 # Services package for LucidSpeakAI
-from .pro_analyzer import ProAudioAnalyzer, analyze_audio_for_pro_user
-from .job_queue import (
-    JobQueue,
-    Job,
-    JobStatus,
-    get_job_queue,
-    add_analysis_job
-)
+#
+# Exports are resolved lazily (PEP 562): `from services.job_queue import ...`
+# must not pay for pro_analyzer's audio/ML imports at API startup.
+import importlib
 
-__all__ = [
-    "ProAudioAnalyzer",
-    "analyze_audio_for_pro_user",
-    "JobQueue",
-    "Job",
-    "JobStatus",
-    "get_job_queue",
-    "add_analysis_job"
-]
+_EXPORTS = {
+    "ProAudioAnalyzer": ".pro_analyzer",
+    "analyze_audio_for_pro_user": ".pro_analyzer",
+    "JobQueue": ".job_queue",
+    "Job": ".job_queue",
+    "JobStatus": ".job_queue",
+    "JobCancelledError": ".job_queue",
+    "get_job_queue": ".job_queue",
+    "add_analysis_job": ".job_queue",
+    "MetricsRegistry": ".metrics",
+    "Histogram": ".metrics",
+    "Gauge": ".metrics",
+    "get_metrics_registry": ".metrics",
+    "TTLCache": ".cache",
+    "Database": ".database",
+    "DatabaseError": ".database",
+    "get_database": ".database",
+    "Storage": ".repositories",
+    "get_storage": ".repositories",
+    "AuditLogWriter": ".audit_log",
+    "get_audit_log": ".audit_log",
+    "PROGRESS_METRICS": ".progress",
+    "AudioStore": ".audio_store",
+    "get_audio_store": ".audio_store",
+    "ConcurrencyLimiter": ".rate_limit",
+    "get_concurrency_limiter": ".rate_limit",
+    "SamplingProfiler": ".profiler",
+    "get_profiler": ".profiler",
+    "AudioProbe": ".audio_probe",
+    "probe_audio": ".audio_probe",
+    "MemoryAdmissionController": ".admission",
+    "AdmissionRejected": ".admission",
+    "get_admission_controller": ".admission",
+    "LiveAnalysis": ".live_analysis",
+    "live_working_set": ".live_analysis",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,288 @@
+# ==============================================================================
+# MEMORY ADMISSION
+# Uploads and Pro analyses reserve their estimated working set against a
+# per-process memory budget before decoding anything; the rest wait (FIFO)
+# or are turned away, instead of the instance running out of memory
+# ==============================================================================
+
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from .audio_probe import DEFAULT_CHANNELS, DEFAULT_SAMPLE_RATE, AudioProbe
+from .audio_store import decodes_in_process
+from .metrics import get_metrics_registry
+
+MB = 1024 * 1024
+
+# Peak working set, measured with tracemalloc on the synthetic corpus
+# (benchmarks/corpus.py, 60-600 s). The spectrogram is computed a block at a
+# time (services/spectrogram.py), so only the 16 kHz samples and per-frame
+# features grow with the duration: ~0.07 MB/s for analyze_acoustics, ~0.1 MB/s
+# for the Pro audio metrics stage, plus up to ~30 MB for the block in flight.
+ANALYSIS_BYTES_PER_SECOND = 0.12 * MB
+BLOCK_BYTES = 32 * MB
+# Decoding without ffmpeg holds the native-rate float32 samples plus the
+# resampled copy (~1.3x measured); with ffmpeg it happens out of process
+DECODE_OVERHEAD = 1.5
+# Transcription buffers, response building, small arrays
+BASE_BYTES = 16 * MB
+
+
+def estimate_working_set(probe: AudioProbe, upload_bytes: int = 0) -> int:
+    """
+    Estimated peak memory of analysing an upload: the upload itself, plus the
+    larger of the decode and the analysis (they don't overlap: the decoded
+    original is dropped once the 16 kHz copy is written).
+    """
+    decode = probe.decoded_bytes() * DECODE_OVERHEAD if decodes_in_process() else 0
+    analysis = probe.duration_seconds * ANALYSIS_BYTES_PER_SECOND + BLOCK_BYTES
+    return int(upload_bytes + max(decode, analysis) + BASE_BYTES)
+
+
+def longest_upload_working_set(max_duration_seconds: float, max_upload_bytes: int) -> int:
+    """
+    Working set of the largest upload that passes the size and duration limits
+    (headers unknown: assumes 48 kHz stereo), i.e. the budget under which every
+    accepted recording can be analysed.
+    """
+    probe = AudioProbe("unknown", max_duration_seconds, DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS, exact=False)
+    return estimate_working_set(probe, max_upload_bytes)
+
+
+# Reservation of the work running in the current task (set by reserve())
+_current_reservation: contextvars.ContextVar = contextvars.ContextVar("admission_reservation", default=None)
+
+
+class AdmissionRejected(Exception):
+    """The work can't be admitted: too big for the budget (retry_after None) or busy for too long."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MemoryAdmissionController:
+    """
+    Tracks the estimated memory of in-flight analyses in this process.
+
+    Work that fits is admitted at once. Otherwise it waits in FIFO order (so
+    large uploads aren't starved by small ones) for up to max_wait_seconds,
+    with at most max_waiting waiters; work larger than the whole budget is
+    rejected immediately. Single event loop, no locking needed.
+    """
+
+    def __init__(self, budget_bytes: int, max_wait_seconds: float = 30.0, max_waiting: int = 8):
+        """
+        Args:
+            budget_bytes: Memory all in-flight analyses may use together
+            max_wait_seconds: Default wait for capacity before rejecting (math.inf = forever)
+            max_waiting: Bounded waiters; beyond this, work is rejected right away
+                (waits with no deadline are not counted against it)
+        """
+        self.budget_bytes = budget_bytes
+        self.max_wait_seconds = max_wait_seconds
+        self.max_waiting = max_waiting
+        self.reserved_bytes = 0
+        self._waiters: deque = deque()  # (cost, future, bounded), FIFO
+
+        metrics = get_metrics_registry()
+        self._reserved_gauge = metrics.gauge("admission_reserved_bytes")
+        self._waiting_gauge = metrics.gauge("admission_waiting")
+        self._wait_histogram = metrics.histogram("admission_wait_seconds")
+        metrics.gauge("admission_budget_bytes").set(budget_bytes)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, cost: int, max_wait_seconds: Optional[float] = None):
+        """
+        Reserve `cost` bytes, waiting for capacity if needed. Pair with release(cost).
+
+        Raises:
+            AdmissionRejected: cost exceeds the budget, too many waiters, or the wait timed out
+        """
+        if cost > self.budget_bytes:
+            raise AdmissionRejected(
+                f"Needs ~{cost / MB:.0f} MB, more than the {self.budget_bytes / MB:.0f} MB analysis budget"
+            )
+        if not self._waiters and self.reserved_bytes + cost <= self.budget_bytes:
+            self._grant(cost)
+            self._wait_histogram.observe(0.0)
+            return
+
+        wait = self.max_wait_seconds if max_wait_seconds is None else max_wait_seconds
+        bounded = not math.isinf(wait)
+        if wait <= 0 or (bounded and sum(1 for *_, b in self._waiters if b) >= self.max_waiting):
+            raise AdmissionRejected("Server busy analysing other uploads", retry_after=5)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (cost, future, bounded)
+        self._waiters.append(entry)
+        self._waiting_gauge.set(len(self._waiters))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=wait if bounded else None)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                self.release(cost)  # Granted just as the wait ended
+            else:
+                future.cancel()
+                self._waiters.remove(entry)
+                self._waiting_gauge.set(len(self._waiters))
+                self._wake()  # A smaller request behind this one may fit now
+            if isinstance(e, asyncio.TimeoutError):
+                raise AdmissionRejected("Server busy analysing other uploads", retry_after=5)
+            raise
+        finally:
+            self._wait_histogram.observe(time.monotonic() - started)
+
+    def release(self, cost: int):
+        self.reserved_bytes = max(0, self.reserved_bytes - cost)
+        self._reserved_gauge.set(self.reserved_bytes)
+        self._wake()
+
+    @asynccontextmanager
+    async def reserve(self, cost: int, max_wait_seconds: Optional[float] = None):
+        """
+        acquire() for the duration of the block. Threads started inside it with
+        run_in_thread() keep the reservation until they return, even if the
+        block is left first (cancelled or timed out while awaiting them).
+        """
+        await self.acquire(cost, max_wait_seconds)
+        reservation = Reservation(self, cost)
+        token = _current_reservation.set(reservation)
+        try:
+            yield reservation
+        finally:
+            _current_reservation.reset(token)
+            reservation.close()
+
+    def _grant(self, cost: int):
+        self.reserved_bytes += cost
+        self._reserved_gauge.set(self.reserved_bytes)
+
+    def _wake(self):
+        while self._waiters and self.reserved_bytes + self._waiters[0][0] <= self.budget_bytes:
+            cost, future, _ = self._waiters.popleft()
+            self._grant(cost)
+            future.set_result(None)
+        self._waiting_gauge.set(len(self._waiters))
+
+    def snapshot(self):
+        return {
+            "budget_bytes": self.budget_bytes,
+            "reserved_bytes": self.reserved_bytes,
+            "waiting": self.waiting,
+        }
+
+
+class Reservation:
+    """
+    Bytes reserved by reserve(); released once its block has exited and every
+    thread started under it has returned. Only touched on the event loop.
+    """
+
+    def __init__(self, controller: MemoryAdmissionController, cost: int):
+        self.controller = controller
+        self.cost = cost
+        self.threads = 0
+        self._closed = False
+        self._released = False
+
+    def thread_started(self):
+        self.threads += 1
+
+    def thread_finished(self):
+        self.threads -= 1
+        self._release_if_done()
+
+    def close(self):
+        self._closed = True
+        self._release_if_done()
+
+    def _release_if_done(self):
+        if self._closed and not self.threads and not self._released:
+            self._released = True
+            self.controller.release(self.cost)
+
+
+async def run_in_thread(func, *args, **kwargs):
+    """
+    asyncio.to_thread() that holds the caller's reservation (see reserve())
+    until the thread returns. Cancelling the await only stops waiting: the
+    thread can't be interrupted and keeps its working set, so the memory must
+    stay reserved or new work would be admitted on top of it.
+    """
+    reservation = _current_reservation.get()
+    if reservation is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    lock = threading.Lock()
+    state = {"started": False, "abandoned": False}
+
+    def finished():
+        try:
+            loop.call_soon_threadsafe(reservation.thread_finished)
+        except RuntimeError:
+            pass  # Loop closed (shutdown): nothing left to admit
+
+    def run():
+        with lock:
+            if state["abandoned"]:
+                return None  # Cancelled before it started; already accounted for
+            state["started"] = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            finished()
+
+    reservation.thread_started()
+    try:
+        return await asyncio.to_thread(run)
+    except asyncio.CancelledError:
+        with lock:
+            if not state["started"]:
+                state["abandoned"] = True
+                reservation.thread_finished()
+        raise
+
+
+# Global admission controller (per process)
+_admission_controller: Optional[MemoryAdmissionController] = None
+
+
+def get_admission_controller() -> MemoryAdmissionController:
+    """
+    Get or create the controller configured by the ANALYSIS_MEMORY_* environment
+    variables. The default budget is 200 MB, or more if that is what the
+    longest accepted recording (MAX_DURATION_SECONDS, MAX_FILE_SIZE_MB) needs;
+    an explicit budget below that is kept, with a warning (those uploads get 413).
+    """
+    global _admission_controller
+    if _admission_controller is None:
+        longest = longest_upload_working_set(
+            float(os.getenv("MAX_DURATION_SECONDS", "600")),
+            int(float(os.getenv("MAX_FILE_SIZE_MB", "50")) * MB)
+        )
+        configured = os.getenv("ANALYSIS_MEMORY_BUDGET_MB")
+        budget_bytes = int(float(configured) * MB) if configured else max(200 * MB, longest)
+        if budget_bytes < longest:
+            print(
+                f"⚠️ ANALYSIS_MEMORY_BUDGET_MB={configured} is below the ~{longest / MB:.0f} MB the longest "
+                f"accepted upload needs; long recordings will be rejected with 413"
+            )
+        _admission_controller = MemoryAdmissionController(
+            budget_bytes=budget_bytes,
+            max_wait_seconds=float(os.getenv("ANALYSIS_MEMORY_MAX_WAIT_SECONDS", "30")),
+            max_waiting=int(os.getenv("ANALYSIS_MEMORY_MAX_WAITING", "8"))
+        )
+    return _admission_controller
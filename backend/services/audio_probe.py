@@ -0,0 +1,244 @@
+# ==============================================================================
+# AUDIO PROBE
+# Duration, sample rate and channels of an upload read from its container
+# headers and index, without decoding any audio
+# ==============================================================================
+
+import io
+import struct
+from typing import Optional
+
+# Assumed when a container does not say (browser recordings are 48 kHz)
+DEFAULT_SAMPLE_RATE = 48000
+DEFAULT_CHANNELS = 2
+# Used to estimate the duration of files whose container could not be read;
+# deliberately low (compressed speech is rarely under 32 kbps), so the estimate errs long
+FALLBACK_BITRATE_BPS = 32000
+
+# Matroska/WebM element IDs (marker bits included)
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+_EBML_TRACKS = 0x1654AE6B
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_AUDIO = 0xE1
+_EBML_SAMPLING_FREQUENCY = 0xB5
+_EBML_CHANNELS = 0x9F
+_EBML_CLUSTER = 0x1F43B675
+_EBML_CLUSTER_TIMECODE = 0xE7
+_EBML_BLOCK_GROUP = 0xA0
+_EBML_BLOCK = 0xA1
+_EBML_SIMPLE_BLOCK = 0xA3
+# Master elements the scan descends into instead of skipping
+_EBML_MASTERS = {
+    _EBML_SEGMENT, _EBML_INFO, _EBML_TRACKS, _EBML_TRACK_ENTRY, _EBML_AUDIO, _EBML_CLUSTER, _EBML_BLOCK_GROUP
+}
+
+# MP4 boxes on the path to the movie and media headers
+_MP4_CONTAINERS = {b"moov", b"trak", b"mdia"}
+
+
+class AudioProbe:
+    """What an upload's container says about the audio it holds."""
+
+    def __init__(
+        self,
+        container: str,
+        duration_seconds: float,
+        sample_rate: Optional[int] = None,
+        channels: Optional[int] = None,
+        exact: bool = True
+    ):
+        """
+        Args:
+            container: "wav", "flac", "ogg", "mp3", "webm", "mp4" or "unknown"
+            duration_seconds: From the headers/index, or estimated from size if not exact
+            sample_rate: Native rate, None if the container doesn't say
+            channels: Channel count, None if the container doesn't say
+            exact: False when the duration is only a size-based estimate
+        """
+        self.container = container
+        self.duration_seconds = duration_seconds
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.exact = exact
+
+    def decoded_bytes(self) -> int:
+        """Size of the decoded float32 PCM at the native rate (what a full decode allocates)."""
+        sample_rate = self.sample_rate or DEFAULT_SAMPLE_RATE
+        channels = self.channels or DEFAULT_CHANNELS
+        return int(self.duration_seconds * sample_rate * channels * 4)
+
+    def to_dict(self):
+        return {
+            "container": self.container,
+            "duration_seconds": round(self.duration_seconds, 2),
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "exact": self.exact,
+        }
+
+
+def probe_audio(data: bytes) -> AudioProbe:
+    """
+    Probe an upload held in memory. Never decodes samples: WAV/FLAC/OGG/MP3
+    headers are read by libsndfile, WebM by walking its element headers
+    (recordings from MediaRecorder carry no Duration, so the last block's
+    timestamp is used), MP4/M4A from the movie header. Anything else gets a
+    size-based estimate with exact=False.
+    """
+    try:
+        if data[:4] == b"\x1aE\xdf\xa3":
+            probe = _probe_matroska(data)
+        elif data[4:8] == b"ftyp":
+            probe = _probe_mp4(data)
+        else:
+            probe = _probe_soundfile(io.BytesIO(data))
+        if probe is not None:
+            return probe
+    except Exception:
+        pass  # Malformed headers: fall through to the estimate, the decoder will judge the file
+    return AudioProbe("unknown", len(data) * 8 / FALLBACK_BITRATE_BPS, exact=False)
+
+
+def probe_audio_file(path: str) -> AudioProbe:
+    """Probe a file on disk; formats libsndfile reads are probed without loading the file."""
+    try:
+        probe = _probe_soundfile(path)
+        if probe is not None:
+            return probe
+    except Exception:
+        pass
+    with open(path, "rb") as f:
+        return probe_audio(f.read())
+
+
+def _probe_soundfile(source) -> Optional[AudioProbe]:
+    import soundfile as sf
+
+    info = sf.info(source)
+    if not info.samplerate or info.frames <= 0:
+        return None
+    return AudioProbe(info.format.lower(), info.frames / info.samplerate, info.samplerate, info.channels)
+
+
+# --- Matroska / WebM ----------------------------------------------------------
+
+def _read_vint(data: bytes, pos: int, keep_marker: bool):
+    """EBML variable-length integer at pos: (value, length, all_ones)."""
+    first = data[pos]
+    length, mask = 1, 0x80
+    while not first & mask:
+        mask >>= 1
+        length += 1
+        if length > 8:
+            raise ValueError("invalid EBML vint")
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    all_ones = value == (1 << (7 * length)) - 1
+    return value, length, all_ones
+
+
+def _read_uint(data: bytes, pos: int, size: int) -> int:
+    return int.from_bytes(data[pos:pos + size], "big")
+
+
+def _read_float(data: bytes, pos: int, size: int) -> float:
+    return struct.unpack(">f" if size == 4 else ">d", data[pos:pos + size])[0]
+
+
+def _probe_matroska(data: bytes) -> Optional[AudioProbe]:
+    """
+    Walk the element headers in one pass, descending into the masters that
+    matter and skipping every other payload (audio frames are never read).
+    Unknown-size elements (live recordings) are descended into as well.
+    """
+    timecode_scale = 1_000_000  # ns per timecode tick (Matroska default)
+    duration = sample_rate = channels = None
+    cluster_timecode, last_block_timecode = 0, None
+
+    pos, end = 0, len(data)
+    while pos < end:
+        try:
+            element_id, id_length, _ = _read_vint(data, pos, keep_marker=True)
+            size, size_length, unknown_size = _read_vint(data, pos + id_length, keep_marker=False)
+        except (IndexError, ValueError):
+            break  # Truncated trailing bytes
+        pos += id_length + size_length
+
+        if element_id in _EBML_MASTERS:
+            continue
+        if element_id == _EBML_TIMECODE_SCALE:
+            timecode_scale = _read_uint(data, pos, size)
+        elif element_id == _EBML_DURATION:
+            duration = _read_float(data, pos, size)
+        elif element_id == _EBML_SAMPLING_FREQUENCY:
+            sample_rate = int(_read_float(data, pos, size))
+        elif element_id == _EBML_CHANNELS:
+            channels = _read_uint(data, pos, size)
+        elif element_id == _EBML_CLUSTER_TIMECODE:
+            cluster_timecode = _read_uint(data, pos, size)
+        elif element_id in (_EBML_SIMPLE_BLOCK, _EBML_BLOCK):
+            _, track_length, _ = _read_vint(data, pos, keep_marker=False)
+            relative = struct.unpack(">h", data[pos + track_length:pos + track_length + 2])[0]
+            timecode = cluster_timecode + relative
+            if last_block_timecode is None or timecode > last_block_timecode:
+                last_block_timecode = timecode
+
+        if unknown_size:
+            break  # Only masters may have an unknown size
+        pos += size
+
+    if duration:
+        seconds = duration * timecode_scale / 1e9
+    elif last_block_timecode is not None:
+        seconds = last_block_timecode * timecode_scale / 1e9 + 0.02  # Plus about one (Opus) frame
+    else:
+        return None
+    return AudioProbe("webm", seconds, sample_rate, channels)
+
+
+# --- MP4 / M4A ----------------------------------------------------------------
+
+def _mp4_boxes(data: bytes, start: int, end: int):
+    """(type, payload_start, payload_end) of the boxes between start and end."""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[pos:pos + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[pos + 8:pos + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield box_type, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _probe_mp4(data: bytes) -> Optional[AudioProbe]:
+    duration = sample_rate = None
+
+    def walk(start, end):
+        nonlocal duration, sample_rate
+        for box_type, payload_start, payload_end in _mp4_boxes(data, start, end):
+            if box_type in _MP4_CONTAINERS:
+                walk(payload_start, payload_end)
+            elif box_type in (b"mvhd", b"mdhd"):
+                version = data[payload_start]
+                if version == 1:
+                    timescale, length = struct.unpack(">IQ", data[payload_start + 20:payload_start + 32])
+                else:
+                    timescale, length = struct.unpack(">II", data[payload_start + 12:payload_start + 20])
+                if box_type == b"mvhd" and timescale:
+                    duration = length / timescale
+                elif box_type == b"mdhd" and sample_rate is None:
+                    sample_rate = timescale  # Audio tracks use the sample rate as media timescale
+
+    walk(0, len(data))
+    if not duration:
+        return None
+    return AudioProbe("mp4", duration, sample_rate, None)
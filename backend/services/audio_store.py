@@ -0,0 +1,257 @@
+# ==============================================================================
+# AUDIO STORE
+# Content-addressed store of normalized (16 kHz mono FLAC) recordings, on local
+# disk or a GCS bucket, with time-based retention
+# ==============================================================================
+
+import hashlib
+import os
+import shutil
+import subprocess
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional
+
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_EXTENSION = ".flac"
+
+
+def normalize_audio(src_path: str, dest_path: str) -> float:
+    """
+    Decode any supported upload (webm, m4a, mp3, wav...) once and write it as
+    16 kHz mono 16-bit FLAC. Analyses that load at 16 kHz read this copy with
+    no resampling. Returns the duration in seconds.
+
+    With ffmpeg on the PATH (installed on Render for pydub) the decode streams
+    through it, so the native-rate samples are never held in this process;
+    otherwise librosa decodes the whole file (see decodes_in_process).
+    """
+    import soundfile as sf
+
+    if not decodes_in_process():
+        subprocess.run(
+            [
+                "ffmpeg", "-nostdin", "-v", "error", "-y", "-i", src_path,
+                "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), "-sample_fmt", "s16", "-f", "flac", dest_path
+            ],
+            check=True,
+            capture_output=True
+        )
+        return sf.info(dest_path).duration
+
+    import librosa
+
+    y, _ = librosa.load(src_path, sr=AUDIO_SAMPLE_RATE, mono=True)
+    sf.write(dest_path, y, AUDIO_SAMPLE_RATE, format="FLAC", subtype="PCM_16")
+    return len(y) / AUDIO_SAMPLE_RATE
+
+
+@lru_cache(maxsize=1)
+def decodes_in_process() -> bool:
+    """True when normalize_audio has to decode uploads whole in this process (no ffmpeg)."""
+    return shutil.which("ffmpeg") is None
+
+
+class AudioStore(ABC):
+    """
+    Normalized audio addressed by the SHA-256 of the original upload bytes.
+
+    Identical uploads map to one stored copy and skip re-encoding. Blocking
+    (file and network I/O): call from a worker thread in async code.
+    """
+
+    def __init__(self, retention_days: float = 30.0):
+        """
+        Args:
+            retention_days: Copies not stored or re-uploaded for this long are purged
+        """
+        self.retention_days = retention_days
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def _relative_path(key: str) -> str:
+        return os.path.join(key[:2], key + AUDIO_EXTENSION)
+
+    @abstractmethod
+    def store(self, src_path: str, key: str) -> str:
+        """Normalize src_path into the store (no-op if present); returns a local path to the copy."""
+
+    @abstractmethod
+    def local_path(self, key: str) -> Optional[str]:
+        """Local path of a stored copy (fetched if needed), or None if not retained."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove a stored copy (no-op if absent)."""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Apply the retention policy; returns how many copies were removed."""
+
+
+class LocalAudioStore(AudioStore):
+    """Store on the local filesystem: <root>/<ab>/<sha256>.flac."""
+
+    def __init__(self, root: str = "audio_store", retention_days: float = 30.0):
+        super().__init__(retention_days)
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, self._relative_path(key))
+
+    def store(self, src_path, key):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.utime(path)  # Retention counts from the latest upload
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            normalize_audio(src_path, tmp_path)
+            os.replace(tmp_path, path)  # Atomic: readers never see partial files
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def local_path(self, key):
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def purge_expired(self):
+        return _purge_directory(self.root, self.retention_days * 86400)
+
+
+class GCSAudioStore(AudioStore):
+    """
+    Store in a Google Cloud Storage bucket, with a local read-through cache.
+
+    Normalization happens locally; the FLAC is uploaded once per key. Pro jobs
+    read from the cache and download on a miss. Prefer a bucket lifecycle rule
+    (delete after N days) in production; purge_expired() does the same by
+    listing objects, and always trims the local cache.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "audio/",
+        cache_dir: str = "audio_cache",
+        retention_days: float = 30.0,
+        cache_retention_hours: float = 24.0
+    ):
+        super().__init__(retention_days)
+        try:
+            from google.cloud import storage
+        except ImportError:
+            raise ImportError("google-cloud-storage is required for AUDIO_STORE_BACKEND=gcs")
+
+        self.bucket_name = bucket
+        self.prefix = prefix
+        self.cache = LocalAudioStore(cache_dir, retention_days=cache_retention_hours / 24)
+        self._storage = storage
+        self._bucket = None
+
+    @property
+    def bucket(self):
+        # Created lazily so forked workers don't share the client's connections
+        if self._bucket is None:
+            self._bucket = self._storage.Client().bucket(self.bucket_name)
+        return self._bucket
+
+    def _blob(self, key: str):
+        return self.bucket.blob(self.prefix + self._relative_path(key).replace(os.sep, "/"))
+
+    def store(self, src_path, key):
+        path = self.cache.store(src_path, key)
+        blob = self._blob(key)
+        if not blob.exists():
+            blob.upload_from_filename(path, content_type="audio/flac")
+        return path
+
+    def local_path(self, key):
+        path = self.cache.local_path(key)
+        if path:
+            return path
+
+        blob = self._blob(key)
+        if not blob.exists():
+            return None
+        path = self.cache._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        blob.download_to_filename(tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def delete(self, key):
+        self.cache.delete(key)
+        blob = self._blob(key)
+        if blob.exists():
+            blob.delete()
+
+    def purge_expired(self):
+        cutoff = time.time() - self.retention_days * 86400
+        removed = 0
+        for blob in self.bucket.list_blobs(prefix=self.prefix):
+            if blob.time_created and blob.time_created.timestamp() < cutoff:
+                blob.delete()
+                removed += 1
+        self.cache.purge_expired()
+        return removed
+
+
+def _purge_directory(root: str, max_age_seconds: float) -> int:
+    if not os.path.isdir(root):
+        return 0
+
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+# Global store instance
+_audio_store: Optional[AudioStore] = None
+
+
+def get_audio_store() -> AudioStore:
+    """Get or create the audio store selected by AUDIO_STORE_BACKEND (local | gcs)."""
+    global _audio_store
+    if _audio_store is None:
+        retention_days = float(os.getenv("AUDIO_RETENTION_DAYS", "30"))
+        backend = os.getenv("AUDIO_STORE_BACKEND", "local").lower()
+        if backend == "gcs":
+            _audio_store = GCSAudioStore(
+                bucket=os.environ["AUDIO_STORE_BUCKET"],
+                prefix=os.getenv("AUDIO_STORE_PREFIX", "audio/"),
+                cache_dir=os.getenv("AUDIO_STORE_DIR", "audio_cache"),
+                retention_days=retention_days
+            )
+        elif backend == "local":
+            _audio_store = LocalAudioStore(
+                root=os.getenv("AUDIO_STORE_DIR", "audio_store"),
+                retention_days=retention_days
+            )
+        else:
+            raise ValueError(f"Unknown AUDIO_STORE_BACKEND: {backend}")
+    return _audio_store
@@ -0,0 +1,294 @@
+# ==============================================================================
+# AUDIT LOG WRITER
+# Buffered, spool-backed batch inserts for append-only events (payments table)
+# ==============================================================================
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .repositories import PaymentRepository, get_storage
+
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+
+
+class AuditLogWriter:
+    """
+    Append-only event writer with at-least-once delivery.
+
+    `write()` never touches the network: the event is appended to a local
+    JSONL spool file and to an in-memory buffer, and a background task inserts
+    buffered events in bulk. Events leave the spool only after their insert
+    succeeded, so a crash or a Supabase outage delays them instead of losing
+    them (a crash right after an insert may deliver a batch twice).
+
+    Each process spools to its own file; on start, spool files left behind by
+    processes that no longer exist are adopted and replayed.
+
+    Only transient errors (network, 5xx, locked database) are retried. Rows
+    the database rejects (4xx, constraint violations) are moved to
+    <spool_dir>/dead-letter.jsonl with the error, so they don't hold back
+    later events; so are new events once max_pending are buffered. Nothing
+    replays that file automatically: inspect it and re-insert by hand.
+    """
+
+    def __init__(
+        self,
+        repository: PaymentRepository,
+        spool_dir: str = "audit_spool",
+        batch_size: int = 200,
+        flush_interval_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        max_pending: int = 10000
+    ):
+        """
+        Args:
+            repository: Destination of the bulk inserts
+            spool_dir: Directory for the per-process spool files
+            batch_size: Max rows per insert; a full buffer triggers an early flush
+            flush_interval_seconds: Max time an event waits in the buffer
+            max_backoff_seconds: Cap of the retry delay while inserts fail
+            max_pending: Buffered events (and spool lines) kept during an outage;
+                beyond this, new events go to the dead-letter file
+        """
+        self.repository = repository
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.max_pending = max_pending
+
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._failures = 0
+        self._spool_path: Optional[str] = None
+
+        self.written = 0
+        self.flushed = 0
+        self.dead_lettered = 0
+
+    @property
+    def spool_path(self) -> str:
+        # Resolved lazily so forked workers get their own file
+        if self._spool_path is None or not self._spool_path.endswith(f"-{os.getpid()}.jsonl"):
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._spool_path = os.path.join(self.spool_dir, f"audit-{os.getpid()}.jsonl")
+        return self._spool_path
+
+    def write(self, event: Dict[str, Any]):
+        """Record an event; returns immediately (the insert happens in the background)."""
+        line = json.dumps(event, default=str)
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._dead_letter([event], f"buffer full ({self.max_pending} events pending)")
+                return
+            with open(self.spool_path, "a", encoding="utf-8") as spool:
+                spool.write(line + "\n")
+            self._pending.append(event)
+            self.written += 1
+            pending = len(self._pending)
+
+        self._ensure_started()
+        if pending >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    # --- background flushing ------------------------------------------------
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # No loop (e.g. a script); events stay spooled until start()
+            self._flush_lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def start(self):
+        """Replay spooled events (this process's and orphaned ones) and start flushing."""
+        self._adopt_orphaned_spools()
+        self._ensure_started()
+
+    async def stop(self):
+        """Flush what can be flushed and stop the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            await self.flush()
+
+    async def _run(self):
+        while True:
+            delay = self.flush_interval_seconds
+            if self._failures:
+                delay = min(self.max_backoff_seconds, self.flush_interval_seconds * 2 ** self._failures)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending:
+                await self.flush()
+
+    async def flush(self) -> int:
+        """Insert buffered events in batches; returns how many were delivered."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        delivered = 0
+        async with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._pending[:self.batch_size]
+                if not batch:
+                    break
+
+                rejected: List[Any] = []
+                try:
+                    try:
+                        await self.repository.insert_many(batch)
+                    except Exception as e:
+                        if not is_permanent_error(e):
+                            raise
+                        rejected = await self._insert_one_by_one(batch)
+                except Exception as e:
+                    self._failures += 1
+                    print(f"⚠️ Audit log flush failed ({len(self._pending)} pending, attempt {self._failures}): {e}")
+                    break
+
+                self._failures = 0
+                with self._lock:
+                    # Only write() appends, so the batch is still the head of the buffer
+                    del self._pending[:len(batch)]
+                    self._rewrite_spool()
+                    for event, error in rejected:
+                        self._dead_letter([event], error)
+                delivered += len(batch) - len(rejected)
+                self.flushed += len(batch) - len(rejected)
+
+        return delivered
+
+    async def _insert_one_by_one(self, batch: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Insert a rejected batch row by row to find the bad rows; returns them
+        with their errors. A transient error propagates (rows already inserted
+        are delivered again on retry, as after a crash).
+        """
+        rejected = []
+        for event in batch:
+            try:
+                await self.repository.insert_many([event])
+            except Exception as e:
+                if not is_permanent_error(e):
+                    raise
+                rejected.append((event, str(e)))
+        return rejected
+
+    # --- spool files --------------------------------------------------------
+
+    def _dead_letter(self, events: List[Dict[str, Any]], error: str):
+        """Append events to the dead-letter file (caller holds _lock)."""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with open(os.path.join(self.spool_dir, DEAD_LETTER_FILE), "a", encoding="utf-8") as dead_letters:
+            for event in events:
+                dead_letters.write(json.dumps({"event": event, "error": error, "at": int(time.time())}, default=str) + "\n")
+        self.dead_lettered += len(events)
+        print(f"☠️ {len(events)} audit event(s) dead-lettered: {error}")
+
+    def _rewrite_spool(self):
+        """Replace the spool with the still-pending events (caller holds _lock)."""
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as spool:
+            for event in self._pending:
+                spool.write(json.dumps(event, default=str) + "\n")
+        os.replace(tmp_path, self.spool_path)
+
+    def _adopt_orphaned_spools(self):
+        if not os.path.isdir(self.spool_dir):
+            return
+
+        own_path = self.spool_path
+        adopted: List[Dict[str, Any]] = []
+        for name in sorted(os.listdir(self.spool_dir)):
+            path = os.path.join(self.spool_dir, name)
+            if not (name.startswith("audit-") and name.endswith(".jsonl")):
+                continue
+            if path == own_path:
+                if self._pending:
+                    continue  # Already buffered by this process
+            elif _pid_alive(name[len("audit-"):-len(".jsonl")]):
+                continue
+
+            claimed = f"{path}.claimed-{os.getpid()}"
+            try:
+                os.rename(path, claimed)  # Atomic: only one worker adopts a file
+            except OSError:
+                continue
+            with open(claimed, encoding="utf-8") as spool:
+                for line in spool:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        adopted.append(json.loads(line))
+                    except ValueError:
+                        print(f"⚠️ Skipping corrupt audit spool line in {name}")
+            os.remove(claimed)
+
+        if adopted:
+            with self._lock:
+                self._pending = adopted + self._pending
+                self._rewrite_spool()
+            print(f"📼 Replaying {len(adopted)} spooled audit events")
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """True when retrying the same rows can't succeed (4xx, constraint violation, bad value)."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return 400 <= status_code < 500 and status_code not in (408, 429)
+    return isinstance(error, (sqlite3.IntegrityError, sqlite3.ProgrammingError, TypeError, ValueError))
+
+
+def _pid_alive(pid: str) -> bool:
+    if not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Global writer instance
+_audit_log: Optional[AuditLogWriter] = None
+
+
+def get_audit_log() -> AuditLogWriter:
+    """Get or create the global audit log writer (payments events)."""
+    global _audit_log
+    if _audit_log is None:
+        _audit_log = AuditLogWriter(
+            repository=get_storage().payments,
+            spool_dir=os.getenv("AUDIT_SPOOL_DIR", "audit_spool"),
+            batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "200")),
+            flush_interval_seconds=float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0")),
+            max_pending=int(os.getenv("AUDIT_MAX_PENDING", "10000"))
+        )
+    return _audit_log
@@ -0,0 +1,261 @@
+# ==============================================================================
+# DATABASE ACCESS LAYER
+# Async PostgREST (Supabase) client over a shared keep-alive connection pool
+# ==============================================================================
+
+import os
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+
+from .metrics import timed
+
+
+class DatabaseError(Exception):
+    """Raised when Supabase/PostgREST answers with an error status."""
+
+    def __init__(self, message: str, status_code: int, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details or {}
+
+
+class QueryResult:
+    """Result of a query; mirrors supabase-py's response (data + optional count)."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class Query:
+    """
+    Fluent query builder, same shape as supabase-py's table API:
+
+        result = await db.table("sessions").select("id, name").eq("user_email", email).order("created_at", desc=True).execute()
+
+    Nothing is sent until `execute()` is awaited.
+    """
+
+    def __init__(self, database: "Database", table: str):
+        self._database = database
+        self._table = table
+        self._method = "GET"
+        self._params: List[tuple] = []
+        self._body: Any = None
+        self._count: Optional[str] = None
+
+    # --- operations ---------------------------------------------------------
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "Query":
+        self._method = "GET"
+        self._params.append(("select", "".join(columns.split())))
+        self._count = count
+        return self
+
+    def insert(self, rows: Union[Dict[str, Any], List[Dict[str, Any]]]) -> "Query":
+        self._method = "POST"
+        self._body = rows
+        return self
+
+    def update(self, values: Dict[str, Any]) -> "Query":
+        self._method = "PATCH"
+        self._body = values
+        return self
+
+    def delete(self) -> "Query":
+        self._method = "DELETE"
+        return self
+
+    # --- filters and modifiers ----------------------------------------------
+
+    def _filter(self, column: str, operator: str, value: Any) -> "Query":
+        self._params.append((column, f"{operator}.{_format_value(value)}"))
+        return self
+
+    def eq(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "Query":
+        return self._filter(column, "lte", value)
+
+    def in_(self, column: str, values: List[Any]) -> "Query":
+        quoted = ",".join(f'"{_format_value(value)}"' for value in values)
+        self._params.append((column, f"in.({quoted})"))
+        return self
+
+    def or_(self, filters: str) -> "Query":
+        """Raw PostgREST disjunction, e.g. "timestamp.lt.10,and(timestamp.eq.10,id.lt.<id>)"."""
+        self._params.append(("or", f"({filters})"))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "Query":
+        """Chained calls add tie-breakers (PostgREST takes a single order=a.desc,b.asc)."""
+        term = f"{column}.{'desc' if desc else 'asc'}"
+        for i, (key, value) in enumerate(self._params):
+            if key == "order":
+                self._params[i] = ("order", f"{value},{term}")
+                return self
+        self._params.append(("order", term))
+        return self
+
+    def limit(self, count: int) -> "Query":
+        self._params.append(("limit", str(count)))
+        return self
+
+    def offset(self, count: int) -> "Query":
+        self._params.append(("offset", str(count)))
+        return self
+
+    async def execute(self) -> QueryResult:
+        prefer = []
+        if self._method in ("POST", "PATCH", "DELETE"):
+            prefer.append("return=representation")
+        if self._count:
+            prefer.append(f"count={self._count}")
+
+        response = await self._database.request(
+            self._method,
+            f"/rest/v1/{self._table}",
+            params=self._params,
+            json=self._body,
+            headers={"Prefer": ",".join(prefer)} if prefer else None
+        )
+
+        count = None
+        content_range = response.headers.get("content-range")
+        if self._count and content_range and "/" in content_range:
+            total = content_range.split("/")[-1]
+            count = int(total) if total.isdigit() else None
+
+        return QueryResult(response.json() if response.content else [], count)
+
+
+class RpcCall:
+    """A pending call to a Postgres function exposed by PostgREST."""
+
+    def __init__(self, database: "Database", function: str, params: Dict[str, Any]):
+        self._database = database
+        self._function = function
+        self._params = params
+
+    async def execute(self) -> QueryResult:
+        response = await self._database.request("POST", f"/rest/v1/rpc/{self._function}", json=self._params)
+        return QueryResult(response.json() if response.content else None)
+
+
+class Database:
+    """
+    Async Supabase client sharing one keep-alive HTTP connection pool.
+
+    Handlers await queries instead of blocking the event loop, so concurrent
+    requests overlap their database latency. The underlying httpx client is
+    created on first use (after any worker fork) and closed on shutdown.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        timeout_seconds: float = 10.0
+    ):
+        """
+        Args:
+            url: Supabase project URL
+            key: service_role (or anon) key
+            max_connections: Upper bound of concurrent connections to Supabase
+            max_keepalive_connections: Idle connections kept open for reuse
+            timeout_seconds: Connect/read/write timeout per request
+        """
+        self.url = url.rstrip("/")
+        self.key = key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=30.0
+        )
+        self.timeout = httpx.Timeout(timeout_seconds)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.url,
+                headers={
+                    "apikey": self.key,
+                    "Authorization": f"Bearer {self.key}",
+                    "Accept": "application/json",
+                },
+                limits=self.limits,
+                timeout=self.timeout
+            )
+        return self._client
+
+    def table(self, name: str) -> Query:
+        return Query(self, name)
+
+    def rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> RpcCall:
+        return RpcCall(self, function, params or {})
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request through the pool; raises DatabaseError on 4xx/5xx."""
+        headers = kwargs.pop("headers", None) or {}
+        with timed("db"):
+            response = await self.client.request(method, path, headers=headers, **kwargs)
+
+        if response.status_code >= 400:
+            try:
+                details = response.json()
+            except ValueError:
+                details = {"message": response.text}
+            message = details.get("message") if isinstance(details, dict) else str(details)
+            raise DatabaseError(f"{method} {path} failed ({response.status_code}): {message}", response.status_code, details)
+
+        return response
+
+    async def aclose(self):
+        """Close pooled connections (the pool is recreated on next use)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+# Global database instance
+_database: Optional[Database] = None
+
+
+def get_database() -> Database:
+    """Get or create the global database client from environment settings."""
+    global _database
+    if _database is None:
+        _database = Database(
+            url=os.getenv("SUPABASE_URL", ""),
+            key=os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_ANON_KEY", ""),
+            max_connections=int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "10")),
+            timeout_seconds=float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "10"))
+        )
+    return _database
@@ -4,11 +4,24 @@
 # ==============================================================================
 
 import asyncio
+import bisect
+import itertools
+import math
+import multiprocessing
+import os
+import random
 import uuid
-from typing import Dict, Any, Optional, Callable
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Iterable, Tuple
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
+import time
+
+from .admission import estimate_working_set, get_admission_controller
+from .audio_probe import probe_audio_file
+from .metrics import get_metrics_registry
+from .profiler import get_profiler
 
 class JobStatus(str, Enum):
     """Job status enumeration."""
@@ -19,22 +32,108 @@ class JobStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+class JobCancelledError(Exception):
+    """Raised inside a running analysis once its job has been cancelled."""
+
+
+class TransientJobError(Exception):
+    """A failure that is worth retrying (crashed worker process, lost connection...)."""
+
+
+class JobStalledError(TimeoutError):
+    """Raised when the watchdog reclaims a job whose heartbeat went stale."""
+
+
+# Failures that are retried with backoff before a job is dead-lettered.
+# Stage timeouts from the analyzer subclass TimeoutError.
+TRANSIENT_ERRORS = (TimeoutError, ConnectionError, TransientJobError)
+
+
 class Job:
     """Represents an analysis job."""
     
-    def __init__(self, job_id: str, user_id: str, audio_path: str, transcript: str, **kwargs):
+    def __init__(
+        self,
+        job_id: str,
+        user_id: str,
+        audio_path: str,
+        transcript: str,
+        idempotency_keys: Iterable[str] = (),
+        **kwargs
+    ):
         self.id = job_id
         self.user_id = user_id
         self.audio_path = audio_path
         self.transcript = transcript
+        self.seq = 0  # Position in the queue's submission order (used as pagination cursor)
+        self.version = 0  # Bumped on every status/progress change (used for ETags)
         self.status = JobStatus.QUEUED
         self.created_at = datetime.now()
+        self.enqueued_at = self.created_at
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
         self.result: Optional[Dict[str, Any]] = None
         self.error: Optional[str] = None
+        self.heartbeat_at = datetime.now()
         self.progress: float = 0.0  # 0-100
+        self.attempts = 0
+        self.next_retry_at: Optional[datetime] = None
         self.metadata = kwargs
+        self.idempotency_keys = tuple(idempotency_keys)
+        self.cancel_requested = False
+        self._cancel_event = asyncio.Event()
+    
+    @property
+    def progress(self) -> float:
+        return self._progress
+    
+    @progress.setter
+    def progress(self, value: float):
+        # Every progress update doubles as a heartbeat for the watchdog
+        self._progress = value
+        self.heartbeat_at = datetime.now()
+        self.version += 1
+    
+    @property
+    def status(self) -> JobStatus:
+        return self._status
+    
+    @status.setter
+    def status(self, value: JobStatus):
+        self._status = value
+        self.version += 1
+    
+    @property
+    def etag(self) -> str:
+        """Weak ETag that changes whenever status or progress changes."""
+        return f'W/"{self.id}:{self.version}"'
+    
+    def request_cancel(self):
+        """Ask the running analysis to stop at its next checkpoint."""
+        self.cancel_requested = True
+        self._cancel_event.set()
+    
+    def raise_if_cancelled(self):
+        """Cancellation checkpoint, called between analysis stages."""
+        if self.cancel_requested:
+            raise JobCancelledError(f"Job {self.id} was cancelled")
+    
+    def to_status_dict(self) -> Dict[str, Any]:
+        """Compact status view for polling - everything except the result payload."""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "status": self.status.value,
+            "progress": self.progress,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "error": self.error,
+            "attempts": self.attempts,
+            "next_retry_at": self.next_retry_at.isoformat() if self.next_retry_at else None,
+            "recording_id": self.metadata.get("recording_id"),
+            "has_result": self.result is not None
+        }
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert job to dictionary."""
@@ -48,6 +147,8 @@ class Job:
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "result": self.result,
             "error": self.error,
+            "attempts": self.attempts,
+            "next_retry_at": self.next_retry_at.isoformat() if self.next_retry_at else None,
             "metadata": self.metadata
         }
 
@@ -60,42 +161,99 @@ class JobQueue:
     while processing happens in background.
     """
     
-    def __init__(self, max_concurrent_workers: int = 2):
+    def __init__(
+        self,
+        max_concurrent_workers: int = 2,
+        use_subprocess: bool = False,
+        idempotency_window_seconds: int = 600,
+        max_retries: int = 2,
+        retry_backoff_seconds: float = 5.0,
+        job_timeout_seconds: float = 900.0,
+        heartbeat_timeout_seconds: float = 600.0,
+        max_dead_letters: int = 200
+    ):
         """
         Initialize job queue.
         
         Args:
             max_concurrent_workers: Number of concurrent jobs to process
+            use_subprocess: Run each analysis in its own process so that
+                cancelling a processing job terminates it immediately
+            idempotency_window_seconds: How long a completed job keeps absorbing
+                resubmissions with the same idempotency key
+            max_retries: Retries for transient failures before dead-lettering
+            retry_backoff_seconds: Base delay for exponential backoff between retries
+            job_timeout_seconds: Hard deadline for a single attempt
+            heartbeat_timeout_seconds: Processing jobs without a heartbeat for this
+                long are reclaimed by the watchdog
+            max_dead_letters: How many dead-lettered jobs are kept for inspection
         """
         self.jobs: Dict[str, Job] = {}
+        self.idempotency_window_seconds = idempotency_window_seconds
+        self._idempotency_index: Dict[str, str] = {}  # idempotency key -> job_id
+        self._user_index: Dict[str, List[Tuple[int, str]]] = {}  # user_id -> [(seq, job_id)] in submission order
+        self._seq = itertools.count(1)
         self.queue: asyncio.Queue = asyncio.Queue()
+        self._backoff: set = set()  # job_ids waiting out a retry delay before rejoining the queue
         self.max_workers = max_concurrent_workers
         self.active_workers = 0
+        self.use_subprocess = use_subprocess
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.job_timeout_seconds = job_timeout_seconds
+        self.heartbeat_timeout_seconds = heartbeat_timeout_seconds
+        self.max_dead_letters = max_dead_letters
+        self.dead_letters: "OrderedDict[str, Job]" = OrderedDict()
+        self._running_tasks: Dict[str, asyncio.Task] = {}
+        self._reclaimed: set = set()
         self._workers_started = False
+        
+        # Metrics: histograms live in the shared registry, utilization is tracked here
+        self._metrics = get_metrics_registry()
+        self._queue_wait_histogram = self._metrics.histogram("pro_job_queue_wait_seconds")
+        self._processing_histogram = self._metrics.histogram("pro_job_processing_seconds")
+        self._busy_seconds = 0.0
+        self._metrics_started_at = time.monotonic()
+        self._avg_processing_seconds: Optional[float] = None  # EWMA of successful attempts
     
     async def add_job(
         self,
         user_id: str,
         audio_path: str,
         transcript: str,
+        idempotency_keys: Iterable[str] = (),
         **metadata
     ) -> str:
         """
         Add a new job to the queue.
         
+        If a live or recently completed job was submitted under any of the
+        given idempotency keys, no new job is created and its ID is returned.
+        
         Returns:
             Job ID (can be used to poll for results)
         """
+        idempotency_keys = tuple(idempotency_keys)
+        existing = self.find_job_by_idempotency_key(*idempotency_keys)
+        if existing:
+            return existing.id
+        
         job_id = str(uuid.uuid4())
         job = Job(
             job_id=job_id,
             user_id=user_id,
             audio_path=audio_path,
             transcript=transcript,
+            idempotency_keys=idempotency_keys,
             **metadata
         )
         
+        job.seq = next(self._seq)
         self.jobs[job_id] = job
+        self._user_index.setdefault(user_id, []).append((job.seq, job_id))
+        for key in idempotency_keys:
+            self._idempotency_index[key] = job_id
         await self.queue.put(job_id)
         
         # Start workers if not already running
@@ -113,6 +271,8 @@ class JobQueue:
         
         for i in range(self.max_workers):
             asyncio.create_task(self._worker())
+        
+        asyncio.create_task(self._watchdog())
     
     async def _worker(self):
         """Background worker that processes jobs from queue."""
@@ -125,82 +285,411 @@ class JobQueue:
                 print(f"❌ Worker error: {str(e)}")
                 await asyncio.sleep(1)  # Avoid tight loop on error
     
+    async def _watchdog(self):
+        """Reclaim processing jobs whose heartbeat went stale (hung decode, stuck call...)."""
+        interval = max(1.0, min(30.0, self.heartbeat_timeout_seconds / 4))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                cutoff = datetime.now() - timedelta(seconds=self.heartbeat_timeout_seconds)
+                for job_id, task in list(self._running_tasks.items()):
+                    job = self.jobs.get(job_id)
+                    if job and job.heartbeat_at < cutoff and not task.done():
+                        print(f"🐕 Watchdog reclaiming job {job_id} (no heartbeat since {job.heartbeat_at.isoformat()})")
+                        self._reclaimed.add(job_id)
+                        task.cancel()
+            except Exception as e:
+                print(f"❌ Watchdog error: {str(e)}")
+    
+    async def _run_analysis(self, job: Job) -> Dict[str, Any]:
+        """Run one attempt of the analysis for a job, within the memory admission budget."""
+        # Jobs are already queued, so they wait for memory as long as needed
+        # (the attempt deadline still applies); only oversized audio fails
+        cost = estimate_working_set(await asyncio.to_thread(probe_audio_file, job.audio_path))
+        async with get_admission_controller().reserve(cost, max_wait_seconds=math.inf):
+            return await self._run_analysis_admitted(job)
+    
+    async def _run_analysis_admitted(self, job: Job) -> Dict[str, Any]:
+        if self.use_subprocess:
+            return await self._run_in_subprocess(job)
+        
+        # Import here to avoid circular imports
+        from .pro_analyzer import analyze_audio_for_pro_user
+        
+        # Run analysis - pass job object for progress tracking and cancellation checkpoints
+        return await analyze_audio_for_pro_user(
+            audio_path=job.audio_path,
+            transcript=job.transcript,
+            context=job.metadata.get("context", "general"),
+            language=job.metadata.get("language", "en"),
+            job=job  # Pass job reference for progress updates
+        )
+    
     async def _process_job(self, job_id: str):
-        """Process a single job."""
+        """Process a single job, under the sampling profiler if requested or sampled."""
+        job = self.jobs.get(job_id)
+        profiler = get_profiler()
+        if job is None or not profiler.should_profile(job.metadata.get("profile", False)):
+            await self._process_job_attempt(job_id)
+            return
+        
+        with profiler.session(f"job-{job_id}"):
+            await self._process_job_attempt(job_id)
+    
+    async def _process_job_attempt(self, job_id: str):
+        """Run one attempt of a job and record its outcome."""
         if job_id not in self.jobs:
             print(f"⚠️  Job {job_id} not found")
             return
         
         job = self.jobs[job_id]
+        if job.status == JobStatus.CANCELLED or job.cancel_requested:
+            # Cancelled while waiting in the queue - free the worker right away
+            print(f"⏭️  Job {job_id} was cancelled before it started")
+            return
+        
         job.status = JobStatus.PROCESSING
         job.started_at = datetime.now()
+        job.next_retry_at = None
+        job.attempts += 1
         job.progress = 10
+        self.active_workers += 1
+        self._queue_wait_histogram.observe((job.started_at - job.enqueued_at).total_seconds())
+        attempt_start = time.monotonic()
+        
+        task = asyncio.create_task(self._run_analysis(job))
+        self._running_tasks[job_id] = task
         
         try:
-            # Import here to avoid circular imports
-            from .pro_analyzer import analyze_audio_for_pro_user
-            
             job.progress = 15
             
-            # Run analysis - pass job object for progress tracking
-            result = await analyze_audio_for_pro_user(
-                audio_path=job.audio_path,
-                transcript=job.transcript,
-                context=job.metadata.get("context", "general"),
-                language=job.metadata.get("language", "en"),
-                job=job  # Pass job reference for progress updates
-            )
+            try:
+                result = await asyncio.wait_for(task, timeout=self.job_timeout_seconds)
+            except asyncio.CancelledError:
+                if job_id in self._reclaimed:
+                    raise JobStalledError(f"No heartbeat for {self.heartbeat_timeout_seconds:.0f}s")
+                if job.cancel_requested and task.cancelled() and not asyncio.current_task().cancelling():
+                    raise JobCancelledError(f"Job {job_id} was cancelled")  # cancel_job() released us
+                raise  # The worker itself is being shut down
+            except asyncio.TimeoutError:
+                if not task.cancelled():
+                    raise  # A stage deadline inside the analysis, not ours
+                raise TimeoutError(f"Attempt exceeded {self.job_timeout_seconds:.0f}s")
+            
+            # A cancel that arrived during the last stage still wins over the result
+            job.raise_if_cancelled()
             
             job.progress = 95
             job.result = result
+            job.error = None
             job.status = JobStatus.COMPLETED
             job.completed_at = datetime.now()
             job.progress = 100
+            self._record_success(result, time.monotonic() - attempt_start)
             
             print(f"✅ Job {job_id} completed in {(job.completed_at - job.started_at).total_seconds():.1f}s")
         
+        except JobCancelledError:
+            job.status = JobStatus.CANCELLED
+            job.completed_at = job.completed_at or datetime.now()
+            print(f"🛑 Job {job_id} cancelled after {(datetime.now() - job.started_at).total_seconds():.1f}s")
+        
         except Exception as e:
-            job.status = JobStatus.FAILED
-            job.error = str(e)
-            job.completed_at = datetime.now()
-            job.progress = 0
-            print(f"❌ Job {job_id} failed: {str(e)}")
+            if job.cancel_requested:
+                job.status = JobStatus.CANCELLED
+            else:
+                self._handle_failure(job, e)
+        
+        finally:
+            self._running_tasks.pop(job_id, None)
+            self._reclaimed.discard(job_id)
+            self.active_workers -= 1
+            self._busy_seconds += time.monotonic() - attempt_start
+    
+    def _record_success(self, result: Dict[str, Any], duration_seconds: float):
+        """Feed processing-time histograms and the wait estimator."""
+        self._processing_histogram.observe(duration_seconds)
+        for stage, ms in (result or {}).get("stage_timings_ms", {}).items():
+            self._metrics.histogram("pro_job_stage_seconds", {"stage": stage}).observe(ms / 1000)
+        
+        if self._avg_processing_seconds is None:
+            self._avg_processing_seconds = duration_seconds
+        else:
+            self._avg_processing_seconds = 0.8 * self._avg_processing_seconds + 0.2 * duration_seconds
+    
+    def estimate_wait_seconds(self) -> float:
+        """
+        Estimate how long a job submitted now would wait before a worker picks it up.
+        
+        Uses the queue depth (including jobs in retry backoff, which rejoin it),
+        busy workers and the moving average of processing time (60s is assumed
+        until the first job completes).
+        """
+        average = self._avg_processing_seconds or 60.0
+        jobs_ahead = self.queue.qsize() + self._retrying_count() + self.active_workers - self.max_workers + 1
+        if jobs_ahead <= 0:
+            return 0.0
+        return jobs_ahead * average / self.max_workers
+    
+    def _retrying_count(self) -> int:
+        """Jobs waiting out a retry delay (cancelled ones are skipped when they rejoin)."""
+        return sum(
+            1 for job_id in self._backoff
+            if job_id in self.jobs and self.jobs[job_id].status == JobStatus.QUEUED
+        )
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, latency histograms and worker utilization."""
+        elapsed = max(time.monotonic() - self._metrics_started_at, 1e-6)
+        busy_seconds = self._busy_seconds + sum(
+            (datetime.now() - self.jobs[job_id].started_at).total_seconds()
+            for job_id in self._running_tasks
+            if job_id in self.jobs and self.jobs[job_id].started_at
+        )
+        
+        self._metrics.gauge("pro_job_queue_depth").set(self.queue.qsize())
+        self._metrics.gauge("pro_job_workers_busy").set(self.active_workers)
+        
+        return {
+            "queue_depth": self.queue.qsize(),
+            "retrying": self._retrying_count(),
+            "active_workers": self.active_workers,
+            "max_workers": self.max_workers,
+            "worker_utilization": round(self.active_workers / self.max_workers, 3),
+            "worker_utilization_since_start": round(min(1.0, busy_seconds / (elapsed * self.max_workers)), 3),
+            "estimated_wait_seconds": round(self.estimate_wait_seconds(), 1),
+            "average_processing_seconds": round(self._avg_processing_seconds, 2) if self._avg_processing_seconds else None,
+            "dead_letters": len(self.dead_letters),
+            "queue_wait_seconds": self._queue_wait_histogram.snapshot(),
+            "processing_seconds": self._processing_histogram.snapshot(),
+            "stage_seconds": {
+                histogram.labels["stage"]: histogram.snapshot()
+                for histogram in self._metrics.histograms()
+                if histogram.name == "pro_job_stage_seconds"
+            }
+        }
+    
+    def _requeue(self, job_id: str):
+        """Put a job back on the queue once its retry delay is over."""
+        self._backoff.discard(job_id)
+        self.queue.put_nowait(job_id)
+    
+    def _handle_failure(self, job: Job, error: Exception):
+        """Schedule a retry for transient failures, dead-letter everything else."""
+        job.error = f"{type(error).__name__}: {str(error)}"
+        job.progress = 0
+        
+        if isinstance(error, TRANSIENT_ERRORS) and job.attempts <= self.max_retries:
+            # Exponential backoff with jitter; the worker is released meanwhile
+            delay = self.retry_backoff_seconds * (2 ** (job.attempts - 1))
+            delay *= random.uniform(0.8, 1.2)
+            job.status = JobStatus.QUEUED
+            job.next_retry_at = datetime.now() + timedelta(seconds=delay)
+            job.enqueued_at = job.next_retry_at
+            self._backoff.add(job.id)
+            asyncio.get_running_loop().call_later(delay, self._requeue, job.id)
+            print(f"🔁 Job {job.id} attempt {job.attempts} failed ({job.error}), retrying in {delay:.1f}s")
+            return
+        
+        job.status = JobStatus.FAILED
+        job.completed_at = datetime.now()
+        self.dead_letters[job.id] = job
+        while len(self.dead_letters) > self.max_dead_letters:
+            self.dead_letters.popitem(last=False)
+        print(f"❌ Job {job.id} failed after {job.attempts} attempt(s): {job.error}")
+    
+    async def _run_in_subprocess(self, job: Job) -> Dict[str, Any]:
+        """
+        Run the analysis for a job in a separate process.
+        
+        Progress updates are forwarded over a pipe. If the job is cancelled
+        the process is terminated, so the worker is released immediately
+        instead of waiting for the current stage to finish.
+        """
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        process = ctx.Process(
+            target=_run_analysis_subprocess,
+            args=(child_conn, {
+                "audio_path": job.audio_path,
+                "transcript": job.transcript,
+                "context": job.metadata.get("context", "general"),
+                "language": job.metadata.get("language", "en"),
+            }),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._processes[job.id] = process
+        
+        try:
+            while True:
+                job.raise_if_cancelled()
+                
+                if parent_conn.poll():
+                    try:
+                        kind, payload = parent_conn.recv()
+                    except EOFError:
+                        raise TransientJobError(f"Analysis process exited unexpectedly (code {process.exitcode})")
+                    
+                    if kind == "progress":
+                        job.progress = payload
+                    elif kind == "result":
+                        return payload
+                    elif payload.get("transient"):
+                        raise TransientJobError(payload["message"])
+                    else:
+                        raise RuntimeError(payload["message"])
+                    continue
+                
+                if not process.is_alive() and not parent_conn.poll():
+                    # Killed from outside (e.g. OOM) - worth another attempt
+                    raise TransientJobError(f"Analysis process exited unexpectedly (code {process.exitcode})")
+                
+                # Wake up early when the job is cancelled
+                try:
+                    await asyncio.wait_for(job._cancel_event.wait(), timeout=0.2)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._processes.pop(job.id, None)
+            if process.is_alive():
+                process.terminate()
+            await asyncio.to_thread(process.join, 5)
+            parent_conn.close()
+    
+    def find_job_by_idempotency_key(self, *keys: str) -> Optional[Job]:
+        """
+        Find a job that a resubmission with one of these keys should attach to.
+        
+        Queued and processing jobs always match. Completed jobs match for
+        `idempotency_window_seconds` after completion. Failed and cancelled
+        jobs never match, so the client can retry them.
+        """
+        for key in keys:
+            job = self.jobs.get(self._idempotency_index.get(key, ""))
+            if job is None:
+                self._idempotency_index.pop(key, None)
+                continue
+            
+            if job.status in (JobStatus.QUEUED, JobStatus.PROCESSING):
+                return job
+            
+            if job.status == JobStatus.COMPLETED:
+                age = (datetime.now() - job.completed_at).total_seconds()
+                if age <= self.idempotency_window_seconds:
+                    return job
+            
+            # Expired, failed or cancelled - the key is free again
+            self._idempotency_index.pop(key, None)
+        
+        return None
     
     def get_job(self, job_id: str) -> Optional[Job]:
         """Get a job by ID."""
         return self.jobs.get(job_id)
     
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
-        """Get job status as dictionary."""
+        """Get the compact job status (no result payload) as dictionary."""
         job = self.get_job(job_id)
         if not job:
             return None
-        return job.to_dict()
+        return job.to_status_dict()
     
     async def cancel_job(self, job_id: str) -> bool:
-        """Cancel a queued job."""
+        """
+        Cancel a queued or processing job.
+        
+        Queued jobs are skipped when a worker picks them up. For processing
+        jobs the analysis task is cancelled, so the worker is free at once;
+        a stage already running in a thread finishes in the background and
+        its result is dropped (its memory stays reserved until it returns).
+        In subprocess mode the process is terminated.
+        
+        Returns:
+            True if the job was cancelled, False if it was not found or already finished
+        """
         job = self.get_job(job_id)
         if not job:
             return False
         
-        if job.status == JobStatus.QUEUED:
-            job.status = JobStatus.CANCELLED
-            return True
+        if job.status not in (JobStatus.QUEUED, JobStatus.PROCESSING):
+            return False
+        
+        job.request_cancel()
+        job.status = JobStatus.CANCELLED
+        job.completed_at = datetime.now()
+        
+        process = self._processes.get(job_id)
+        if process is not None and process.is_alive():
+            process.terminate()
         
-        # Can't cancel jobs already processing
-        return False
+        task = self._running_tasks.get(job_id)
+        if task is not None and not task.done():
+            task.cancel()
+        
+        return True
     
-    def get_user_jobs(self, user_id: str) -> list:
-        """Get all jobs for a user."""
-        return [
-            job.to_dict()
-            for job in self.jobs.values()
-            if job.user_id == user_id
-        ]
+    def get_dead_letters(self) -> List[Dict[str, Any]]:
+        """List dead-lettered jobs, oldest first."""
+        return [job.to_dict() for job in self.dead_letters.values()]
+    
+    async def replay_dead_letter(self, job_id: str) -> bool:
+        """
+        Put a dead-lettered job back on the queue with a fresh retry budget.
+        
+        The job keeps its ID, so clients polling it see it move back to queued.
+        
+        Returns:
+            True if the job was found in the dead-letter list and requeued
+        """
+        job = self.dead_letters.pop(job_id, None)
+        if job is None:
+            return False
+        
+        job.status = JobStatus.QUEUED
+        job.attempts = 0
+        job.error = None
+        job.result = None
+        job.progress = 0
+        job.started_at = None
+        job.completed_at = None
+        job.enqueued_at = datetime.now()
+        await self.queue.put(job_id)
+        
+        if not self._workers_started:
+            await self._start_workers()
+        
+        return True
+    
+    def get_user_jobs(
+        self,
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Get a page of a user's jobs, newest first, as compact status dicts.
+        
+        Args:
+            user_id: Owner of the jobs
+            limit: Maximum number of jobs to return
+            cursor: `next_cursor` from the previous page; None for the first page
+        
+        Returns:
+            {"jobs": [...], "next_cursor": int or None}
+        """
+        entries = self._user_index.get(user_id, [])
+        end = len(entries) if cursor is None else bisect.bisect_left(entries, (cursor,))
+        page = entries[max(0, end - limit):end][::-1]
+        
+        return {
+            "jobs": [self.jobs[job_id].to_status_dict() for _, job_id in page],
+            "next_cursor": page[-1][0] if page and end - limit > 0 else None
+        }
     
     def cleanup_old_jobs(self, max_age_hours: int = 24):
         """Remove completed jobs older than max_age_hours."""
-        from datetime import timedelta
         cutoff = datetime.now() - timedelta(hours=max_age_hours)
         
         to_remove = [
@@ -208,12 +697,58 @@ class JobQueue:
             if job.completed_at and job.completed_at < cutoff
         ]
         
+        removed = set(to_remove)
+        for user_id in {self.jobs[job_id].user_id for job_id in to_remove}:
+            remaining = [entry for entry in self._user_index[user_id] if entry[1] not in removed]
+            if remaining:
+                self._user_index[user_id] = remaining
+            else:
+                del self._user_index[user_id]
+        
         for job_id in to_remove:
+            self.dead_letters.pop(job_id, None)
+            for key in self.jobs[job_id].idempotency_keys:
+                if self._idempotency_index.get(key) == job_id:
+                    del self._idempotency_index[key]
             del self.jobs[job_id]
         
         return len(to_remove)
 
 
+class _SubprocessJobProxy:
+    """Stand-in for Job inside an analysis subprocess; forwards progress to the parent."""
+    
+    def __init__(self, conn):
+        self._conn = conn
+        self._progress = 0.0
+    
+    @property
+    def progress(self) -> float:
+        return self._progress
+    
+    @progress.setter
+    def progress(self, value: float):
+        self._progress = value
+        self._conn.send(("progress", value))
+    
+    def raise_if_cancelled(self):
+        # The parent terminates the process on cancellation
+        pass
+
+
+def _run_analysis_subprocess(conn, kwargs: Dict[str, Any]):
+    """Entry point of an analysis subprocess (must be importable for spawn)."""
+    from .pro_analyzer import analyze_audio_for_pro_user
+    
+    try:
+        result = asyncio.run(analyze_audio_for_pro_user(job=_SubprocessJobProxy(conn), **kwargs))
+        conn.send(("result", result))
+    except Exception as e:
+        conn.send(("error", {"message": str(e), "transient": isinstance(e, TRANSIENT_ERRORS)}))
+    finally:
+        conn.close()
+
+
 # Global job queue instance
 _job_queue: Optional[JobQueue] = None
 
@@ -222,7 +757,13 @@ def get_job_queue() -> JobQueue:
     """Get or create global job queue."""
     global _job_queue
     if _job_queue is None:
-        _job_queue = JobQueue(max_concurrent_workers=2)
+        _job_queue = JobQueue(
+            max_concurrent_workers=2,
+            use_subprocess=os.getenv("PRO_JOB_ISOLATION", "inline") == "process",
+            max_retries=int(os.getenv("PRO_JOB_MAX_RETRIES", "2")),
+            job_timeout_seconds=float(os.getenv("PRO_JOB_TIMEOUT_SECONDS", "900")),
+            heartbeat_timeout_seconds=float(os.getenv("PRO_JOB_HEARTBEAT_TIMEOUT_SECONDS", "600"))
+        )
     return _job_queue
 
 
@@ -231,7 +772,10 @@ async def add_analysis_job(
     audio_path: str,
     transcript: str,
     context: str = "general",
-    language: str = "en"
+    language: str = "en",
+    recording_id: Optional[str] = None,
+    idempotency_keys: Iterable[str] = (),
+    profile: bool = False
 ) -> str:
     """
     Convenience function to add an analysis job.
@@ -244,6 +788,8 @@ async def add_analysis_job(
             context="presentation"
         )
         
+        # Resubmitting with the same idempotency key returns the same job_id
+        
         # Later, poll for results:
         job_status = get_job_queue().get_job_status(job_id)
     """
@@ -253,5 +799,8 @@ async def add_analysis_job(
         audio_path=audio_path,
         transcript=transcript,
         context=context,
-        language=language
+        language=language,
+        recording_id=recording_id,
+        idempotency_keys=idempotency_keys,
+        profile=profile
     )
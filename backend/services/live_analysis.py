@@ -0,0 +1,276 @@
+# ==============================================================================
+# LIVE ANALYSIS
+# Analysis of a recording while it's being made: raw PCM streamed over the
+# WebSocket is split into segments at the speaker's pauses, and each segment
+# is transcribed and pitch-tracked as soon as it closes, so stopping only
+# leaves the last few seconds to analyse
+# ==============================================================================
+
+import asyncio
+import math
+from typing import Awaitable, Callable, List, Optional
+
+from .admission import estimate_working_set
+from .audio_probe import AudioProbe
+
+# Stream format: PCM16 little-endian mono (what the browser sends after
+# resampling; also the rate analyze_acoustics and the audio store use)
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+# Voice activity: 10 ms frames, silent below -40 dBFS; silences shorter than
+# 300 ms count as speech (same thresholds as estimate_pace_from_audio)
+FRAME_SAMPLES = SAMPLE_RATE // 100
+SILENCE_THRESHOLD_DBFS = -40.0
+MIN_PAUSE_SECONDS = 0.3
+# A pause this long closes the current segment; without one, segments are cut
+# at the quietest frame of their last CUT_SEARCH_SECONDS once they reach
+# MAX_SEGMENT_SECONDS (Whisper does best on whole phrases)
+SEGMENT_PAUSE_SECONDS = 0.5
+MAX_SEGMENT_SECONDS = 20.0
+CUT_SEARCH_SECONDS = 2.0
+# Words/minute assumed for speech when there is no transcript
+ASSUMED_WPM = 150
+# Tail of the transcript passed to the next segment's transcription, for context
+PROMPT_CHARS = 200
+
+
+def live_working_set(max_seconds: float) -> int:
+    """
+    Estimated peak memory of a live session: the PCM buffer and its float32
+    decode when the recording is stored at the end, plus the analysis of one
+    segment (segments are analysed one at a time).
+    """
+    buffers = max_seconds * SAMPLE_RATE * (BYTES_PER_SAMPLE + 4)
+    segment = estimate_working_set(AudioProbe("pcm", MAX_SEGMENT_SECONDS, SAMPLE_RATE, 1))
+    return int(buffers + segment)
+
+
+class LiveAnalysis:
+    """
+    Incremental analysis of one recording.
+
+    add_audio() buffers the stream and runs voice activity detection on it
+    (cheap, on the event loop); closed segments are transcribed and pitch
+    tracked one at a time in a worker thread, and on_partial is called with
+    the running metrics after each one. finish() analyses whatever is left.
+
+    Pitch variation is pooled over segments, each thresholded at its own
+    median magnitude (analyze_acoustics uses the median of the whole file).
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[..., str],
+        pitch_values: Callable,
+        analyze_text: Callable[[str], dict],
+        on_partial: Optional[Callable[[dict], Awaitable[None]]] = None,
+        max_seconds: float = 600.0
+    ):
+        """
+        Args:
+            transcribe: (16 kHz float32 samples, initial_prompt=...) -> text
+            pitch_values: (samples, sample_rate) -> pitch values of the salient frames
+            analyze_text: analyze_conviction (fillers, hedges, word count)
+            on_partial: Awaited with partial_result() after each segment
+            max_seconds: Audio beyond this is ignored (add_audio returns True)
+        """
+        self.transcribe = transcribe
+        self.pitch_values = pitch_values
+        self.analyze_text = analyze_text
+        self.on_partial = on_partial
+        self.max_samples = int(max_seconds * SAMPLE_RATE)
+
+        self._pcm = bytearray()
+        self._frame_dbfs: List[float] = []
+        self._segment_start = 0  # In samples
+        self._segment_has_speech = False
+        self._silent_frames = 0  # Current run of silent frames
+        self._voiced_frames = 0
+        self._heard_speech = False
+        self.pauses: List[float] = []  # Seconds, between stretches of speech
+
+        self.transcript = ""
+        self.analysed_samples = 0
+        self.text_analysis = analyze_text("")
+        self._pitch_count = 0
+        self._pitch_sum = 0.0
+        self._pitch_sum_squares = 0.0
+
+        self._segments: asyncio.Queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._process_segments())
+
+    # --- Stream -------------------------------------------------------------
+
+    @property
+    def received_samples(self) -> int:
+        return len(self._pcm) // BYTES_PER_SAMPLE
+
+    @property
+    def duration(self) -> float:
+        return self.received_samples / SAMPLE_RATE
+
+    @property
+    def voiced_seconds(self) -> float:
+        return self._voiced_frames * FRAME_SAMPLES / SAMPLE_RATE
+
+    def add_audio(self, chunk: bytes) -> bool:
+        """Buffer a chunk of PCM16 and close any segments it completes. True once max_seconds is reached."""
+        import numpy as np
+
+        room = self.max_samples * BYTES_PER_SAMPLE - len(self._pcm)
+        self._pcm += chunk[:max(0, room)]
+
+        frame_bytes = FRAME_SAMPLES * BYTES_PER_SAMPLE
+        while (len(self._frame_dbfs) + 1) * frame_bytes <= len(self._pcm):
+            start = len(self._frame_dbfs) * frame_bytes
+            frame = np.frombuffer(self._pcm, dtype="<i2", count=FRAME_SAMPLES, offset=start)
+            self._add_frame(frame)
+        return len(chunk) >= room
+
+    def _add_frame(self, frame):
+        import numpy as np
+
+        rms = math.sqrt(float(np.mean(np.square(frame, dtype=np.float64)))) / 32768.0
+        dbfs = 20 * math.log10(rms) if rms > 0 else -120.0
+        self._frame_dbfs.append(dbfs)
+        frame_end = len(self._frame_dbfs) * FRAME_SAMPLES
+        min_pause_frames = round(MIN_PAUSE_SECONDS * SAMPLE_RATE / FRAME_SAMPLES)
+
+        if dbfs >= SILENCE_THRESHOLD_DBFS:
+            if self._heard_speech and self._silent_frames:
+                if self._silent_frames >= min_pause_frames:
+                    self.pauses.append(self._silent_frames * FRAME_SAMPLES / SAMPLE_RATE)
+                else:
+                    self._voiced_frames += self._silent_frames  # Gap inside speech
+            self._voiced_frames += 1
+            self._silent_frames = 0
+            self._heard_speech = self._segment_has_speech = True
+        else:
+            self._silent_frames += 1
+
+        pause_frames = round(SEGMENT_PAUSE_SECONDS * SAMPLE_RATE / FRAME_SAMPLES)
+        if self._segment_has_speech and self._silent_frames == pause_frames:
+            self._close_segment(frame_end)
+        elif frame_end - self._segment_start >= MAX_SEGMENT_SECONDS * SAMPLE_RATE:
+            if not self._segment_has_speech:
+                self._segment_start = frame_end  # Nothing to analyse in silence
+                return
+            search_frames = int(CUT_SEARCH_SECONDS * SAMPLE_RATE / FRAME_SAMPLES)
+            recent = self._frame_dbfs[-search_frames:]
+            quietest = len(self._frame_dbfs) - len(recent) + int(np.argmin(recent))
+            self._close_segment((quietest + 1) * FRAME_SAMPLES)
+
+    def _close_segment(self, end: int):
+        if self._segment_has_speech:
+            self._segments.put_nowait((self._segment_start, end))
+        self._segment_start = end
+        # Whatever follows the cut in this segment's search window is already heard
+        self._segment_has_speech = any(
+            dbfs >= SILENCE_THRESHOLD_DBFS for dbfs in self._frame_dbfs[end // FRAME_SAMPLES:]
+        )
+
+    def samples(self, start: int = 0, end: Optional[int] = None):
+        """Float32 copy of the buffered audio between two sample offsets."""
+        import numpy as np
+
+        end = self.received_samples if end is None else end
+        pcm = np.frombuffer(self._pcm, dtype="<i2", count=end - start, offset=start * BYTES_PER_SAMPLE)
+        return pcm.astype(np.float32) / 32768.0
+
+    def pcm(self) -> memoryview:
+        """The whole recording, without copying it (no audio can be added while the view is held)."""
+        return memoryview(self._pcm)[:self.received_samples * BYTES_PER_SAMPLE]
+
+    # --- Segment analysis ---------------------------------------------------
+
+    async def _process_segments(self):
+        import numpy as np
+
+        while True:
+            segment = await self._segments.get()
+            if segment is None:
+                return
+            start, end = segment
+            y = self.samples(start, end)
+            prompt = self.transcript[-PROMPT_CHARS:] or None
+            text, pitches = await asyncio.to_thread(self._analyse_segment, y, prompt)
+            del y
+
+            if pitches.size:
+                pitches = pitches.astype(np.float64)
+                self._pitch_count += pitches.size
+                self._pitch_sum += float(pitches.sum())
+                self._pitch_sum_squares += float(np.square(pitches).sum())
+            if text:
+                self.transcript = f"{self.transcript} {text}".strip()
+                self.text_analysis = self.analyze_text(self.transcript)
+            self.analysed_samples = end
+
+            if self.on_partial is not None:
+                await self.on_partial({**self.partial_result(), "text": text})
+
+    def _analyse_segment(self, y, prompt: Optional[str]):
+        text = self.transcribe(y, initial_prompt=prompt).strip()
+        return text, self.pitch_values(y, SAMPLE_RATE)
+
+    async def finish(self):
+        """Analyse the rest of the stream; afterwards transcript and the metrics cover all of it."""
+        end = len(self._frame_dbfs) * FRAME_SAMPLES
+        if self._segment_has_speech and end > self._segment_start:
+            self._segments.put_nowait((self._segment_start, end))
+        self._segments.put_nowait(None)
+        await self._worker
+        self.analysed_samples = max(self.analysed_samples, self.received_samples)
+
+    async def cancel(self):
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+    # --- Metrics ------------------------------------------------------------
+
+    @property
+    def pitch_variation(self) -> float:
+        if not self._pitch_count:
+            return 0.0
+        mean = self._pitch_sum / self._pitch_count
+        variance = max(0.0, self._pitch_sum_squares / self._pitch_count - mean * mean)
+        return round(math.sqrt(variance), 2)
+
+    def estimate_pace(self) -> int:
+        """Pace from voiced time at ASSUMED_WPM, for when there's no transcript (as estimate_pace_from_audio)."""
+        if self.duration <= 0:
+            return 0
+        total_words = self.voiced_seconds * ASSUMED_WPM / 60.0
+        return max(0, int(round(total_words / (self.duration / 60.0))))
+
+    def partial_result(self) -> dict:
+        """Running metrics over the audio analysed so far."""
+        analysed_minutes = self.analysed_samples / SAMPLE_RATE / 60
+        words = self.text_analysis["total_words"]
+        if words and analysed_minutes > 0:
+            pace = round(words / analysed_minutes)
+        else:
+            pace = self.estimate_pace()
+        heard_minutes = self.duration / 60
+        return {
+            "duration": round(self.duration, 2),
+            "analysed_seconds": round(self.analysed_samples / SAMPLE_RATE, 2),
+            "total_words": words,
+            "pace": pace,
+            "disfluencies_per_minute": (
+                round(self.text_analysis["disfluency_count"] / analysed_minutes, 1) if analysed_minutes > 0 else 0
+            ),
+            "hedge_count": self.text_analysis["hedge_count"],
+            "details": self.text_analysis.get("details", {}),
+            "pitch_variation": self.pitch_variation,
+            "pauses": {
+                "count": len(self.pauses),
+                "per_minute": round(len(self.pauses) / heard_minutes, 1) if heard_minutes > 0 else 0,
+                "total_seconds": round(sum(self.pauses), 2),
+                "longest_seconds": round(max(self.pauses, default=0.0), 2),
+            },
+        }
@@ -0,0 +1,231 @@
+# ==============================================================================
+# METRICS
+# Lightweight in-process histograms and gauges for queue and latency numbers,
+# per-request stage timers (Server-Timing) and Prometheus text export
+# ==============================================================================
+
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Tuple
+
+# Upper bounds in seconds; covers sub-millisecond checks up to 15 min analyses
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 900.0
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus style, cumulative on export).
+
+    Observations are O(log buckets) and memory is constant, so it is safe to
+    record every request or job stage.
+    """
+
+    def __init__(self, name: str, labels: Optional[Dict[str, str]] = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.labels = labels or {}
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one observation (seconds)."""
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside the matching bucket."""
+        if self.count == 0:
+            return 0.0
+
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, bucket_count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if bucket_count and seen + bucket_count >= target:
+                fraction = (target - seen) / bucket_count
+                return lower + (upper - lower) * fraction
+            seen += bucket_count
+            lower = upper
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary suitable for JSON responses."""
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "p50": round(self.quantile(0.50), 4),
+            "p95": round(self.quantile(0.95), 4),
+            "p99": round(self.quantile(0.99), 4),
+        }
+
+
+class Gauge:
+    """A value that goes up and down (queue depth, busy workers...)."""
+
+    def __init__(self, name: str, labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.labels = labels or {}
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+
+class MetricsRegistry:
+    """Holds every histogram and gauge, keyed by name and labels."""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self._gauges: Dict[Tuple[str, Tuple], Gauge] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Optional[Dict[str, str]]) -> Tuple[str, Tuple]:
+        return name, tuple(sorted((labels or {}).items()))
+
+    def histogram(self, name: str, labels: Optional[Dict[str, str]] = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(name, labels, buckets)
+            return self._histograms[key]
+
+    def gauge(self, name: str, labels: Optional[Dict[str, str]] = None) -> Gauge:
+        """Get or create a gauge."""
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self._gauges:
+                self._gauges[key] = Gauge(name, labels)
+            return self._gauges[key]
+
+    def histograms(self) -> List[Histogram]:
+        return list(self._histograms.values())
+
+    def gauges(self) -> List[Gauge]:
+        return list(self._gauges.values())
+
+    def render_prometheus(self) -> str:
+        """
+        Every metric in the Prometheus text exposition format (version 0.0.4).
+        Values are per process: with several workers each one reports its own.
+        """
+        lines: List[str] = []
+
+        histograms: Dict[str, List[Histogram]] = {}
+        for histogram in self.histograms():
+            histograms.setdefault(histogram.name, []).append(histogram)
+        for name in sorted(histograms):
+            lines.append(f"# TYPE {name} histogram")
+            for histogram in histograms[name]:
+                with histogram._lock:
+                    counts, total, count = list(histogram.counts), histogram.sum, histogram.count
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == math.inf else repr(float(bound))
+                    lines.append(f"{name}_bucket{_format_labels(histogram.labels, le=le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(histogram.labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(histogram.labels)} {count}")
+
+        gauges: Dict[str, List[Gauge]] = {}
+        for gauge in self.gauges():
+            gauges.setdefault(gauge.name, []).append(gauge)
+        for name in sorted(gauges):
+            lines.append(f"# TYPE {name} gauge")
+            for gauge in gauges[name]:
+                lines.append(f"{name}{_format_labels(gauge.labels)} {gauge.value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str], **extra: str) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in sorted(items.items())) + "}"
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Global registry instance
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get or create the global metrics registry."""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
+
+
+# ==============================================================================
+# REQUEST STAGE TIMERS
+# ==============================================================================
+
+# Stage durations (seconds) of the request being served; set by the HTTP
+# middleware. Context variables follow the request into asyncio.to_thread.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> Dict[str, float]:
+    """Begin collecting stage timings for the current request; returns the dict to read at the end."""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def timed(stage: str, metric: str = "request_stage_seconds"):
+    """
+    Time a block: observed in the `metric` histogram (label stage=...) and,
+    inside a request, added to its Server-Timing header. Repeated stages
+    (several database calls) are summed.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        get_metrics_registry().histogram(metric, {"stage": stage}).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Format timings as a Server-Timing header value (durations in ms)."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+def process_rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
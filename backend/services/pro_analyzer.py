@@ -3,6 +3,7 @@
 # Comprehensive audio analysis for Pro tier users
 # ==============================================================================
 
+import importlib.util
 import librosa
 import numpy as np
 import os
@@ -10,9 +11,13 @@ import json
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 import asyncio
+import time
 from pydub import AudioSegment
 import re
 
+from .admission import run_in_thread
+from .spectrogram import HOP_LENGTH, N_FFT, iter_frame_blocks
+
 try:
     import parselmouth
     PARSELMOUTH_AVAILABLE = True
@@ -20,14 +25,26 @@ except ImportError:
     PARSELMOUTH_AVAILABLE = False
     print("⚠️  Parselmouth not installed. Prosody analysis disabled.")
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# The openai SDK takes ~0.3 s to import; only check it's installed here and
+# import it when the first analyzer is created
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+if not OPENAI_AVAILABLE:
     print("⚠️  OpenAI not installed. GPT synthesis disabled.")
 
 
+# Per-stage deadlines (seconds). A stage that exceeds its deadline raises
+# StageTimeoutError, which the job queue retries with backoff.
+STAGE_TIMEOUTS = {
+    "audio_metrics": float(os.getenv("PRO_TIMEOUT_AUDIO_METRICS", "180")),
+    "prosody": float(os.getenv("PRO_TIMEOUT_PROSODY", "180")),
+    "gpt": float(os.getenv("PRO_TIMEOUT_GPT", "60")),
+}
+
+
+class StageTimeoutError(TimeoutError):
+    """Raised when an analysis stage exceeds its deadline."""
+
+
 class ProAudioAnalyzer:
     """
     Comprehensive audio analysis for LucidSpeakAI Pro users.
@@ -46,7 +63,36 @@ class ProAudioAnalyzer:
         self.openai_client = None
         
         if OPENAI_AVAILABLE and self.openai_api_key:
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
+            from openai import OpenAI
+            
+            # Bounded per-request timeout; the stage deadline below is the hard stop
+            self.openai_client = OpenAI(
+                api_key=self.openai_api_key,
+                timeout=STAGE_TIMEOUTS["gpt"],
+                max_retries=1
+            )
+    
+    @staticmethod
+    def _record_stage_time(results: Dict[str, Any], stage: str, stage_start: float) -> float:
+        """Store how long a stage took in results["stage_timings_ms"]; returns the next stage's start."""
+        now = time.perf_counter()
+        results["stage_timings_ms"][stage] = int((now - stage_start) * 1000)
+        return now
+    
+    async def _run_stage(self, stage: str, func, *args, **kwargs):
+        """
+        Run a blocking stage in a worker thread with its deadline applied.
+        
+        The thread itself cannot be killed, but the job stops waiting for it and
+        the worker slot is released (or the whole process is terminated when the
+        queue runs analyses in subprocesses). The job's memory reservation is
+        held until the thread returns (run_in_thread).
+        """
+        timeout = STAGE_TIMEOUTS[stage]
+        try:
+            return await asyncio.wait_for(run_in_thread(func, *args, **kwargs), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise StageTimeoutError(f"Stage '{stage}' exceeded {timeout:.0f}s")
     
     async def comprehensive_analysis(
         self, 
@@ -64,10 +110,15 @@ class ProAudioAnalyzer:
             transcript: Transcribed text from audio
             context: Context of the speech (interview, presentation, casual, etc.)
             language: Language code (en, es)
-            job: Optional job object to track progress
+            job: Optional job object to track progress; checked for
+                cancellation between stages
         
         Returns:
             Dictionary with all analysis results
+        
+        Raises:
+            JobCancelledError: If the job is cancelled while the analysis runs
+            StageTimeoutError: If a stage exceeds its deadline in STAGE_TIMEOUTS
         """
         
         results = {
@@ -82,28 +133,41 @@ class ProAudioAnalyzer:
             "emotions": {},
             "gpt_insights": {},
             "processing_time_ms": 0,
+            "stage_timings_ms": {},
             "errors": []
         }
         
         start_time = datetime.now()
+        stage_start = time.perf_counter()
         
+        if job: job.raise_if_cancelled()
         try:
             # 1. Extract audio metrics
             if job: job.progress = 20
-            audio_metrics = self._extract_audio_metrics(audio_path)
+            # CPU-bound stages run off the event loop so cancel requests can be served meanwhile
+            # (and with a deadline, so a hung decode cannot hold the worker forever)
+            audio_metrics = await self._run_stage("audio_metrics", self._extract_audio_metrics, audio_path)
             results["metrics"] = audio_metrics
+        except StageTimeoutError:
+            raise
         except Exception as e:
             results["errors"].append(f"Audio metrics extraction failed: {str(e)}")
+        stage_start = self._record_stage_time(results, "audio_metrics", stage_start)
         
+        if job: job.raise_if_cancelled()
         try:
             # 2. Analyze prosody (if Parselmouth available)
             if job: job.progress = 35
             if PARSELMOUTH_AVAILABLE:
-                prosody_data = self._analyze_prosody(audio_path)
+                prosody_data = await self._run_stage("prosody", self._analyze_prosody, audio_path)
                 results["prosody"] = prosody_data
+        except StageTimeoutError:
+            raise
         except Exception as e:
             results["errors"].append(f"Prosody analysis failed: {str(e)}")
+        stage_start = self._record_stage_time(results, "prosody", stage_start)
         
+        if job: job.raise_if_cancelled()
         try:
             # 3. Detect filler words
             if job: job.progress = 50
@@ -111,7 +175,9 @@ class ProAudioAnalyzer:
             results["fillers"] = fillers_data
         except Exception as e:
             results["errors"].append(f"Filler detection failed: {str(e)}")
+        stage_start = self._record_stage_time(results, "fillers", stage_start)
         
+        if job: job.raise_if_cancelled()
         try:
             # 4. Emotion detection (basic, from audio patterns)
             if job: job.progress = 65
@@ -119,21 +185,31 @@ class ProAudioAnalyzer:
             results["emotions"] = emotions
         except Exception as e:
             results["errors"].append(f"Emotion detection failed: {str(e)}")
+        stage_start = self._record_stage_time(results, "emotions", stage_start)
         
+        # Stop before the (paid) GPT call if the job was cancelled
+        if job: job.raise_if_cancelled()
         try:
             # 5. GPT synthesis (if OpenAI available)
             if job: job.progress = 80
             if self.openai_client:
-                insights = await self._get_gpt_insights(
-                    transcript=transcript,
-                    metrics=results.get("metrics", {}),
-                    prosody=results.get("prosody", {}),
-                    fillers=results.get("fillers", {}),
-                    context=context
+                insights = await asyncio.wait_for(
+                    self._get_gpt_insights(
+                        transcript=transcript,
+                        metrics=results.get("metrics", {}),
+                        prosody=results.get("prosody", {}),
+                        fillers=results.get("fillers", {}),
+                        context=context
+                    ),
+                    # Covers the client's own retry
+                    timeout=STAGE_TIMEOUTS["gpt"] * 2
                 )
                 results["gpt_insights"] = insights
+        except asyncio.TimeoutError:
+            raise StageTimeoutError(f"Stage 'gpt' exceeded {STAGE_TIMEOUTS['gpt'] * 2:.0f}s")
         except Exception as e:
             results["errors"].append(f"GPT synthesis failed: {str(e)}")
+        self._record_stage_time(results, "gpt", stage_start)
         
         # Calculate processing time
         results["processing_time_ms"] = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -148,6 +224,8 @@ class ProAudioAnalyzer:
         """
         Extract core audio features using librosa with memory optimization.
         Uses 16kHz sample rate to reduce memory usage on Render FREE tier.
+        The spectrogram is computed a block at a time (services/spectrogram.py):
+        only the samples and the 128 mel bands are kept for the whole recording.
         
         Returns:
             Dictionary with audio characteristics
@@ -162,28 +240,43 @@ class ProAudioAnalyzer:
         
         duration = librosa.get_duration(y=y, sr=sr)
         
-        # Energy (loudness)
-        rms_energy = float(np.mean(librosa.feature.rms(y=y)))
-        
-        # Spectral centroid (brightness/harshness of voice)
-        spectral_centroid = float(np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)))
-        
-        # Zero crossing rate (noise/friction indicator)
-        zero_crossing_rate = float(np.mean(librosa.feature.zero_crossing_rate(y)))
+        # Per-frame features, block by block (same frames as on the whole signal)
+        rms_sum = centroid_sum = zcr_sum = 0.0
+        frames = 0
+        mel_blocks = []
+        for segment in iter_frame_blocks(y):
+            S = np.abs(librosa.stft(segment, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False))
+            # Energy (loudness)
+            rms_sum += float(np.sum(librosa.feature.rms(y=segment, frame_length=N_FFT, hop_length=HOP_LENGTH, center=False)))
+            # Spectral centroid (brightness/harshness of voice)
+            centroid_sum += float(np.sum(librosa.feature.spectral_centroid(S=S, sr=sr)))
+            # Zero crossing rate (noise/friction indicator)
+            zcr_sum += float(np.sum(librosa.feature.zero_crossing_rate(segment, frame_length=N_FFT, hop_length=HOP_LENGTH, center=False)))
+            mel_blocks.append(librosa.feature.melspectrogram(S=S ** 2, sr=sr))
+            frames += S.shape[1]
+            del S
+        mel = np.concatenate(mel_blocks, axis=1)
+        del mel_blocks
+        
+        rms_energy = rms_sum / frames
+        spectral_centroid = centroid_sum / frames
+        zero_crossing_rate = zcr_sum / frames
         
         # MFCC (Mel-frequency cepstral coefficients - speech characteristics)
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+        log_mel = librosa.power_to_db(mel)
+        mfcc = librosa.feature.mfcc(S=log_mel, n_mfcc=13)
         mfcc_mean = np.mean(mfcc, axis=1).tolist()
         
         # Onset detection (approximate word/syllable boundaries)
-        onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-        onsets = librosa.onset.onset_detect(onset_env=onset_env, sr=sr)
+        onset_env = librosa.onset.onset_strength(S=log_mel, sr=sr)
+        onsets = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr)
+        del log_mel
         
         # Speaking rate estimation
         speech_rate = self._calculate_speech_rate(duration, len(onsets))
         
         # Silence detection
-        silence_ratio = self._calculate_silence_ratio(y, sr)
+        silence_ratio = self._calculate_silence_ratio(mel)
         
         return {
             "duration_seconds": float(duration),
@@ -212,16 +305,12 @@ class ProAudioAnalyzer:
         
         return float(max(0, min(wpm, 300)))  # Clamp to 0-300 WPM
     
-    def _calculate_silence_ratio(self, y: np.ndarray, sr: int) -> float:
+    def _calculate_silence_ratio(self, mel: np.ndarray) -> float:
         """
-        Calculate ratio of silence to total duration.
+        Calculate ratio of silence to total duration, from the mel power
+        spectrogram (frames of N_FFT samples every HOP_LENGTH).
         """
-        # Frame-based energy threshold
-        frame_length = 2048
-        hop_length = 512
-        
-        S = librosa.feature.melspectrogram(y=y, sr=sr)
-        S_db = librosa.power_to_db(S, ref=np.max)
+        S_db = librosa.power_to_db(mel, ref=np.max)
         
         # Energy threshold: -40dB
         is_silent = np.mean(S_db, axis=0) < -40
@@ -0,0 +1,9 @@
+# ==============================================================================
+# PRO ANALYSIS VERSION
+# Kept apart from pro_analyzer (which loads librosa) so the request path can
+# build job keys without importing the analysis stack
+# ==============================================================================
+
+# Bump when the analysis output changes so that resubmissions are not
+# coalesced with jobs produced by an older pipeline
+ANALYSIS_VERSION = "1"
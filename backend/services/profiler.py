@@ -0,0 +1,201 @@
+# ==============================================================================
+# SAMPLING PROFILER
+# Opt-in statistical profiles of single requests or Pro jobs, written as
+# folded stacks (flamegraph.pl, speedscope, inferno) to a bounded directory
+# ==============================================================================
+
+import collections
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Leaf frames of threads that are just waiting: idle event loop, idle pool
+# workers, lock waits. Skipped so profiles show where time is actually spent.
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+class ProfileSession:
+    """
+    Samples the stacks of every thread (except its own) every interval until
+    stopped, then writes one folded-stack line per distinct stack:
+
+        <thread>;<file>:<function>;...;<file>:<function> <samples>
+
+    Every thread is sampled because request work hops between the event loop
+    and worker threads (asyncio.to_thread); concurrent requests show up too,
+    under their own thread names.
+    """
+
+    def __init__(self, path: str, interval_seconds: float, max_seconds: float):
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.max_seconds = max_seconds
+        self.samples = 0
+        self._stacks: Dict[str, int] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling and write the profile; returns its path."""
+        self._stop.set()
+        self._thread.join()
+        with open(self.path, "w") as f:
+            for stack, count in sorted(self._stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+        return self.path
+
+    def _run(self):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval_seconds) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _fold(frame)
+                if stack:
+                    self._stacks[f"{names.get(thread_id, thread_id)};{stack}"] += 1
+            self.samples += 1
+
+
+def _fold(frame) -> Optional[str]:
+    leaf = frame.f_code
+    if (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES:
+        return None
+
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        function = getattr(code, "co_qualname", code.co_name)
+        names.append(f"{os.path.basename(code.co_filename)}:{function}".replace(";", ","))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Decides which requests/jobs get profiled and keeps the output bounded.
+
+    Disabled (sample_rate 0, no forced session) it costs one random() call per
+    profiled entry point; no thread runs.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "profiles",
+        sample_rate: float = 0.0,
+        interval_seconds: float = 0.005,
+        max_seconds: float = 600.0,
+        max_files: int = 50,
+        max_active: int = 2
+    ):
+        """
+        Args:
+            output_dir: Where .folded files are written
+            sample_rate: Fraction of entry points profiled without being asked (0-1)
+            interval_seconds: Time between stack samples
+            max_seconds: Sampling stops after this long even if the work hasn't finished
+            max_files: Oldest profiles are deleted beyond this count
+            max_active: Concurrent sessions; more requests run unprofiled
+        """
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+        self.max_seconds = max_seconds
+        self.max_files = max_files
+        self.max_active = max_active
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def should_profile(self, forced: bool = False) -> bool:
+        return forced or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextmanager
+    def session(self, name: str) -> Iterator[Optional[ProfileSession]]:
+        """Profile the enclosed block; yields the session, or None when at max_active."""
+        with self._lock:
+            if self._active >= self.max_active:
+                session = None
+            else:
+                self._active += 1
+                os.makedirs(self.output_dir, exist_ok=True)
+                filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{secrets.token_hex(3)}-{name}.folded"
+                session = ProfileSession(
+                    os.path.join(self.output_dir, filename), self.interval_seconds, self.max_seconds
+                )
+
+        if session is None:
+            yield None
+            return
+
+        session.start()
+        try:
+            yield session
+        finally:
+            try:
+                path = session.stop()
+                print(f"🔬 Profile written: {path} ({session.samples} samples)")
+                self._enforce_retention()
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+    def list_profiles(self):
+        """Profiles on disk, newest first: [{"name", "size", "created_at"}]."""
+        if not os.path.isdir(self.output_dir):
+            return []
+        entries = [
+            (entry.stat(), entry.name)
+            for entry in os.scandir(self.output_dir)
+            if entry.name.endswith(".folded")
+        ]
+        entries.sort(key=lambda entry: entry[0].st_mtime, reverse=True)
+        return [
+            {"name": name, "size": stat.st_size, "created_at": int(stat.st_mtime)}
+            for stat, name in entries
+        ]
+
+    def profile_path(self, name: str) -> Optional[str]:
+        """Path of a stored profile, or None (rejects anything that isn't a plain file name)."""
+        if os.path.basename(name) != name or not name.endswith(".folded"):
+            return None
+        path = os.path.join(self.output_dir, name)
+        return path if os.path.isfile(path) else None
+
+    def _enforce_retention(self):
+        for entry in self.list_profiles()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.output_dir, entry["name"]))
+            except FileNotFoundError:
+                pass
+
+
+# Global profiler instance
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    """Get or create the profiler configured by the PROFILE_* environment variables."""
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler(
+            output_dir=os.getenv("PROFILE_DIR", "profiles"),
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            interval_seconds=float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000,
+            max_seconds=float(os.getenv("PROFILE_MAX_SECONDS", "600")),
+            max_files=int(os.getenv("PROFILE_MAX_FILES", "50")),
+        )
+    return _profiler
@@ -0,0 +1,102 @@
+# ==============================================================================
+# PROGRESS AGGREGATES
+# Per-user metric aggregates maintained on every recording insert
+# ==============================================================================
+
+from typing import Any, Dict, Optional, Sequence
+
+# Metrics tracked for the progress dashboard and how a personal best is chosen.
+# Keep in sync with update_progress in setup_progress.sql.
+PROGRESS_METRICS = {
+    "pace": "target",                   # closest to IDEAL_PACE
+    "pitch_variation": "max",
+    "disfluencies_per_minute": "min",
+    "hedge_count": "min",
+}
+IDEAL_PACE = 145  # middle of the 130-160 wpm range used by the feedback
+PROGRESS_WINDOW = 10  # recordings in the rolling average
+PROGRESS_EWMA_ALPHA = 0.2
+ALL_CONTEXTS = "*"
+
+
+def _is_better(metric: str, value: float, best: float) -> bool:
+    mode = PROGRESS_METRICS[metric]
+    if mode == "target":
+        return abs(value - IDEAL_PACE) < abs(best - IDEAL_PACE)
+    if mode == "max":
+        return value > best
+    return value < best
+
+
+def apply_observation(
+    row: Optional[Dict[str, Any]],
+    metric: str,
+    value: float,
+    timestamp: int,
+    window: int = PROGRESS_WINDOW,
+    alpha: float = PROGRESS_EWMA_ALPHA
+) -> Dict[str, Any]:
+    """
+    Fold one value into an aggregate row (same columns as user_progress).
+
+    O(1) per recording: running mean, EWMA, bounded window of recent values,
+    personal best and min/max. Used by storage backends that can't run the
+    SQL version.
+    """
+    if not row or not row.get("count"):
+        return {
+            "count": 1, "mean": value, "ewma": value, "recent": [value],
+            "best": value, "min": value, "max": value, "last_value": value,
+            "updated_at": timestamp
+        }
+
+    count = row["count"] + 1
+    return {
+        "count": count,
+        "mean": row["mean"] + (value - row["mean"]) / count,
+        "ewma": alpha * value + (1 - alpha) * row["ewma"],
+        "recent": (list(row.get("recent") or []) + [value])[-window:],
+        "best": value if _is_better(metric, value, row["best"]) else row["best"],
+        "min": min(row["min"], value),
+        "max": max(row["max"], value),
+        "last_value": value,
+        "updated_at": timestamp
+    }
+
+
+def summarize(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Shape user_progress rows for the API:
+        {"overall": {metric: stats}, "by_context": {context: {metric: stats}}}
+    """
+    overall: Dict[str, Any] = {}
+    by_context: Dict[str, Dict[str, Any]] = {}
+
+    for row in rows:
+        recent = list(row.get("recent") or [])
+        stats = {
+            "count": row["count"],
+            "mean": _round(row["mean"]),
+            "ewma": _round(row["ewma"]),
+            "rolling_mean": _round(sum(recent) / len(recent)) if recent else None,
+            "best": _round(row["best"]),
+            "min": _round(row["min"]),
+            "max": _round(row["max"]),
+            "last": _round(row["last_value"]),
+        }
+        if row["context"] == ALL_CONTEXTS:
+            overall[row["metric"]] = stats
+        else:
+            by_context.setdefault(row["context"], {})[row["metric"]] = stats
+
+    return {
+        "overall": overall,
+        "by_context": by_context,
+        "window": PROGRESS_WINDOW,
+        "recordings": max((stats["count"] for stats in overall.values()), default=0)
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
@@ -0,0 +1,159 @@
+# ==============================================================================
+# RATE LIMIT STORAGE
+# Shared (Redis) or in-process counters for request rates and per-account
+# concurrency caps, so limits hold across workers and instances
+# ==============================================================================
+
+import os
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+MEMORY_STORAGE_URI = "memory://"
+
+
+def get_rate_limit_storage_uri() -> str:
+    """
+    Storage for slowapi/limits counters and concurrency leases.
+
+    "memory://" (default) keeps counters in the process: fine for one worker
+    and for tests. "redis://host:6379/0" (or rediss://) shares them between
+    every worker and instance.
+    """
+    return os.getenv("RATE_LIMIT_STORAGE_URI", MEMORY_STORAGE_URI)
+
+
+class ConcurrencyLimiter(ABC):
+    """
+    Caps how many requests with the same key run at the same time.
+
+    Every request takes a lease on entry and returns it on exit. Leases expire
+    after lease_seconds, so a worker killed mid-request can't lock an account
+    out for good.
+    """
+
+    def __init__(self, lease_seconds: float = 900.0):
+        """
+        Args:
+            lease_seconds: Upper bound on a request's duration; stale leases are dropped after it
+        """
+        self.lease_seconds = lease_seconds
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: int) -> Optional[str]:
+        """Take a lease; returns its token, or None if `limit` are already held."""
+
+    @abstractmethod
+    async def release(self, key: str, token: str):
+        """Return a lease (no-op if it already expired)."""
+
+    async def close(self):
+        """Release connections."""
+
+
+class MemoryConcurrencyLimiter(ConcurrencyLimiter):
+    """Per-process leases. Each worker enforces the cap on its own."""
+
+    def __init__(self, lease_seconds: float = 900.0):
+        super().__init__(lease_seconds)
+        self._leases: Dict[str, Dict[str, float]] = {}  # key -> {token: expires_at}
+        self._lock = threading.Lock()
+
+    async def acquire(self, key, limit):
+        now = time.monotonic()
+        with self._lock:
+            leases = self._leases.setdefault(key, {})
+            for token, expires_at in list(leases.items()):
+                if expires_at <= now:
+                    del leases[token]
+            if len(leases) >= limit:
+                return None
+            token = secrets.token_hex(8)
+            leases[token] = now + self.lease_seconds
+            return token
+
+    async def release(self, key, token):
+        with self._lock:
+            leases = self._leases.get(key)
+            if leases is not None:
+                leases.pop(token, None)
+                if not leases:
+                    del self._leases[key]
+
+
+# Leases are members of a sorted set scored by acquisition time; expired ones
+# are trimmed before counting. One script, so check-and-add is atomic.
+_ACQUIRE_SCRIPT = """
+local key, now, lease, limit, token = KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), ARGV[4]
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - lease)
+if redis.call('ZCARD', key) >= limit then
+    return 0
+end
+redis.call('ZADD', key, now, token)
+redis.call('EXPIRE', key, math.ceil(lease))
+return 1
+"""
+
+
+class RedisConcurrencyLimiter(ConcurrencyLimiter):
+    """Leases shared by every worker through Redis (or any server speaking its protocol)."""
+
+    def __init__(self, uri: str, lease_seconds: float = 900.0, key_prefix: str = "concurrency:"):
+        super().__init__(lease_seconds)
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise ImportError("redis is required for RATE_LIMIT_STORAGE_URI=redis://...")
+
+        self.uri = uri
+        self.key_prefix = key_prefix
+        self._redis_asyncio = redis_asyncio
+        self._client = None
+        self._script = None
+
+    @property
+    def client(self):
+        # Created lazily, on the event loop that uses it
+        if self._client is None:
+            self._client = self._redis_asyncio.from_url(self.uri)
+            self._script = self._client.register_script(_ACQUIRE_SCRIPT)
+        return self._client
+
+    async def acquire(self, key, limit):
+        client = self.client
+        token = secrets.token_hex(8)
+        acquired = await self._script(
+            keys=[self.key_prefix + key],
+            args=[time.time(), self.lease_seconds, limit, token],
+            client=client
+        )
+        return token if acquired else None
+
+    async def release(self, key, token):
+        await self.client.zrem(self.key_prefix + key, token)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global limiter instance
+_concurrency_limiter: Optional[ConcurrencyLimiter] = None
+
+
+def get_concurrency_limiter() -> ConcurrencyLimiter:
+    """Get or create the concurrency limiter for RATE_LIMIT_STORAGE_URI."""
+    global _concurrency_limiter
+    if _concurrency_limiter is None:
+        uri = get_rate_limit_storage_uri()
+        lease_seconds = float(os.getenv("CONCURRENCY_LEASE_SECONDS", "900"))
+        if uri.startswith(("redis://", "rediss://")):
+            _concurrency_limiter = RedisConcurrencyLimiter(uri, lease_seconds=lease_seconds)
+        elif uri.startswith("memory://"):
+            _concurrency_limiter = MemoryConcurrencyLimiter(lease_seconds=lease_seconds)
+        else:
+            raise ValueError(f"Unsupported RATE_LIMIT_STORAGE_URI for concurrency caps: {uri}")
+    return _concurrency_limiter
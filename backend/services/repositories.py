@@ -0,0 +1,345 @@
+# ==============================================================================
+# REPOSITORIES
+# Storage interface for users, sessions, recordings, payments, pro analyses
+# and progress aggregates, with the Supabase implementation used in production
+# ==============================================================================
+
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .database import Database, get_database
+
+
+class UserRepository(ABC):
+    @abstractmethod
+    async def get(self, email: str) -> Optional[Dict[str, Any]]:
+        """User row by email, or None."""
+
+    @abstractmethod
+    async def get_by_subscription_id(self, subscription_id: str) -> Optional[Dict[str, Any]]:
+        """User row owning a subscription, or None."""
+
+    @abstractmethod
+    async def create(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a user and return the stored row."""
+
+    @abstractmethod
+    async def update(self, email: str, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a user; returns the updated row (None if no such user)."""
+
+
+class SessionRepository(ABC):
+    @abstractmethod
+    async def create(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a session and return the stored row (with its generated id)."""
+
+    @abstractmethod
+    async def get(self, session_id: str, user_email: str, columns: Sequence[str] = ("*",)) -> Optional[Dict[str, Any]]:
+        """Session owned by user_email, or None."""
+
+    @abstractmethod
+    async def list_with_counts(
+        self,
+        user_email: str,
+        before_created_at: Optional[int] = None,
+        before_id: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Page of sessions (newest first) with their recordings_count."""
+
+
+class RecordingRepository(ABC):
+    @abstractmethod
+    async def get_with_owner(self, recording_id: str) -> Optional[Dict[str, Any]]:
+        """Recording plus "owner_email" (the user_email of its session), or None."""
+
+    @abstractmethod
+    async def stats(self, session_id: str) -> Dict[str, Any]:
+        """{"count", "latest_id", "latest_timestamp"} for a session's recordings."""
+
+    @abstractmethod
+    async def list_page(
+        self,
+        session_id: str,
+        columns: Sequence[str],
+        limit: int,
+        before_timestamp: Optional[int] = None,
+        before_id: Optional[str] = None,
+        since: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Recordings ordered by (timestamp, id) descending, keyset-paginated."""
+
+    @abstractmethod
+    async def record_upload(
+        self,
+        user_email: str,
+        session_id: str,
+        recording: Dict[str, Any],
+        minutes: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        In one transaction: check session ownership, insert the recording, add
+        minutes to the user and fold the recording into the user's progress
+        aggregates. Returns {"recording", "recordings_count", "minutes_used"},
+        or None if the session doesn't belong to the user.
+        """
+
+
+class PaymentRepository(ABC):
+    @abstractmethod
+    async def insert_many(self, events: List[Dict[str, Any]]):
+        """Append payment/audit events."""
+
+
+class ProAnalysisRepository(ABC):
+    @abstractmethod
+    async def create(self, analysis: Dict[str, Any]):
+        """Insert a pro_analyses row."""
+
+    @abstractmethod
+    async def consume_quota(self, user_email: str, period: str, limit: int) -> Tuple[bool, int]:
+        """Atomically take one analysis from the monthly quota; returns (allowed, used)."""
+
+    @abstractmethod
+    async def release_quota(self, user_email: str, period: str) -> int:
+        """Give one analysis back; returns the new used count."""
+
+
+class ProgressRepository(ABC):
+    @abstractmethod
+    async def get(self, user_email: str) -> List[Dict[str, Any]]:
+        """All user_progress rows of a user (bounded by contexts x metrics)."""
+
+    @abstractmethod
+    async def series(
+        self, user_email: str, metric: str, context: Optional[str] = None, buckets: int = 200
+    ) -> List[Dict[str, Any]]:
+        """
+        A metric over the user's recordings, oldest first, downsampled by the
+        database to at most `buckets` rows of equal recording count:
+        {"timestamp" (first in bucket), "value" (mean), "min", "max", "count"}.
+        """
+
+
+class Storage:
+    """Bundle of repositories for one backend."""
+
+    backend = "abstract"
+
+    def __init__(
+        self,
+        users: UserRepository,
+        sessions: SessionRepository,
+        recordings: RecordingRepository,
+        payments: PaymentRepository,
+        pro_analyses: ProAnalysisRepository,
+        progress: ProgressRepository
+    ):
+        self.users = users
+        self.sessions = sessions
+        self.recordings = recordings
+        self.payments = payments
+        self.pro_analyses = pro_analyses
+        self.progress = progress
+
+    async def close(self):
+        """Release connections (the backend reconnects on next use)."""
+
+
+# ==============================================================================
+# SUPABASE IMPLEMENTATION
+# Tables plus the RPCs from setup_session_listing.sql, setup_record_upload.sql,
+# setup_pro_usage.sql and setup_progress.sql
+# ==============================================================================
+
+class SupabaseUserRepository(UserRepository):
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def get(self, email):
+        response = await self.db.table("users").select("*").eq("email", email).execute()
+        return response.data[0] if response.data else None
+
+    async def get_by_subscription_id(self, subscription_id):
+        response = await self.db.table("users").select("*").eq("subscription_id", subscription_id).execute()
+        return response.data[0] if response.data else None
+
+    async def create(self, user):
+        response = await self.db.table("users").insert(user).execute()
+        return response.data[0] if response.data else user
+
+    async def update(self, email, values):
+        response = await self.db.table("users").update(values).eq("email", email).execute()
+        return response.data[0] if response.data else None
+
+
+class SupabaseSessionRepository(SessionRepository):
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def create(self, session):
+        response = await self.db.table("sessions").insert(session).execute()
+        return response.data[0] if response.data else None
+
+    async def get(self, session_id, user_email, columns=("*",)):
+        response = await self.db.table("sessions").select(", ".join(columns)).eq(
+            "id", session_id
+        ).eq("user_email", user_email).execute()
+        return response.data[0] if response.data else None
+
+    async def list_with_counts(self, user_email, before_created_at=None, before_id=None, limit=100):
+        response = await self.db.rpc("list_sessions_with_counts", {
+            "p_user_email": user_email,
+            "p_before_created_at": before_created_at,
+            "p_before_id": before_id,
+            "p_limit": limit
+        }).execute()
+        return response.data or []
+
+
+class SupabaseRecordingRepository(RecordingRepository):
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def get_with_owner(self, recording_id):
+        response = await self.db.table("recordings").select("*, sessions(user_email)").eq("id", recording_id).execute()
+        if not response.data:
+            return None
+        recording = response.data[0]
+        recording["owner_email"] = (recording.pop("sessions", None) or {}).get("user_email")
+        return recording
+
+    async def stats(self, session_id):
+        response = await self.db.table("recordings").select("id, timestamp", count="exact").eq(
+            "session_id", session_id
+        ).order("timestamp", desc=True).order("id", desc=True).limit(1).execute()
+        latest = response.data[0] if response.data else {}
+        return {
+            "count": response.count or 0,
+            "latest_id": latest.get("id"),
+            "latest_timestamp": latest.get("timestamp")
+        }
+
+    async def list_page(self, session_id, columns, limit, before_timestamp=None, before_id=None, since=None):
+        query = self.db.table("recordings").select(", ".join(columns)).eq("session_id", session_id)
+        if since is not None:
+            query = query.gt("timestamp", since)
+        if before_timestamp is not None:
+            query = query.or_(f"timestamp.lt.{before_timestamp},and(timestamp.eq.{before_timestamp},id.lt.{before_id})")
+        response = await query.order("timestamp", desc=True).order("id", desc=True).limit(limit).execute()
+        return response.data or []
+
+    async def record_upload(self, user_email, session_id, recording, minutes):
+        response = await self.db.rpc("record_upload", {
+            "p_user_email": user_email,
+            "p_session_id": session_id,
+            "p_recording": recording,
+            "p_minutes": minutes
+        }).execute()
+        return response.data or None
+
+
+class SupabasePaymentRepository(PaymentRepository):
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def insert_many(self, events):
+        # PostgREST bulk inserts need every object to have the same keys
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for event in events:
+            groups.setdefault(tuple(sorted(event)), []).append(event)
+        for rows in groups.values():
+            await self.db.table("payments").insert(rows).execute()
+
+
+class SupabaseProAnalysisRepository(ProAnalysisRepository):
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def create(self, analysis):
+        await self.db.table("pro_analyses").insert(analysis).execute()
+
+    async def consume_quota(self, user_email, period, limit):
+        response = await self.db.rpc("consume_pro_quota", {
+            "p_user_email": user_email,
+            "p_period": period,
+            "p_limit": limit
+        }).execute()
+        quota = (response.data or [{}])[0]
+        return bool(quota.get("allowed")), quota.get("used") or 0
+
+    async def release_quota(self, user_email, period):
+        response = await self.db.rpc("release_pro_quota", {
+            "p_user_email": user_email,
+            "p_period": period
+        }).execute()
+        return response.data or 0
+
+
+class SupabaseProgressRepository(ProgressRepository):
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def get(self, user_email):
+        response = await self.db.table("user_progress").select("*").eq("user_email", user_email).execute()
+        return response.data or []
+
+    async def series(self, user_email, metric, context=None, buckets=200):
+        response = await self.db.rpc("progress_series", {
+            "p_user_email": user_email,
+            "p_metric": metric,
+            "p_context": context,
+            "p_buckets": buckets
+        }).execute()
+        return [
+            {
+                "timestamp": row["bucket_start"],
+                "value": row["mean_value"],
+                "min": row["min_value"],
+                "max": row["max_value"],
+                "count": row["recordings"]
+            }
+            for row in response.data or []
+        ]
+
+
+class SupabaseStorage(Storage):
+    backend = "supabase"
+
+    def __init__(self, db: Database):
+        self.db = db
+        super().__init__(
+            users=SupabaseUserRepository(db),
+            sessions=SupabaseSessionRepository(db),
+            recordings=SupabaseRecordingRepository(db),
+            payments=SupabasePaymentRepository(db),
+            pro_analyses=SupabaseProAnalysisRepository(db),
+            progress=SupabaseProgressRepository(db)
+        )
+
+    async def close(self):
+        await self.db.aclose()
+
+
+# Global storage instance
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    """
+    Get or create the storage selected by DATABASE_BACKEND:
+    "supabase" (default) or "sqlite" (embedded file at SQLITE_PATH, for local
+    benchmarks and offline development).
+    """
+    global _storage
+    if _storage is None:
+        backend = os.getenv("DATABASE_BACKEND", "supabase").lower()
+        if backend == "sqlite":
+            from .sqlite_storage import SQLiteStorage
+            _storage = SQLiteStorage(os.getenv("SQLITE_PATH", "lucidspeak.db"))
+        elif backend == "supabase":
+            _storage = SupabaseStorage(get_database())
+        else:
+            raise ValueError(f"Unknown DATABASE_BACKEND: {backend}")
+    return _storage
@@ -0,0 +1,53 @@
+# ==============================================================================
+# BLOCKWISE SPECTROGRAM
+# STFT of a long signal computed a block of frames at a time, so analyses that
+# only need per-frame results (pitch tracking, spectral features, mel bands)
+# hold one block of the spectrogram instead of the whole recording's
+# ==============================================================================
+
+from typing import Iterator
+
+# Same framing as the librosa defaults the analyses used on the whole signal
+N_FFT = 2048
+HOP_LENGTH = 512
+# ~30 s at 16 kHz: ~8 MB of magnitudes per block, whatever the recording length
+BLOCK_FRAMES = 940
+
+
+def frame_count(num_samples: int, hop_length: int = HOP_LENGTH) -> int:
+    """Frames of a centered STFT (librosa.stft(center=True)) of num_samples."""
+    return 1 + num_samples // hop_length
+
+
+def iter_frame_blocks(y, n_fft: int = N_FFT, hop_length: int = HOP_LENGTH, block_frames: int = BLOCK_FRAMES) -> Iterator:
+    """
+    Yield the signal under each block of frames of a centered STFT with zero
+    padding (librosa's default): block i covers frames
+    [i * block_frames, (i + 1) * block_frames) and running an uncentered STFT
+    or framing on it gives exactly those frames of the whole-signal result.
+    """
+    import numpy as np
+
+    total = frame_count(len(y), hop_length)
+    half = n_fft // 2
+    for first in range(0, total, block_frames):
+        last = min(first + block_frames, total)
+        start = first * hop_length - half
+        end = (last - 1) * hop_length + half + (n_fft % 2)
+        if start >= 0 and end <= len(y):
+            yield y[start:end]
+            continue
+        # First or last block: pad with zeros as the centered STFT does
+        segment = np.zeros(end - start, dtype=y.dtype)
+        lo, hi = max(start, 0), min(end, len(y))
+        segment[lo - start:hi - start] = y[lo:hi]
+        yield segment
+
+
+def iter_magnitude_blocks(y, n_fft: int = N_FFT, hop_length: int = HOP_LENGTH, block_frames: int = BLOCK_FRAMES) -> Iterator:
+    """Yield |STFT| (1 + n_fft/2 bins x frames) one block of frames at a time; see iter_frame_blocks."""
+    import librosa
+    import numpy as np
+
+    for segment in iter_frame_blocks(y, n_fft, hop_length, block_frames):
+        yield np.abs(librosa.stft(segment, n_fft=n_fft, hop_length=hop_length, center=False))
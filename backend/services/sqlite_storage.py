@@ -0,0 +1,459 @@
+# ==============================================================================
+# SQLITE STORAGE
+# Embedded implementation of the repositories for local benchmarks and tests.
+# Same tables, indexes and transactional semantics as the Supabase setup_*.sql
+# ==============================================================================
+
+import asyncio
+import json
+import sqlite3
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .metrics import timed
+from .progress import PROGRESS_METRICS, ALL_CONTEXTS, apply_observation
+from .repositories import (
+    UserRepository,
+    SessionRepository,
+    RecordingRepository,
+    PaymentRepository,
+    ProAnalysisRepository,
+    ProgressRepository,
+    Storage
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    hashed_password TEXT,
+    created_at INTEGER,
+    minutes INTEGER DEFAULT 0,
+    tier TEXT DEFAULT 'free',
+    subscription_id TEXT,
+    subscription_status TEXT,
+    subscription_start_date INTEGER,
+    subscription_end_date INTEGER,
+    stripe_customer_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_subscription_id ON users(subscription_id);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user_email TEXT NOT NULL REFERENCES users(email) ON DELETE CASCADE,
+    name TEXT,
+    context TEXT,
+    target_audience TEXT,
+    goal TEXT,
+    created_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_created ON sessions(user_email, created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS recordings (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    pace REAL,
+    pitch_variation REAL,
+    disfluencies_per_minute REAL,
+    hedge_count INTEGER,
+    total_words INTEGER,
+    duration REAL,
+    transcript TEXT,
+    insights_summary TEXT,
+    "timestamp" INTEGER,
+    file_path TEXT,
+    audio_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_session_id ON recordings(session_id);
+CREATE INDEX IF NOT EXISTS idx_recordings_session_timestamp ON recordings(session_id, "timestamp" DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS payments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id TEXT,
+    user_email TEXT,
+    "timestamp" INTEGER,
+    event TEXT,
+    session_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pro_analyses (
+    id TEXT PRIMARY KEY,
+    user_email TEXT NOT NULL,
+    recording_id TEXT,
+    job_id TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'queued',
+    result TEXT,
+    error TEXT,
+    created_at INTEGER NOT NULL,
+    started_at INTEGER,
+    completed_at INTEGER,
+    progress INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_pro_analyses_user_monthly ON pro_analyses(user_email, created_at);
+
+CREATE TABLE IF NOT EXISTS pro_usage (
+    user_email TEXT NOT NULL,
+    period TEXT NOT NULL,
+    used INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_email, period)
+);
+
+CREATE TABLE IF NOT EXISTS user_progress (
+    user_email TEXT NOT NULL,
+    context TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    mean REAL,
+    ewma REAL,
+    recent TEXT NOT NULL DEFAULT '[]',
+    best REAL,
+    min REAL,
+    max REAL,
+    last_value REAL,
+    updated_at INTEGER,
+    PRIMARY KEY (user_email, context, metric)
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_timestamp ON recordings("timestamp");
+"""
+
+# Columns added after a table was first created: (table, column, declaration)
+MIGRATIONS = (
+    ("recordings", "audio_key", "TEXT"),
+)
+
+
+class SQLiteDatabase:
+    """
+    One sqlite3 connection shared by the repositories.
+
+    Queries run in worker threads (asyncio.to_thread) so the event loop keeps
+    serving requests; a lock serializes them since a connection is not safe
+    for concurrent use. WAL mode lets external readers (benchmarks, the sqlite3
+    shell) inspect the file while the API writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._columns: Dict[str, set] = {}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            connection.executescript(SCHEMA)
+            for table, column, declaration in MIGRATIONS:
+                existing = {row["name"] for row in connection.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    connection.execute(f'ALTER TABLE {table} ADD COLUMN "{column}" {declaration}')
+            self._columns = {
+                table: {row["name"] for row in connection.execute(f"PRAGMA table_info({table})")}
+                for table in ("users", "sessions", "recordings", "payments", "pro_analyses", "pro_usage", "user_progress")
+            }
+            self._connection = connection
+        return self._connection
+
+    async def run(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run func(connection) in a thread while holding the connection lock."""
+        def locked():
+            with self._lock:
+                return func(self.connection)
+        with timed("db"):
+            return await asyncio.to_thread(locked)
+
+    async def transaction(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Like run(), inside BEGIN IMMEDIATE ... COMMIT (rolled back on error)."""
+        def wrapped(connection):
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(connection)
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            return result
+        return await self.run(wrapped)
+
+    def columns(self, table: str, requested: Sequence[str]) -> str:
+        """Validated, quoted column list for a SELECT ("*" passes through)."""
+        with self._lock:
+            self.connection  # Loads the table columns on first use
+        if list(requested) == ["*"]:
+            return "*"
+        unknown = [column for column in requested if column not in self._columns[table]]
+        if unknown:
+            raise ValueError(f"Unknown {table} columns: {', '.join(unknown)}")
+        return ", ".join(f'"{column}"' for column in requested)
+
+    def explain(self, sql: str, params: Sequence[Any] = ()) -> List[str]:
+        """EXPLAIN QUERY PLAN rows, to compare plans against Postgres EXPLAIN."""
+        with self._lock:
+            return [row["detail"] for row in self.connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+    return dict(row) if row is not None else None
+
+
+def _insert(connection: sqlite3.Connection, table: str, values: Dict[str, Any]) -> Dict[str, Any]:
+    columns = ", ".join(f'"{column}"' for column in values)
+    placeholders = ", ".join("?" for _ in values)
+    cursor = connection.execute(
+        f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) RETURNING *",
+        list(values.values())
+    )
+    return dict(cursor.fetchone())
+
+
+class SQLiteUserRepository(UserRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def get(self, email):
+        return await self.db.run(lambda c: _row(c.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()))
+
+    async def get_by_subscription_id(self, subscription_id):
+        return await self.db.run(lambda c: _row(
+            c.execute("SELECT * FROM users WHERE subscription_id = ? LIMIT 1", (subscription_id,)).fetchone()
+        ))
+
+    async def create(self, user):
+        return await self.db.run(lambda c: _insert(c, "users", user))
+
+    async def update(self, email, values):
+        self.db.columns("users", list(values))  # Validates the column names
+        assignments = ", ".join(f'"{column}" = ?' for column in values)
+        return await self.db.run(lambda c: _row(c.execute(
+            f"UPDATE users SET {assignments} WHERE email = ? RETURNING *",
+            [*values.values(), email]
+        ).fetchone()))
+
+
+class SQLiteSessionRepository(SessionRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def create(self, session):
+        return await self.db.run(lambda c: _insert(c, "sessions", {"id": str(uuid.uuid4()), **session}))
+
+    async def get(self, session_id, user_email, columns=("*",)):
+        selected = self.db.columns("sessions", columns)
+        return await self.db.run(lambda c: _row(c.execute(
+            f"SELECT {selected} FROM sessions WHERE id = ? AND user_email = ?", (session_id, user_email)
+        ).fetchone()))
+
+    async def list_with_counts(self, user_email, before_created_at=None, before_id=None, limit=100):
+        sql = """
+            SELECT s.id, s.name, s.context, s.created_at, count(r.id) AS recordings_count
+            FROM sessions s
+            LEFT JOIN recordings r ON r.session_id = s.id
+            WHERE s.user_email = ?
+              AND (? IS NULL OR s.created_at < ? OR (s.created_at = ? AND s.id < ?))
+            GROUP BY s.id
+            ORDER BY s.created_at DESC, s.id DESC
+            LIMIT ?
+        """
+        params = (user_email, before_created_at, before_created_at, before_created_at, before_id, limit)
+        return await self.db.run(lambda c: [dict(row) for row in c.execute(sql, params)])
+
+
+class SQLiteRecordingRepository(RecordingRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def get_with_owner(self, recording_id):
+        return await self.db.run(lambda c: _row(c.execute(
+            "SELECT r.*, s.user_email AS owner_email FROM recordings r "
+            "JOIN sessions s ON s.id = r.session_id WHERE r.id = ?",
+            (recording_id,)
+        ).fetchone()))
+
+    async def stats(self, session_id):
+        def query(c):
+            count = c.execute("SELECT count(*) FROM recordings WHERE session_id = ?", (session_id,)).fetchone()[0]
+            latest = c.execute(
+                'SELECT id, "timestamp" FROM recordings WHERE session_id = ? ORDER BY "timestamp" DESC, id DESC LIMIT 1',
+                (session_id,)
+            ).fetchone()
+            return {
+                "count": count,
+                "latest_id": latest["id"] if latest else None,
+                "latest_timestamp": latest["timestamp"] if latest else None
+            }
+        return await self.db.run(query)
+
+    async def list_page(self, session_id, columns, limit, before_timestamp=None, before_id=None, since=None):
+        selected = self.db.columns("recordings", columns)
+        sql = f"SELECT {selected} FROM recordings WHERE session_id = ?"
+        params: List[Any] = [session_id]
+        if since is not None:
+            sql += ' AND "timestamp" > ?'
+            params.append(since)
+        if before_timestamp is not None:
+            sql += ' AND ("timestamp" < ? OR ("timestamp" = ? AND id < ?))'
+            params += [before_timestamp, before_timestamp, before_id]
+        sql += ' ORDER BY "timestamp" DESC, id DESC LIMIT ?'
+        params.append(limit)
+        return await self.db.run(lambda c: [dict(row) for row in c.execute(sql, params)])
+
+    async def record_upload(self, user_email, session_id, recording, minutes):
+        def persist(c):
+            session = c.execute(
+                "SELECT context FROM sessions WHERE id = ? AND user_email = ?", (session_id, user_email)
+            ).fetchone()
+            if not session:
+                return None
+
+            stored = _insert(c, "recordings", {"id": str(uuid.uuid4()), **recording, "session_id": session_id})
+            _update_progress(c, user_email, session["context"], stored)
+            minutes_used = c.execute(
+                "UPDATE users SET minutes = COALESCE(minutes, 0) + ? WHERE email = ? RETURNING minutes",
+                (minutes, user_email)
+            ).fetchone()
+            recordings_count = c.execute(
+                "SELECT count(*) FROM recordings WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            return {
+                "recording": stored,
+                "recordings_count": recordings_count,
+                "minutes_used": minutes_used[0] if minutes_used else None
+            }
+        return await self.db.transaction(persist)
+
+
+class SQLitePaymentRepository(PaymentRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def insert_many(self, events):
+        rows = [
+            (e.get("order_id"), e.get("user_email"), e.get("timestamp"), e.get("event"), e.get("session_id"))
+            for e in events
+        ]
+        await self.db.transaction(lambda c: c.executemany(
+            'INSERT INTO payments (order_id, user_email, "timestamp", event, session_id) VALUES (?, ?, ?, ?, ?)',
+            rows
+        ))
+
+
+class SQLiteProAnalysisRepository(ProAnalysisRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def create(self, analysis):
+        values = {"id": str(uuid.uuid4()), **analysis}
+        if isinstance(values.get("result"), (dict, list)):
+            values["result"] = json.dumps(values["result"])
+        await self.db.run(lambda c: _insert(c, "pro_analyses", values))
+
+    async def consume_quota(self, user_email, period, limit):
+        def consume(c):
+            row = c.execute(
+                """
+                INSERT INTO pro_usage (user_email, period, used) VALUES (?, ?, 1)
+                ON CONFLICT (user_email, period) DO UPDATE SET used = used + 1 WHERE used < ?
+                RETURNING used
+                """,
+                (user_email, period, limit)
+            ).fetchone()
+            if row is not None:
+                return True, row[0]
+            current = c.execute(
+                "SELECT used FROM pro_usage WHERE user_email = ? AND period = ?", (user_email, period)
+            ).fetchone()
+            return False, current[0] if current else 0
+        return await self.db.transaction(consume)
+
+    async def release_quota(self, user_email, period):
+        row = await self.db.run(lambda c: c.execute(
+            "UPDATE pro_usage SET used = MAX(used - 1, 0) WHERE user_email = ? AND period = ? RETURNING used",
+            (user_email, period)
+        ).fetchone())
+        return row[0] if row else 0
+
+
+def _update_progress(c: sqlite3.Connection, user_email: str, context: Optional[str], recording: Dict[str, Any]):
+    """Python twin of update_progress (setup_progress.sql); runs inside the caller's transaction."""
+    for metric in PROGRESS_METRICS:
+        value = recording.get(metric)
+        if value is None:
+            continue
+        for scope in (ALL_CONTEXTS, context or "general"):
+            current = _row(c.execute(
+                "SELECT * FROM user_progress WHERE user_email = ? AND context = ? AND metric = ?",
+                (user_email, scope, metric)
+            ).fetchone())
+            if current:
+                current["recent"] = json.loads(current["recent"])
+            row = apply_observation(current, metric, float(value), recording.get("timestamp") or 0)
+            c.execute(
+                """
+                INSERT OR REPLACE INTO user_progress
+                    (user_email, context, metric, count, mean, ewma, recent, best, min, max, last_value, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    user_email, scope, metric, row["count"], row["mean"], row["ewma"], json.dumps(row["recent"]),
+                    row["best"], row["min"], row["max"], row["last_value"], row["updated_at"]
+                )
+            )
+
+
+class SQLiteProgressRepository(ProgressRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def get(self, user_email):
+        def query(c):
+            rows = [dict(row) for row in c.execute("SELECT * FROM user_progress WHERE user_email = ?", (user_email,))]
+            for row in rows:
+                row["recent"] = json.loads(row["recent"])
+            return rows
+        return await self.db.run(query)
+
+    async def series(self, user_email, metric, context=None, buckets=200):
+        """Same buckets as progress_series (setup_progress.sql)."""
+        selected = self.db.columns("recordings", [metric])
+        where = f"s.user_email = ? AND r.{selected} IS NOT NULL"
+        params: List[Any] = [buckets, user_email]
+        if context:
+            where += " AND s.context = ?"
+            params.append(context)
+        sql = (
+            f'WITH bucketed AS (SELECT r."timestamp" AS ts, r.{selected} AS v, '
+            f'ntile(?) OVER (ORDER BY r."timestamp", r.id) AS bucket '
+            f"FROM recordings r JOIN sessions s ON s.id = r.session_id WHERE {where}) "
+            "SELECT MIN(ts), AVG(v), MIN(v), MAX(v), COUNT(*) FROM bucketed GROUP BY bucket ORDER BY bucket"
+        )
+        return await self.db.run(lambda c: [
+            {"timestamp": row[0], "value": row[1], "min": row[2], "max": row[3], "count": row[4]}
+            for row in c.execute(sql, params)
+        ])
+
+
+class SQLiteStorage(Storage):
+    backend = "sqlite"
+
+    def __init__(self, path: str):
+        self.db = SQLiteDatabase(path)
+        super().__init__(
+            users=SQLiteUserRepository(self.db),
+            sessions=SQLiteSessionRepository(self.db),
+            recordings=SQLiteRecordingRepository(self.db),
+            payments=SQLitePaymentRepository(self.db),
+            pro_analyses=SQLiteProAnalysisRepository(self.db),
+            progress=SQLiteProgressRepository(self.db)
+        )
+
+    async def close(self):
+        await asyncio.to_thread(self.db.close)
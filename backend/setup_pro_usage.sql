@@ -0,0 +1,83 @@
+-- ==============================================================================
+-- Pro Usage Counter for Supabase
+-- Run this in Supabase SQL Editor to enforce the monthly Pro analysis quota
+-- Compatible with existing LucidSpeak schema
+-- ==============================================================================
+
+-- One row per user and calendar month ('YYYY-MM', UTC)
+CREATE TABLE IF NOT EXISTS public.pro_usage (
+    user_email text NOT NULL,
+    period text NOT NULL,
+    used integer NOT NULL DEFAULT 0,
+    updated_at timestamp with time zone DEFAULT now(),
+
+    CONSTRAINT pro_usage_pkey PRIMARY KEY (user_email, period),
+    CONSTRAINT pro_usage_user_email_fkey FOREIGN KEY (user_email) REFERENCES public.users(email) ON DELETE CASCADE
+);
+
+ALTER TABLE public.pro_usage ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can manage pro usage" ON public.pro_usage
+    FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+-- Atomically takes one analysis from the user's monthly quota.
+-- The conditional upsert only increments while used < p_limit, so concurrent
+-- submissions can never overshoot the quota.
+CREATE OR REPLACE FUNCTION public.consume_pro_quota(
+    p_user_email text,
+    p_period text,
+    p_limit integer
+)
+RETURNS TABLE (allowed boolean, used integer)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_used integer;
+BEGIN
+    INSERT INTO public.pro_usage AS u (user_email, period, used)
+    VALUES (p_user_email, p_period, 1)
+    ON CONFLICT (user_email, period) DO UPDATE
+        SET used = u.used + 1, updated_at = now()
+        WHERE u.used < p_limit
+    RETURNING u.used INTO v_used;
+
+    IF v_used IS NOT NULL THEN
+        RETURN QUERY SELECT true, v_used;
+    ELSE
+        RETURN QUERY SELECT false, u.used FROM public.pro_usage u
+        WHERE u.user_email = p_user_email AND u.period = p_period;
+    END IF;
+END;
+$$;
+
+-- Gives back one analysis (the job could not be queued after consuming)
+CREATE OR REPLACE FUNCTION public.release_pro_quota(
+    p_user_email text,
+    p_period text
+)
+RETURNS integer
+LANGUAGE sql
+AS $$
+    UPDATE public.pro_usage
+    SET used = GREATEST(used - 1, 0), updated_at = now()
+    WHERE user_email = p_user_email AND period = p_period
+    RETURNING used;
+$$;
+
+-- Backfill the current month from existing pro_analyses rows
+INSERT INTO public.pro_usage (user_email, period, used)
+SELECT user_email, to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM'), count(*)
+FROM public.pro_analyses
+WHERE created_at >= extract(epoch FROM date_trunc('month', now() AT TIME ZONE 'UTC'))
+GROUP BY user_email
+ON CONFLICT (user_email, period) DO NOTHING;
+
+-- ==============================================================================
+-- Notes:
+-- 1. Replaces counting pro_analyses rows on every request (cost grew with history)
+-- 2. Old periods can be deleted at any time; they are not read by the API
+-- 3. The functions run with the caller's privileges; the backend uses service_role
+-- ==============================================================================
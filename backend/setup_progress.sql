@@ -0,0 +1,159 @@
+-- ==============================================================================
+-- Progress Aggregates for Supabase
+-- Run this in Supabase SQL Editor BEFORE setup_record_upload.sql, which calls
+-- update_progress for every stored recording
+-- Compatible with existing LucidSpeak schema
+-- ==============================================================================
+
+-- One row per user, context and metric. context '*' aggregates all sessions.
+CREATE TABLE IF NOT EXISTS public.user_progress (
+    user_email text NOT NULL,
+    context text NOT NULL,
+    metric text NOT NULL,
+    count integer NOT NULL DEFAULT 0,
+    mean double precision,            -- running mean over all recordings
+    ewma double precision,            -- exponentially weighted mean (alpha = p_alpha)
+    recent double precision[] NOT NULL DEFAULT '{}',  -- last p_window values, oldest first
+    best double precision,            -- personal best (direction depends on the metric)
+    min double precision,
+    max double precision,
+    last_value double precision,
+    updated_at bigint,
+
+    CONSTRAINT user_progress_pkey PRIMARY KEY (user_email, context, metric),
+    CONSTRAINT user_progress_user_email_fkey FOREIGN KEY (user_email) REFERENCES public.users(email) ON DELETE CASCADE
+);
+
+ALTER TABLE public.user_progress ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can manage progress" ON public.user_progress
+    FOR ALL
+    TO service_role
+    USING (true)
+    WITH CHECK (true);
+
+-- Folds one recording into the user's aggregates (overall and for its context).
+-- Personal bests: pace closest to 145 wpm, highest pitch variation, fewest
+-- disfluencies and hedges. Keep in sync with services/progress.py.
+CREATE OR REPLACE FUNCTION public.update_progress(
+    p_user_email text,
+    p_context text,
+    p_recording jsonb,
+    p_window integer DEFAULT 10,
+    p_alpha double precision DEFAULT 0.2
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_metric text;
+    v_value double precision;
+    v_scope text;
+    v_now bigint := extract(epoch FROM now())::bigint;
+BEGIN
+    FOREACH v_metric IN ARRAY ARRAY['pace', 'pitch_variation', 'disfluencies_per_minute', 'hedge_count'] LOOP
+        v_value := (p_recording->>v_metric)::double precision;
+        CONTINUE WHEN v_value IS NULL;
+
+        FOREACH v_scope IN ARRAY ARRAY['*', COALESCE(p_context, 'general')] LOOP
+            INSERT INTO public.user_progress AS p (
+                user_email, context, metric, count, mean, ewma, recent, best, min, max, last_value, updated_at
+            )
+            VALUES (
+                p_user_email, v_scope, v_metric, 1, v_value, v_value, ARRAY[v_value],
+                v_value, v_value, v_value, v_value, v_now
+            )
+            ON CONFLICT (user_email, context, metric) DO UPDATE SET
+                count = p.count + 1,
+                mean = p.mean + (v_value - p.mean) / (p.count + 1),
+                ewma = p_alpha * v_value + (1 - p_alpha) * p.ewma,
+                recent = (p.recent || v_value)[GREATEST(1, cardinality(p.recent) + 2 - p_window):],
+                best = CASE v_metric
+                    WHEN 'pace' THEN CASE WHEN abs(v_value - 145) < abs(p.best - 145) THEN v_value ELSE p.best END
+                    WHEN 'pitch_variation' THEN GREATEST(p.best, v_value)
+                    ELSE LEAST(p.best, v_value)
+                END,
+                min = LEAST(p.min, v_value),
+                max = GREATEST(p.max, v_value),
+                last_value = v_value,
+                updated_at = v_now;
+        END LOOP;
+    END LOOP;
+END;
+$$;
+
+-- Backfill from existing recordings (oldest first so EWMA and windows are right)
+DO $$
+DECLARE
+    r record;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM public.user_progress) THEN
+        FOR r IN
+            SELECT s.user_email, s.context, to_jsonb(rec) AS recording
+            FROM public.recordings rec
+            JOIN public.sessions s ON s.id = rec.session_id
+            ORDER BY rec."timestamp", rec.id
+        LOOP
+            PERFORM public.update_progress(r.user_email, r.context, r.recording);
+        END LOOP;
+    END IF;
+END;
+$$;
+
+-- Backs GET /progress/series: a user's recordings in time order
+CREATE INDEX IF NOT EXISTS idx_recordings_timestamp ON public.recordings("timestamp");
+
+-- One metric of a user's recordings, oldest first, split into p_buckets
+-- buckets of (almost) equal size; returns at most p_buckets rows, so the
+-- chart never downloads the whole history. Keep in sync with
+-- SQLiteProgressRepository.series.
+CREATE OR REPLACE FUNCTION public.progress_series(
+    p_user_email text,
+    p_metric text,
+    p_context text DEFAULT NULL,
+    p_buckets integer DEFAULT 200
+)
+RETURNS TABLE (
+    bucket_start bigint,       -- timestamp of the bucket's first recording
+    mean_value double precision,
+    min_value double precision,
+    max_value double precision,
+    recordings integer
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH points AS (
+        SELECT
+            rec."timestamp" AS ts,
+            CASE p_metric
+                WHEN 'pace' THEN rec.pace::double precision
+                WHEN 'pitch_variation' THEN rec.pitch_variation::double precision
+                WHEN 'disfluencies_per_minute' THEN rec.disfluencies_per_minute::double precision
+                WHEN 'hedge_count' THEN rec.hedge_count::double precision
+            END AS v,
+            rec.id
+        FROM public.recordings rec
+        JOIN public.sessions s ON s.id = rec.session_id
+        WHERE s.user_email = p_user_email
+          AND (p_context IS NULL OR s.context = p_context)
+    ),
+    bucketed AS (
+        SELECT ts, v, ntile(p_buckets) OVER (ORDER BY ts, id) AS bucket
+        FROM points
+        WHERE v IS NOT NULL
+    )
+    SELECT min(ts)::bigint, avg(v), min(v), max(v), count(*)::integer
+    FROM bucketed
+    GROUP BY bucket
+    ORDER BY bucket;
+$$;
+
+-- ==============================================================================
+-- Notes:
+-- 1. GET /progress reads at most (contexts + 1) * 4 rows, whatever the history size
+-- 2. Rolling averages are computed from "recent" when read
+-- 3. progress_series returns (mean, min, max) per bucket: a chart can draw the
+--    band so single bad takes stay visible after downsampling
+-- 4. The functions run with the caller's privileges; the backend uses service_role
+-- ==============================================================================
@@ -0,0 +1,76 @@
+-- ==============================================================================
+-- Upload Persistence RPC for Supabase
+-- Run this in Supabase SQL Editor to persist /upload-audio results in one call
+-- (after setup_progress.sql, which defines update_progress)
+-- Compatible with existing LucidSpeak schema
+-- ==============================================================================
+
+-- Key of the normalized copy in the audio store (services/audio_store.py)
+ALTER TABLE public.recordings ADD COLUMN IF NOT EXISTS audio_key text;
+
+-- Stores an analysed recording in a single transaction:
+--   1. checks that the session belongs to the user (NULL result otherwise)
+--   2. inserts the recording
+--   3. increments users.minutes in place (no read-modify-write in the API)
+--   4. folds the recording into the user's progress aggregates
+-- and returns the new recording plus summary counters as JSON.
+CREATE OR REPLACE FUNCTION public.record_upload(
+    p_user_email text,
+    p_session_id uuid,
+    p_recording jsonb,
+    p_minutes integer
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_recording public.recordings;
+    v_minutes integer;
+    v_recordings_count bigint;
+    v_context text;
+BEGIN
+    -- Lock the session row so concurrent uploads to it serialize on the counters
+    SELECT context INTO v_context
+    FROM public.sessions
+    WHERE id = p_session_id AND user_email = p_user_email
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO public.recordings (
+        session_id, pace, pitch_variation, disfluencies_per_minute, hedge_count,
+        total_words, duration, transcript, insights_summary, "timestamp", audio_key
+    )
+    SELECT
+        p_session_id, r.pace, r.pitch_variation, r.disfluencies_per_minute, r.hedge_count,
+        r.total_words, r.duration, r.transcript, r.insights_summary, r."timestamp", r.audio_key
+    FROM jsonb_populate_record(NULL::public.recordings, p_recording) r
+    RETURNING * INTO v_recording;
+
+    PERFORM public.update_progress(p_user_email, v_context, p_recording);
+
+    UPDATE public.users
+    SET minutes = COALESCE(minutes, 0) + p_minutes
+    WHERE email = p_user_email
+    RETURNING minutes INTO v_minutes;
+
+    SELECT count(*) INTO v_recordings_count
+    FROM public.recordings
+    WHERE session_id = p_session_id;
+
+    RETURN jsonb_build_object(
+        'recording', to_jsonb(v_recording),
+        'recordings_count', v_recordings_count,
+        'minutes_used', v_minutes
+    );
+END;
+$$;
+
+-- ==============================================================================
+-- Notes:
+-- 1. Column types come from the recordings table via jsonb_populate_record
+-- 2. The count uses idx_recordings_session_id (setup_session_listing.sql)
+-- 3. The function runs with the caller's privileges; the backend uses service_role
+-- ==============================================================================
@@ -0,0 +1,57 @@
+-- ==============================================================================
+-- Session Listing RPC for Supabase
+-- Run this in Supabase SQL Editor to serve /sessions/list with a single query
+-- Compatible with existing LucidSpeak schema
+-- ==============================================================================
+
+-- Returns one page of a user's sessions with their recording counts.
+-- Pages are ordered newest first; pass the created_at and id of the last
+-- session of the previous page as the cursor (both NULL for the first page).
+CREATE OR REPLACE FUNCTION public.list_sessions_with_counts(
+    p_user_email text,
+    p_before_created_at bigint DEFAULT NULL,
+    p_before_id uuid DEFAULT NULL,
+    p_limit integer DEFAULT 100
+)
+RETURNS TABLE (
+    id uuid,
+    name text,
+    context text,
+    created_at bigint,
+    recordings_count bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        s.id,
+        s.name,
+        s.context,
+        s.created_at,
+        count(r.id) AS recordings_count
+    FROM public.sessions s
+    LEFT JOIN public.recordings r ON r.session_id = s.id
+    WHERE s.user_email = p_user_email
+      AND (
+          p_before_created_at IS NULL
+          OR s.created_at < p_before_created_at
+          OR (s.created_at = p_before_created_at AND s.id < p_before_id)
+      )
+    GROUP BY s.id
+    ORDER BY s.created_at DESC, s.id DESC
+    LIMIT p_limit;
+$$;
+
+-- Indexes backing the listing: sessions by owner in page order, recordings by session
+CREATE INDEX IF NOT EXISTS idx_sessions_user_created ON public.sessions(user_email, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_recordings_session_id ON public.recordings(session_id);
+
+-- Backs GET /sessions/{id}: recordings of a session in page order (newest first)
+CREATE INDEX IF NOT EXISTS idx_recordings_session_timestamp ON public.recordings(session_id, "timestamp" DESC, id DESC);
+
+-- ==============================================================================
+-- Notes:
+-- 1. Replaces one count(*) query per session (N+1) with one grouped query
+-- 2. The API exposes the cursor as "<created_at>:<id>" and passes both parts here
+-- 3. The function runs with the caller's privileges; the backend uses service_role
+-- ==============================================================================
@@ -0,0 +1,58 @@
+/**
+ * AudioWorklet del análisis en vivo (src/services/liveAnalysis.js)
+ * Convierte el micrófono a PCM16 mono a 16 kHz (lo que espera /ws/live-analysis)
+ * y lo envía al hilo principal en bloques de ~250 ms
+ */
+
+const TARGET_SAMPLE_RATE = 16000;
+const CHUNK_SAMPLES = TARGET_SAMPLE_RATE / 4;
+
+class LivePcmProcessor extends AudioWorkletProcessor {
+  constructor() {
+    super();
+    // `sampleRate` es la frecuencia del AudioContext (44.1 o 48 kHz normalmente)
+    this.ratio = sampleRate / TARGET_SAMPLE_RATE;
+    this.position = 0;
+    this.sum = 0;
+    this.count = 0;
+    this.buffer = new Int16Array(CHUNK_SAMPLES);
+    this.length = 0;
+
+    this.port.onmessage = (event) => {
+      if (event.data === 'flush') {
+        this.flush();
+        this.port.postMessage({ type: 'flushed' });
+      }
+    };
+  }
+
+  process(inputs) {
+    const channel = inputs[0] && inputs[0][0];
+    if (!channel) return true;
+
+    for (let i = 0; i < channel.length; i++) {
+      // Promedia las muestras de cada periodo de salida (filtro anti-aliasing simple)
+      this.sum += channel[i];
+      this.count++;
+      this.position++;
+      if (this.position >= this.ratio) {
+        this.position -= this.ratio;
+        const sample = Math.max(-1, Math.min(1, this.sum / this.count));
+        this.buffer[this.length++] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+        this.sum = 0;
+        this.count = 0;
+        if (this.length === CHUNK_SAMPLES) this.flush();
+      }
+    }
+    return true;
+  }
+
+  flush() {
+    if (!this.length) return;
+    const chunk = this.buffer.slice(0, this.length);
+    this.port.postMessage({ type: 'audio', buffer: chunk.buffer }, [chunk.buffer]);
+    this.length = 0;
+  }
+}
+
+registerProcessor('live-pcm-processor', LivePcmProcessor);
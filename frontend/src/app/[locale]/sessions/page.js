@@ -1,6 +1,7 @@
 "use client";
 import { useState, useEffect } from 'react';
 import { useAuth } from '@/context/AuthContext';
+import { fetchAllSessions, fetchSessionWithRecordings } from '@/services/sessions';
 import { useRouter, usePathname } from 'next/navigation';
 import { motion, AnimatePresence } from 'framer-motion';
 import { FaArrowUp, FaArrowDown, FaMinus, FaBrain, FaCheckCircle, FaLightbulb, FaChevronLeft, FaTimes } from 'react-icons/fa';
@@ -30,17 +31,10 @@ export default function SessionsPage() {
     const loadSessions = async () => {
         setIsLoading(true);
         try {
-            const response = await fetch(`${apiBase}/sessions/list`, {
-                headers: {
-                    'Authorization': `Bearer ${token}`
-                }
-            });
-            
-            if (response.ok) {
-                const data = await response.json();
-                const sortedSessions = (data.sessions || []).sort((a, b) => b.created_at - a.created_at);
-                setSessions(sortedSessions);
-            }
+            // All pages: accounts with many sessions don't lose the older ones
+            const allSessions = await fetchAllSessions(apiBase, token);
+            const sortedSessions = allSessions.sort((a, b) => b.created_at - a.created_at);
+            setSessions(sortedSessions);
         } catch (error) {
             console.error("Error loading sessions:", error);
         } finally {
@@ -50,16 +44,8 @@ export default function SessionsPage() {
 
     const loadSessionDetails = async (sessionId) => {
         try {
-            const response = await fetch(`${apiBase}/sessions/${sessionId}`, {
-                headers: {
-                    'Authorization': `Bearer ${token}`
-                }
-            });
-            
-            if (response.ok) {
-                const data = await response.json();
-                setSelectedSession(data);
-            }
+            const data = await fetchSessionWithRecordings(apiBase, token, sessionId);
+            setSelectedSession(data);
         } catch (error) {
             console.error("Error loading session details:", error);
         }
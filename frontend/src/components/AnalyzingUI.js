@@ -49,15 +49,26 @@ const AnalyzingUI = ({ audioBlob, sessionId, onAnalysisComplete, locale = 'es' }
                 clearInterval(pollIntervalRef.current);
             }
 
+            // ETag of the last status seen; unchanged polls come back as an empty 304
+            let lastEtag = null;
+
             pollIntervalRef.current = setInterval(async () => {
                 try {
-                    const response = await fetch(`${apiBase}/api/job/${jId}`, {
-                        headers: {
-                            'Authorization': `Bearer ${token}`
-                        }
-                    });
+                    const headers = {
+                        'Authorization': `Bearer ${token}`
+                    };
+                    if (lastEtag) {
+                        headers['If-None-Match'] = lastEtag;
+                    }
+
+                    const response = await fetch(`${apiBase}/api/job/${jId}`, { headers });
+
+                    if (response.status === 304) {
+                        return;
+                    }
 
                     if (response.ok) {
+                        lastEtag = response.headers.get('ETag');
                         const jobStatus = await response.json();
                         setProgress(jobStatus.progress || 0);
                         setStatusMessage(getStatusMessage(jobStatus.progress || 0));
@@ -66,10 +77,28 @@ const AnalyzingUI = ({ audioBlob, sessionId, onAnalysisComplete, locale = 'es' }
                             clearInterval(pollIntervalRef.current);
                             setProgress(100);
                             setStatusMessage('Análisis completado');
+
+                            // El resultado completo se pide una sola vez, al terminar
+                            const resultResponse = await fetch(`${apiBase}/api/job/${jId}/result`, {
+                                headers: {
+                                    'Authorization': `Bearer ${token}`
+                                }
+                            });
+                            if (!resultResponse.ok) {
+                                // 404/410: el job caducó o ya no está en memoria
+                                const errorData = await resultResponse.json().catch(() => ({}));
+                                console.error('[ERROR] Failed to fetch job result:', resultResponse.status);
+                                onAnalysisComplete({
+                                    error: true,
+                                    message: errorData.detail || `Error del servidor: ${resultResponse.status}`
+                                });
+                                return;
+                            }
+                            const { result } = await resultResponse.json();
                             
                             // Pequeña pausa antes de mostrar resultados
                             await new Promise(resolve => setTimeout(resolve, 500));
-                            onAnalysisComplete(jobStatus.result);
+                            onAnalysisComplete(result);
                             
                         } else if (jobStatus.status === 'failed') {
                             clearInterval(pollIntervalRef.current);
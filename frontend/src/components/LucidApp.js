@@ -8,6 +8,7 @@ import ResultsUI from './ResultsUI';
 import SessionSetupModal from './SessionSetupModal';
 import SessionDetailsModal from './SessionDetailsModal';
 import { useAuth } from '@/context/AuthContext';
+import { fetchAllSessions, fetchSessionWithRecordings } from '@/services/sessions';
 
 const LucidApp = ({ locale = 'es' }) => {
     const [appState, setAppState] = useState('sessions');
@@ -36,17 +37,10 @@ const LucidApp = ({ locale = 'es' }) => {
     const loadSessions = async () => {
         setIsLoadingSessions(true);
         try {
-            const response = await fetch(`${apiBase}/sessions/list`, {
-                headers: {
-                    'Authorization': `Bearer ${token}`
-                }
-            });
-            
-            if (response.ok) {
-                const data = await response.json();
-                const sortedSessions = (data.sessions || []).sort((a, b) => b.created_at - a.created_at);
-                setSessions(sortedSessions);
-            }
+            // All pages: accounts with many sessions don't lose the older ones
+            const allSessions = await fetchAllSessions(apiBase, token);
+            const sortedSessions = allSessions.sort((a, b) => b.created_at - a.created_at);
+            setSessions(sortedSessions);
         } catch (error) {
             console.error("Error loading sessions:", error);
         } finally {
@@ -85,16 +79,8 @@ const LucidApp = ({ locale = 'es' }) => {
 
     const loadCurrentSession = async (sessionId) => {
         try {
-            const response = await fetch(`${apiBase}/sessions/${sessionId}`, {
-                headers: {
-                    'Authorization': `Bearer ${token}`
-                }
-            });
-            
-            if (response.ok) {
-                const data = await response.json();
-                setCurrentSessionData(data);
-            }
+            const data = await fetchSessionWithRecordings(apiBase, token, sessionId);
+            setCurrentSessionData(data);
         } catch (error) {
             console.error("Error loading session:", error);
         }
@@ -135,17 +121,9 @@ const LucidApp = ({ locale = 'es' }) => {
 
     const viewSessionDetails = async (sessionId) => {
         try {
-            const response = await fetch(`${apiBase}/sessions/${sessionId}`, {
-                headers: {
-                    'Authorization': `Bearer ${token}`
-                }
-            });
-            
-            if (response.ok) {
-                const data = await response.json();
-                setSelectedSessionForDetails(data);
-                setShowDetailsModal(true);
-            }
+            const data = await fetchSessionWithRecordings(apiBase, token, sessionId);
+            setSelectedSessionForDetails(data);
+            setShowDetailsModal(true);
         } catch (error) {
             console.error("Error loading session details:", error);
         }
@@ -380,6 +358,9 @@ const LucidApp = ({ locale = 'es' }) => {
                         key="recording"
                         setAppState={setAppState}
                         setAudioBlob={setAudioBlob}
+                        sessionId={currentSessionId}
+                        locale={locale}
+                        onAnalysisComplete={handleAnalysisComplete}
                     />
                 )}
                 
@@ -3,18 +3,25 @@ import { useRef, useEffect, useState } from 'react';
 import { motion } from 'framer-motion';
 import { FaStop, FaMicrophone } from 'react-icons/fa';
 import { useTranslations } from 'next-intl';
+import { useAuth } from '@/context/AuthContext';
+import { startLiveAnalysis } from '@/services/liveAnalysis';
 
-const RecordingUI = ({ setAppState, setAudioBlob }) => {
+const RecordingUI = ({ setAppState, setAudioBlob, sessionId, locale = 'es', onAnalysisComplete }) => {
     const t = useTranslations('Recording');
+    const { token, apiBase } = useAuth();
     const mediaRecorderRef = useRef(null);
     const audioChunksRef = useRef([]);
     const streamRef = useRef(null);
+    const liveRef = useRef(null);
     const hasStartedRef = useRef(false);
-    const MAX_DURATION_SECONDS = 900; // 15 minutos
+    const MAX_DURATION_SECONDS = 600; // 10 minutos (MAX_DURATION_SECONDS del backend por defecto)
 
     const [elapsedTime, setElapsedTime] = useState(0);
     const [isRecording, setIsRecording] = useState(false);
     const [isRequestingPermission, setIsRequestingPermission] = useState(false);
+    const [isFinishing, setIsFinishing] = useState(false);
+    const [liveMetrics, setLiveMetrics] = useState(null);
+    const [maxDuration, setMaxDuration] = useState(MAX_DURATION_SECONDS);
     const timerRef = useRef(null);
     
     const stopTimer = () => {
@@ -55,7 +62,32 @@ const RecordingUI = ({ setAppState, setAudioBlob }) => {
             const media = new MediaRecorder(streamData, { mimeType: "audio/webm" });
             mediaRecorderRef.current = media;
 
-            media.onstop = () => {
+            media.onstop = async () => {
+                // Con análisis en vivo el resultado ya está casi listo
+                if (liveRef.current) {
+                    setIsFinishing(true);
+                    try {
+                        const result = await liveRef.current.stop();
+                        console.log('✅ Live analysis complete');
+                        onAnalysisComplete(result);
+                        return;
+                    } catch (err) {
+                        if (err.stopSent) {
+                            // El backend recibió toda la grabación y puede haberla guardado:
+                            // subirla otra vez la duplicaría
+                            console.error('❌ Live analysis result not received:', err.message);
+                            onAnalysisComplete({
+                                error: true,
+                                message: 'No recibimos el resultado del análisis. Si la grabación se guardó, aparecerá en la sesión.'
+                            });
+                            return;
+                        }
+                        console.warn('⚠️ Live analysis failed, uploading the recording instead:', err.message);
+                    } finally {
+                        liveRef.current = null;
+                    }
+                }
+
                 console.log('✅ Recording stopped, creating blob...');
                 const audioBlob = new Blob(audioChunksRef.current, { type: "audio/webm" });
                 console.log(`📦 Blob size: ${audioBlob.size} bytes`);
@@ -69,6 +101,25 @@ const RecordingUI = ({ setAppState, setAudioBlob }) => {
                 audioChunksRef.current.push(event.data);
             };
 
+            // Análisis en vivo en paralelo; si no está disponible se sube la grabación al terminar
+            let maxSeconds = MAX_DURATION_SECONDS;
+            try {
+                liveRef.current = await startLiveAnalysis(streamData, {
+                    apiBase,
+                    token,
+                    sessionId,
+                    locale,
+                    onPartial: setLiveMetrics
+                });
+                console.log('📡 Live analysis connected');
+                // El backend corta la grabación en su MAX_DURATION_SECONDS
+                maxSeconds = liveRef.current.maxSeconds || MAX_DURATION_SECONDS;
+                setMaxDuration(maxSeconds);
+            } catch (err) {
+                console.warn('⚠️ Live analysis unavailable:', err.message);
+                liveRef.current = null;
+            }
+
             media.start();
             setIsRecording(true);
             setIsRequestingPermission(false);
@@ -80,7 +131,7 @@ const RecordingUI = ({ setAppState, setAudioBlob }) => {
                 const elapsed = Date.now() - startTime;
                 setElapsedTime(elapsed);
                 
-                if (elapsed >= MAX_DURATION_SECONDS * 1000) {
+                if (elapsed >= maxSeconds * 1000) {
                     console.log('⏰ Max duration reached, stopping...');
                     if (mediaRecorderRef.current && mediaRecorderRef.current.state === 'recording') {
                         mediaRecorderRef.current.stop();
@@ -108,6 +159,11 @@ const RecordingUI = ({ setAppState, setAudioBlob }) => {
                 });
             }
             
+            if (liveRef.current) {
+                liveRef.current.close();
+                liveRef.current = null;
+            }
+            
             hasStartedRef.current = false;
         };
     }, []);
@@ -115,7 +171,7 @@ const RecordingUI = ({ setAppState, setAudioBlob }) => {
     const elapsedSeconds = Math.floor(elapsedTime / 1000);
     const minutes = Math.floor(elapsedSeconds / 60);
     const seconds = elapsedSeconds % 60;
-    const remainingSeconds = MAX_DURATION_SECONDS - elapsedSeconds;
+    const remainingSeconds = Math.max(0, maxDuration - elapsedSeconds);
     const remainingMinutes = Math.floor(remainingSeconds / 60);
     const remainingSecondsDisplay = remainingSeconds % 60;
 
@@ -155,7 +211,7 @@ const RecordingUI = ({ setAppState, setAudioBlob }) => {
                     </span>
                 </motion.button>
                 <p className="text-slate-500 text-sm mt-4">
-                    Duración máxima: 15 minutos
+                    Duración máxima: 10 minutos
                 </p>
             </motion.div>
         );
@@ -175,6 +231,20 @@ const RecordingUI = ({ setAppState, setAudioBlob }) => {
         );
     }
 
+    if (isFinishing) {
+        // Live analysis: only the last seconds are left
+        return (
+            <motion.div
+                initial={{ opacity: 0 }}
+                animate={{ opacity: 1 }}
+                className="flex flex-col items-center justify-center text-center w-full"
+            >
+                <div className="w-16 h-16 border-4 border-sky-500 border-t-transparent rounded-full animate-spin mb-4"></div>
+                <p className="text-slate-400">Terminando el análisis...</p>
+            </motion.div>
+        );
+    }
+
     // Recording in progress
     return (
         <motion.div
@@ -206,6 +276,22 @@ const RecordingUI = ({ setAppState, setAudioBlob }) => {
             <p className="text-slate-500 text-sm mt-6">
                 Tiempo restante: {String(remainingMinutes).padStart(2, '0')}:{String(remainingSecondsDisplay).padStart(2, '0')}
             </p>
+            {liveMetrics && (
+                <div className="mt-6 grid grid-cols-3 gap-4 text-center">
+                    <div>
+                        <p className="text-2xl font-bold text-sky-400">{liveMetrics.pace}</p>
+                        <p className="text-slate-500 text-xs">palabras/min</p>
+                    </div>
+                    <div>
+                        <p className="text-2xl font-bold text-sky-400">{liveMetrics.disfluencies_per_minute}</p>
+                        <p className="text-slate-500 text-xs">muletillas/min</p>
+                    </div>
+                    <div>
+                        <p className="text-2xl font-bold text-sky-400">{liveMetrics.pauses.count}</p>
+                        <p className="text-slate-500 text-xs">pausas (máx. {liveMetrics.pauses.longest_seconds}s)</p>
+                    </div>
+                </div>
+            )}
         </motion.div>
     );
 };
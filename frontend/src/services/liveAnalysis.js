@@ -0,0 +1,163 @@
+/**
+ * Live Analysis Service
+ * Envía el audio al backend mientras se graba (/ws/live-analysis), que lo
+ * transcribe y analiza por tramos; al detener, el resultado llega casi al
+ * instante porque casi todo el trabajo ya está hecho
+ */
+
+const READY_TIMEOUT = 5 * 1000;   // Conexión y autenticación (la grabación espera)
+const FINAL_TIMEOUT = 60 * 1000;  // Análisis del último tramo y guardado
+
+class LiveAnalysisSession {
+  /**
+   * @param {Object} options
+   * @param {string} options.apiBase - URL base del backend
+   * @param {string} options.token - Token JWT del usuario
+   * @param {string} options.sessionId - Sesión a la que se añade la grabación
+   * @param {string} options.locale - Idioma de los insights
+   * @param {Function} options.onPartial - Recibe las métricas parciales (ritmo, muletillas, pausas)
+   */
+  constructor({ apiBase, token, sessionId, locale, onPartial }) {
+    this.apiBase = apiBase;
+    this.token = token;
+    this.sessionId = sessionId;
+    this.locale = locale;
+    this.onPartial = onPartial;
+    this.socket = null;
+    this.context = null;
+    this.node = null;
+    this.stopSent = false;
+    this.maxSeconds = null;  // Duración máxima del backend (mensaje ready)
+    this.finalResult = new Promise((resolve, reject) => {
+      this.resolveFinal = resolve;
+      this.rejectFinal = reject;
+    });
+    this.finalResult.catch(() => {});  // Se consulta en stop()
+  }
+
+  /**
+   * Conecta, se autentica y empieza a enviar el audio del stream
+   * @param {MediaStream} stream - Stream del micrófono (el mismo que usa MediaRecorder)
+   */
+  async start(stream) {
+    await this.connect();
+
+    this.context = new AudioContext();
+    await this.context.audioWorklet.addModule('/live-pcm-processor.js');
+    const source = this.context.createMediaStreamSource(stream);
+    this.node = new AudioWorkletNode(this.context, 'live-pcm-processor', { numberOfOutputs: 0 });
+    this.node.port.onmessage = ({ data }) => {
+      if (data.type === 'audio' && this.socket.readyState === WebSocket.OPEN) {
+        this.socket.send(data.buffer);
+      } else if (data.type === 'flushed' && this.resolveFlush) {
+        this.resolveFlush();
+      }
+    };
+    source.connect(this.node);
+  }
+
+  connect() {
+    return new Promise((resolve, reject) => {
+      const timeout = setTimeout(() => reject(new Error('Live analysis: timeout')), READY_TIMEOUT);
+      this.socket = new WebSocket(`${this.apiBase.replace(/^http/, 'ws')}/ws/live-analysis`);
+
+      this.socket.onopen = () => {
+        // El token va en el primer mensaje: el navegador no permite cabeceras en WebSocket
+        this.socket.send(JSON.stringify({
+          type: 'start',
+          token: this.token,
+          session_id: this.sessionId,
+          locale: this.locale
+        }));
+      };
+
+      this.socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'ready') {
+          clearTimeout(timeout);
+          this.maxSeconds = message.max_seconds;
+          resolve();
+        } else if (message.type === 'partial') {
+          this.onPartial?.(message);
+        } else if (message.type === 'final') {
+          this.resolveFinal(message.result);
+        } else if (message.type === 'error') {
+          clearTimeout(timeout);
+          const error = new Error(message.detail || 'Live analysis failed');
+          error.stopSent = this.stopSent;
+          reject(error);
+          this.rejectFinal(error);
+        }
+      };
+
+      this.socket.onclose = () => {
+        clearTimeout(timeout);
+        const error = new Error('Live analysis: connection closed');
+        error.stopSent = this.stopSent;
+        reject(error);
+        this.rejectFinal(error);  // Sin efecto si el resultado ya llegó
+      };
+    });
+  }
+
+  /**
+   * Envía el audio pendiente y espera el resultado final (mismo formato que /upload-audio/)
+   * Si falla, el error lleva `stopSent`: con stop enviado el backend puede haber
+   * guardado la grabación aunque no llegue el resultado, así que no debe subirse otra vez
+   * @returns {Promise<Object>}
+   */
+  async stop() {
+    try {
+      if (this.node && this.socket.readyState === WebSocket.OPEN) {
+        await new Promise((resolve) => {
+          this.resolveFlush = resolve;
+          this.node.port.postMessage('flush');
+        });
+        this.socket.send(JSON.stringify({ type: 'stop' }));
+        this.stopSent = true;
+      }
+
+      let timeout;
+      const timedOut = new Promise((_, reject) => {
+        timeout = setTimeout(() => reject(new Error('Live analysis: timeout')), FINAL_TIMEOUT);
+      });
+      try {
+        return await Promise.race([this.finalResult, timedOut]);
+      } finally {
+        clearTimeout(timeout);
+      }
+    } catch (error) {
+      // Los errores del socket llevan el estado del momento en que ocurrieron
+      if (error.stopSent === undefined) error.stopSent = this.stopSent;
+      throw error;
+    } finally {
+      this.close();
+    }
+  }
+
+  /**
+   * Cierra la conexión y el procesado de audio (sin guardar nada)
+   */
+  close() {
+    if (this.context && this.context.state !== 'closed') {
+      this.context.close();
+    }
+    if (this.socket && this.socket.readyState <= WebSocket.OPEN) {
+      this.socket.close();
+    }
+  }
+}
+
+/**
+ * Inicia el análisis en vivo de un stream; devuelve la sesión (stop/close)
+ */
+export const startLiveAnalysis = async (stream, options) => {
+  const session = new LiveAnalysisSession(options);
+  try {
+    await session.start(stream);
+  } catch (error) {
+    session.close();
+    throw error;
+  }
+  return session;
+};
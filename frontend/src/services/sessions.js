@@ -0,0 +1,71 @@
+/**
+ * Sessions Service
+ * /sessions/list y /sessions/{id} devuelven páginas (next_cursor); aquí se recorren todas
+ */
+
+const PAGE_SIZE = 200;  // Máximo que acepta el backend
+
+/**
+ * Carga todas las sesiones del usuario, de la más reciente a la más antigua
+ * @param {string} apiBase - URL base del backend
+ * @param {string} token - Token JWT del usuario
+ * @returns {Promise<Array>} Sesiones con recordings_count
+ */
+export const fetchAllSessions = async (apiBase, token) => {
+  const sessions = [];
+  let cursor = null;
+
+  do {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+
+    const response = await fetch(`${apiBase}/sessions/list?${params}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    });
+    if (!response.ok) {
+      throw new Error(`Error loading sessions: ${response.status}`);
+    }
+
+    const data = await response.json();
+    sessions.push(...(data.sessions || []));
+    cursor = data.next_cursor;
+  } while (cursor);
+
+  return sessions;
+};
+
+/**
+ * Carga una sesión con todas sus grabaciones (/sessions/{id} las pagina con next_cursor)
+ * @param {string} apiBase - URL base del backend
+ * @param {string} token - Token JWT del usuario
+ * @param {string} sessionId - ID de la sesión
+ * @returns {Promise<Object>} Sesión con recordings, de la más reciente a la más antigua
+ */
+export const fetchSessionWithRecordings = async (apiBase, token, sessionId) => {
+  let session = null;
+  const recordings = [];
+  let cursor = null;
+
+  do {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+
+    const response = await fetch(`${apiBase}/sessions/${sessionId}?${params}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    });
+    if (!response.ok) {
+      throw new Error(`Error loading session: ${response.status}`);
+    }
+
+    const data = await response.json();
+    session = session || data;
+    recordings.push(...(data.recordings || []));
+    cursor = data.next_cursor;
+  } while (cursor);
+
+  return { ...session, recordings, next_cursor: null };
+};